@@ -0,0 +1,276 @@
+import collections
+import argparse
+import logging
+import numpy
+import math
+import json
+import re
+import os
+
+from src.asterixdb.duration import parse_duration
+from src.asterixdb.baseline import BaselineStore
+
+logger = logging.getLogger(__name__)
+
+
+class LatencySketch:
+    """ Mergeable log-bucketed histogram (in the spirit of HDR), with a bounded relative error per bucket. """
+    RELATIVE_ERROR = 0.01
+    MINIMUM_VALUE = 1e-9
+
+    def __init__(self):
+        self.bucket_counts = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+
+    @classmethod
+    def _bucket(cls, value):
+        return math.floor(math.log(max(value, cls.MINIMUM_VALUE)) / math.log1p(cls.RELATIVE_ERROR))
+
+    @classmethod
+    def _value(cls, bucket):
+        # The midpoint of our bucket, so our error is at most half a bucket.
+        return (1 + cls.RELATIVE_ERROR) ** (bucket + 0.5)
+
+    def add(self, value):
+        self.bucket_counts[self._bucket(value)] += 1
+        self.count = self.count + 1
+        self.total = self.total + value
+
+    def merge(self, other):
+        self.bucket_counts.update(other.bucket_counts)
+        self.count = self.count + other.count
+        self.total = self.total + other.total
+        return self
+
+    def _arrays(self):
+        buckets = sorted(self.bucket_counts.keys())
+        return numpy.array([self._value(b) for b in buckets]), numpy.array([self.bucket_counts[b] for b in buckets])
+
+    @staticmethod
+    def _quantile(values, counts, q):
+        # Nearest-rank, to match AbstractBenchmarkRunnable.percentile.
+        rank = max(math.ceil(q * counts.sum()), 1)
+        return values[numpy.searchsorted(numpy.cumsum(counts), rank)]
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        values, counts = self._arrays()
+        return self._quantile(values, counts, q)
+
+    def bootstrap(self, statistic_f, number_of_resamples, random_generator):
+        """ Returns the statistic evaluated over resamples of our buckets (i.e. a multinomial over our counts). """
+        values, counts = self._arrays()
+        resampled_counts = random_generator.multinomial(self.count, counts / self.count, size=number_of_resamples)
+        return numpy.array([statistic_f(values, c) for c in resampled_counts])
+
+
+class ResultsAggregator:
+    """ Streams results.json files into latency sketches, keyed by execution, dataverse, query and parameters. """
+    METRICS = ['elapsedTime', 'clientTime']
+    RUN_LABEL_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}-(.*?)(?:-A)?$')
+    INDEXED_STATEMENT_PATTERN = re.compile(r'`compiler\.arrayindex`\s*"true"', re.IGNORECASE)
+
+    @staticmethod
+    def run_label(results_filename):
+        # Our results directories are named after the suite that produced them, e.g. <date>-IndexedAnalyticalQuery-A.
+        directory_name = os.path.basename(os.path.dirname(os.path.abspath(results_filename)))
+        label_match = ResultsAggregator.RUN_LABEL_PATTERN.match(directory_name)
+        return label_match.group(1) if label_match is not None else directory_name
+
+    def __init__(self, metrics=None, indexed_filenames=None):
+        self.metrics = self.METRICS if metrics is None else metrics
+        self.indexed_filenames = {os.path.abspath(f) for f in (indexed_filenames or [])}
+        self.sketches = collections.defaultdict(lambda: {m: LatencySketch() for m in self.metrics})
+        self.skipped_records = 0
+
+    def consume(self, results_filename):
+        run_label = self.run_label(results_filename)
+        is_indexed_run = os.path.abspath(results_filename) in self.indexed_filenames or run_label.startswith('Indexed')
+
+        # We only ever hold one line in memory, so multi-GB files are fine.
+        with open(results_filename) as results_fp:
+            for line in results_fp:
+                if line.strip() == '':
+                    continue
+                results = json.loads(line)
+                # Statements of a script are also summarized by their script's record, so we would count them twice.
+                if results.get('status') != 'success' or 'metrics' not in results or 'openLoop' in results or \
+                        'statementNumber' in results.get('script', {}):
+                    self.skipped_records = self.skipped_records + 1
+                    continue
+
+                is_indexed = is_indexed_run or \
+                    self.INDEXED_STATEMENT_PATTERN.search(results.get('statement', '')) is not None
+                group_key = (run_label, results.get('executionID'), results.get('dataverse'),
+                             results.get('queryNumber'), json.dumps(results.get('parameters'), sort_keys=True),
+                             is_indexed, results.get('configHash'),
+                             BaselineStore.statement_kind(results.get('statement', '')))
+                for metric in self.metrics:
+                    metric_value = results['metrics'].get(metric) if metric in results['metrics'] \
+                        else results.get(metric)
+                    metric_value = parse_duration(metric_value) \
+                        if metric_value is not None else None
+                    if metric_value is not None:
+                        self.sketches[group_key][metric].add(metric_value)
+
+    def merged(self, key_f):
+        """ Merges our sketches into coarser groups, given a function that maps a group key to a new key. """
+        merged_sketches = collections.defaultdict(lambda: {m: LatencySketch() for m in self.metrics})
+        for group_key, group_sketches in self.sketches.items():
+            new_key = key_f(group_key)
+            if new_key is None:
+                continue
+            for metric in self.metrics:
+                merged_sketches[new_key][metric].merge(group_sketches[metric])
+        return merged_sketches
+
+
+class ComparisonReporter:
+    """ Prints summary and comparison tables (with bootstrap confidence intervals) from a ResultsAggregator. """
+    SUMMARY_QUANTILES = [0.5, 0.95, 0.99]
+
+    def __init__(self, aggregator, quantile, confidence, number_of_resamples, seed, baseline_store=None):
+        self.aggregator = aggregator
+        self.baseline_store = baseline_store
+        self.quantile = quantile
+        self.confidence = confidence
+        self.number_of_resamples = number_of_resamples
+        self.random_generator = numpy.random.default_rng(seed)
+
+    def _statistic_f(self, values, counts):
+        return LatencySketch._quantile(values, counts, self.quantile)
+
+    def _interval(self, resamples):
+        alpha = (1 - self.confidence) / 2
+        return numpy.quantile(resamples, alpha), numpy.quantile(resamples, 1 - alpha)
+
+    @staticmethod
+    def _format_seconds(value):
+        return '-' if value is None else f'{value * 1000:.3f}ms'
+
+    @staticmethod
+    def _print_table(title, header, rows):
+        print(f'\n{title}')
+        column_widths = [max(len(str(c)) for c in column) for column in zip(header, *rows)]
+        for row in [header, ['-' * w for w in column_widths]] + rows:
+            print('  '.join(str(c).ljust(w) for c, w in zip(row, column_widths)))
+
+    @staticmethod
+    def _format_throughput(value):
+        return '-' if value is None else f'{value:.2f}'
+
+    def _corrected_columns(self, sketch, overhead):
+        """ Our quantile and (serial) throughput, raw and less the fixed overhead of the statement kind. """
+        raw_quantile = sketch.quantile(self.quantile)
+        raw_throughput = sketch.count / sketch.total if sketch.total > 0 else None
+        if overhead is None:
+            return [self._format_seconds(None), self._format_seconds(None),
+                    self._format_throughput(raw_throughput), self._format_throughput(None)]
+
+        # The overhead is a fixed shift, so it comes off of every quantile (but no latency goes below zero). If what
+        # remains is within our sketch error, the statement is all overhead and has no meaningful corrected throughput.
+        corrected_total = sketch.total - sketch.count * overhead
+        is_all_overhead = corrected_total <= sketch.total * LatencySketch.RELATIVE_ERROR
+        return [self._format_seconds(overhead), self._format_seconds(max(raw_quantile - overhead, 0.0)),
+                self._format_throughput(raw_throughput),
+                self._format_throughput(None if is_all_overhead else sketch.count / corrected_total)]
+
+    def print_summary(self):
+        header = ['run', 'executionID', 'dataverse', 'query', 'parameters', 'metric', 'n'] + \
+            [f'p{int(q * 100)}' for q in self.SUMMARY_QUANTILES] + [f'p{int(self.quantile * 100)} CI']
+        if self.baseline_store is not None:
+            header = header + ['kind', 'overhead', f'p{int(self.quantile * 100)} corrected', 'ops/s',
+                               'ops/s corrected']
+        rows = []
+        for group_key, group_sketches in sorted(self.aggregator.sketches.items(), key=lambda i: str(i[0])):
+            run_label, execution_id, dataverse, query_number, parameters, _, config_hash, statement_kind = group_key
+            for metric, sketch in group_sketches.items():
+                if sketch.count == 0:
+                    continue
+                lower, upper = self._interval(sketch.bootstrap(self._statistic_f, self.number_of_resamples,
+                                                               self.random_generator))
+                row = [run_label, execution_id[:8] if execution_id else '-', dataverse or '-',
+                       query_number or '-', parameters, metric, sketch.count] + \
+                    [self._format_seconds(sketch.quantile(q)) for q in self.SUMMARY_QUANTILES] + \
+                    [f'[{self._format_seconds(lower)}, {self._format_seconds(upper)}]']
+                if self.baseline_store is not None:
+                    overhead = self.baseline_store.overhead(config_hash, statement_kind, metric) \
+                        if config_hash is not None and statement_kind is not None else None
+                    row = row + [statement_kind or '-'] + self._corrected_columns(sketch, overhead)
+                rows.append(row)
+        self._print_table('Summary', header, rows)
+
+    def print_comparison(self, title, arm_f, baseline_arm, treatment_arm):
+        """ Compares two arms (e.g. ATOM vs. SARR) that share every other part of their group key. """
+        merged_sketches = self.aggregator.merged(arm_f)
+        comparison_keys = sorted({k[1] for k in merged_sketches.keys()}, key=str)
+        header = ['group', 'metric', f'{baseline_arm} n', f'{baseline_arm} p{int(self.quantile * 100)}',
+                  f'{treatment_arm} n', f'{treatment_arm} p{int(self.quantile * 100)}', 'ratio', 'ratio CI']
+        rows = []
+        for comparison_key in comparison_keys:
+            if (baseline_arm, comparison_key) not in merged_sketches or \
+                    (treatment_arm, comparison_key) not in merged_sketches:
+                continue
+            for metric in self.aggregator.metrics:
+                baseline = merged_sketches[(baseline_arm, comparison_key)][metric]
+                treatment = merged_sketches[(treatment_arm, comparison_key)][metric]
+                if baseline.count == 0 or treatment.count == 0:
+                    continue
+
+                # Each arm is resampled independently, and the ratio is taken resample by resample.
+                ratio_resamples = \
+                    treatment.bootstrap(self._statistic_f, self.number_of_resamples, self.random_generator) / \
+                    baseline.bootstrap(self._statistic_f, self.number_of_resamples, self.random_generator)
+                lower, upper = self._interval(ratio_resamples)
+                rows.append([' / '.join(str(c) for c in comparison_key), metric,
+                             baseline.count, self._format_seconds(baseline.quantile(self.quantile)),
+                             treatment.count, self._format_seconds(treatment.quantile(self.quantile)),
+                             f'{treatment.quantile(self.quantile) / baseline.quantile(self.quantile):.3f}',
+                             f'[{lower:.3f}, {upper:.3f}]'])
+        if len(rows) > 0:
+            self._print_table(title, header, rows)
+
+    def invoke(self):
+        self.print_summary()
+
+        # ATOM vs. SARR: the same suite (less its dataverse suffix), query and parameters.
+        self.print_comparison(
+            'ATOM vs. SARR', lambda k: None if k[2] not in {'atom', 'sarr'} else
+            (k[2].upper(), (re.sub(r'-(ATOM|SARR)$', '', k[0]), k[3], k[4])), 'ATOM', 'SARR')
+
+        # Non-indexed vs. indexed: the same suite (less its Basic / Indexed prefix), dataverse, query and parameters.
+        self.print_comparison(
+            'Non-indexed vs. indexed', lambda k:
+            ('indexed' if k[5] else 'non-indexed', (re.sub(r'^(Basic|Indexed)', '', k[0]), k[2], k[3], k[4])),
+            'non-indexed', 'indexed')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Summarize and compare latencies from one or more results files.')
+    parser.add_argument('results', type=str, nargs='+', help='results.json files to aggregate.')
+    parser.add_argument('--indexed', type=str, nargs='*', default=[],
+                        help='results.json files to treat as indexed runs (TPC-CH runs are detected on their own).')
+    parser.add_argument('--metrics', type=str, nargs='+', default=ResultsAggregator.METRICS,
+                        help='Latency metrics to aggregate.')
+    parser.add_argument('--quantile', type=float, default=0.5, help='Quantile to compare and bootstrap.')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of our intervals.')
+    parser.add_argument('--resamples', type=int, default=1000, help='Number of bootstrap resamples.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for our bootstrap resamples.')
+    parser.add_argument('--baselines', type=str, default='out/baselines',
+                        help='Directory of lower-bound baselines, to report overhead-corrected latencies.')
+    parser.add_argument('--no-baselines', action='store_true', help='Only report raw latencies.')
+    parser_args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    results_aggregator = ResultsAggregator(parser_args.metrics, parser_args.indexed)
+    for results_file in parser_args.results + [f for f in parser_args.indexed if f not in parser_args.results]:
+        logger.info(f'Aggregating {results_file}.')
+        results_aggregator.consume(results_file)
+    logger.info(f'Skipped {results_aggregator.skipped_records} record(s) without latency metrics '
+                f'(or already summarized by their script).')
+
+    ComparisonReporter(results_aggregator, parser_args.quantile, parser_args.confidence,
+                       parser_args.resamples, parser_args.seed,
+                       None if parser_args.no_baselines else BaselineStore(parser_args.baselines)).invoke()
@@ -0,0 +1,89 @@
+import statistics
+import datetime
+import hashlib
+import logging
+import json
+import re
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class BaselineStore:
+    """ Cached lower-bound latencies per statement kind, for each cluster configuration (by its hash). """
+    METRICS = ['elapsedTime', 'clientTime']
+    STATEMENT_KINDS = ['select', 'insert', 'upsert', 'delete', 'load']
+
+    # Only these parts of our config decide what a "fixed per-statement overhead" is.
+    CLUSTER_CONFIG_FIELDS = ['clusterController', 'allNodesInCluster', 'startCommand', 'isLeanResponse', 'httpSession']
+    STATEMENT_KIND_PATTERN = re.compile(r'^\s*\(*\s*(SELECT|FROM|WITH|LET|INSERT|UPSERT|DELETE|LOAD)\b', re.IGNORECASE)
+
+    @staticmethod
+    def cluster_config(config):
+        return {**{k: config['benchmark'].get(k) for k in BaselineStore.CLUSTER_CONFIG_FIELDS},
+                'package': config.get('package')}
+
+    @staticmethod
+    def config_hash(config):
+        cluster_config_json = json.dumps(BaselineStore.cluster_config(config), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(cluster_config_json.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def statement_kind(statement):
+        """ The kind of the last statement in a request (e.g. USE X; SELECT ...; is a select), if it has one. """
+        statements = [s for s in statement.split(';') if s.strip() != '']
+        kind_match = BaselineStore.STATEMENT_KIND_PATTERN.match(statements[-1]) if len(statements) > 0 else None
+        if kind_match is None:
+            return None
+        kind = kind_match.group(1).lower()
+        return 'select' if kind in {'from', 'with', 'let'} else kind
+
+    def __init__(self, store_dir='out/baselines'):
+        self.store_dir = store_dir
+        self.baselines = dict()
+
+    def _baseline_filename(self, config_hash):
+        return self.store_dir + '/' + config_hash + '.json'
+
+    def _read(self, config_hash):
+        if config_hash not in self.baselines:
+            baseline_filename = self._baseline_filename(config_hash)
+            if os.path.isfile(baseline_filename):
+                with open(baseline_filename) as baseline_fp:
+                    self.baselines[config_hash] = json.load(baseline_fp)
+            else:
+                self.baselines[config_hash] = None
+        return self.baselines[config_hash]
+
+    def get(self, config_hash, statement_kind):
+        baseline = self._read(config_hash)
+        return None if baseline is None else baseline['statements'].get(statement_kind)
+
+    def overhead(self, config_hash, statement_kind, metric):
+        """ Our fixed overhead is the median of the baseline distribution, in seconds. """
+        statement_baseline = self.get(config_hash, statement_kind)
+        if statement_baseline is None or metric not in statement_baseline['metrics']:
+            return None
+        return statement_baseline['metrics'][metric]['median']
+
+    def put(self, config, statement_kind, samples, execution_id):
+        """ Stores the (steady-state) samples of each metric for one statement kind, replacing any older ones. """
+        config_hash = self.config_hash(config)
+        baseline = self._read(config_hash) or {'configHash': config_hash,
+                                                'clusterConfig': self.cluster_config(config), 'statements': {}}
+        baseline['statements'][statement_kind] = {
+            'executionID': execution_id,
+            'measuredTime': str(datetime.datetime.now()),
+            'metrics': {m: {'numberOfSamples': len(v), 'median': statistics.median(v), 'samples': sorted(v)}
+                        for m, v in samples.items() if len(v) > 0}
+        }
+
+        # Write to a temporary file first, so a crash never leaves a partial baseline behind.
+        os.makedirs(self.store_dir, exist_ok=True)
+        baseline_filename = self._baseline_filename(config_hash)
+        with open(baseline_filename + '.tmp', 'w') as baseline_fp:
+            json.dump(baseline, baseline_fp)
+        os.replace(baseline_filename + '.tmp', baseline_filename)
+        self.baselines[config_hash] = baseline
+        logger.info(f'Stored the {statement_kind} baseline for configuration {config_hash} in {baseline_filename}.')
+        return config_hash
@@ -0,0 +1,14 @@
+import re
+
+DURATION_UNITS = {'ns': 1e-9, 'us': 1e-6, 'µs': 1e-6, 'ms': 1e-3, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ns|us|µs|ms|s|m|h)')
+
+
+def parse_duration(duration):
+    """ AsterixDB reports durations as strings (e.g. 12.3ms, 1m2.5s). We work in seconds. """
+    if isinstance(duration, (int, float)):
+        return float(duration)
+    matches = DURATION_PATTERN.findall(duration)
+    if len(matches) == 0:
+        return None
+    return sum(float(v) * DURATION_UNITS[u] for v, u in matches)
@@ -1,44 +1,317 @@
 import logging
 import json
 import abc
+import re
 import time
 import requests
+import requests.adapters
+import urllib3.connectionpool
+import urllib3.connection
 import uuid
 import timeit
 
 from src.executor import AbstractBenchmarkRunnable
+from src.plan_store import PlanStore
+from src.asterixdb.baseline import BaselineStore
+import src.asterixdb.duration
 
 logger = logging.getLogger(__name__)
 
 
+class _TimedHTTPConnection(urllib3.connection.HTTPConnection):
+    """ Remembers how long its socket took to open, and how many requests have been sent over that socket. """
+    connect_time = 0.0
+    requests_on_socket = 0
+
+    def connect(self):
+        t_before = timeit.default_timer()
+        super().connect()
+        self.connect_time = timeit.default_timer() - t_before
+        self.requests_on_socket = 0
+
+    def request(self, *args, **kwargs):
+        # We count after sending, as our socket may be (re)opened while sending.
+        super().request(*args, **kwargs)
+        self.requests_on_socket = self.requests_on_socket + 1
+
+
+class _TimedHTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
 class AbstractAsterixDBRunnable(AbstractBenchmarkRunnable, abc.ABC):
+    CANCEL_POLL_INTERVAL = 0.5
+    CANCEL_TIMEOUT = 600
+    TEMPLATE_STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'')
+    TEMPLATE_NUMBER_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
+    READY_INITIAL_BACKOFF = 0.1
+    READY_MAXIMUM_BACKOFF = 5.0
+    READY_REQUEST_TIMEOUT = 10
+    CONTEXT_STATEMENT_PATTERN = re.compile(r'^\s*(USE|SET)\s+(\S+)', re.IGNORECASE)
+
+    @staticmethod
+    def statement_template(lean_statement):
+        # Two statements share a template if they only differ in their (string or numeric) literals.
+        template = AbstractAsterixDBRunnable.TEMPLATE_STRING_PATTERN.sub('?', lean_statement)
+        return AbstractAsterixDBRunnable.TEMPLATE_NUMBER_PATTERN.sub('#', template)
+
+    @staticmethod
+    def split_statements(statement_script):
+        """ Splits a script on the semicolons that are outside of string literals, quoted identifiers and comments. """
+        statements, current_statement, i = [], [], 0
+        while i < len(statement_script):
+            c = statement_script[i]
+            if c in '\'"`':
+                # Quotes are escaped with a backslash, so we skip over any escaped character.
+                j = i + 1
+                while j < len(statement_script) and statement_script[j] != c:
+                    j = j + (2 if statement_script[j] == '\\' else 1)
+                current_statement.append(statement_script[i:j + 1])
+                i = j + 1
+            elif statement_script.startswith('--', i) or statement_script.startswith('//', i):
+                j = statement_script.find('\n', i)
+                i = len(statement_script) if j == -1 else j
+            elif statement_script.startswith('/*', i):
+                # Block comments can be hints (e.g. /*+ indexnl */), so we keep them.
+                j = statement_script.find('*/', i + 2)
+                j = len(statement_script) if j == -1 else j + 2
+                current_statement.append(statement_script[i:j])
+                i = j
+            elif c == ';':
+                statements.append(''.join(current_statement).strip() + ';')
+                current_statement, i = [], i + 1
+            else:
+                current_statement.append(c)
+                i = i + 1
+
+        statements.append(''.join(current_statement).strip())
+        return [s for s in statements if s.strip(' ;') != '']
+
+    @staticmethod
+    def parse_duration(duration):
+        return src.asterixdb.duration.parse_duration(duration)
+
+    @staticmethod
+    def response_latency(response_json):
+        # We sample on the server's own time if we have it, so our client does not add noise.
+        if response_json.get('status') != 'success':
+            return None
+        elif 'elapsedTime' in response_json.get('metrics', {}):
+            return AbstractAsterixDBRunnable.parse_duration(response_json['metrics']['elapsedTime'])
+        else:
+            return response_json.get('clientTime')
+
+    @staticmethod
+    def plan_hash(plans):
+        # Same hash as our plan store, so lean responses reference stored plans directly.
+        return PlanStore.content_hash(plans)
+
     def __init__(self, **kwargs):
         super().__init__(working_system='AsterixDB', **kwargs)
-        self.nc_uri = self.config['benchmark']['clusterController']['address'] + ':' + \
+        cc_uri = 'http://' + self.config['benchmark']['clusterController']['address'] + ':' + \
             str(self.config['benchmark']['clusterController']['port'])
-        self.nc_uri = 'http://' + self.nc_uri + '/query/service'
+        self.nc_uri = cc_uri + '/query/service'
+        self.running_requests_uri = cc_uri + '/admin/requests/running'
+        self.cluster_state_uri = cc_uri + '/admin/cluster'
+
+        # In lean mode, we only ask for plans the first time we see a statement template.
+        self.is_lean_response = self.config['benchmark'].get('isLeanResponse', False)
+        self.captured_plan_hashes = dict()
+        self.http_session, self.http_adapter = None, None
+        self.reset_http_session()
+
+        baseline_config = self.config['benchmark'].get('baseline', {'storeDir': 'out/baselines'})
+        self.baseline_store = BaselineStore(baseline_config['storeDir'])
+
+    def tag_record(self, record):
+        record['configHash'] = self.config_hash
+        super(AbstractAsterixDBRunnable, self).tag_record(record)
+
+    def reset_http_session(self):
+        if self.http_session is not None:
+            self.http_session.close()
+
+        # Reuse our connections to the cluster controller, so we don't pay for a TCP handshake on each statement.
+        session_config = self.config['benchmark'].get('httpSession', {'poolSize': 1, 'isKeepAlive': True})
+        self.http_adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=session_config['poolSize'])
+        self.http_adapter.poolmanager.pool_classes_by_scheme = \
+            {**self.http_adapter.poolmanager.pool_classes_by_scheme, 'http': _TimedHTTPConnectionPool}
+        self.http_session = requests.Session()
+        self.http_session.mount('http://', self.http_adapter)
+        if not session_config['isKeepAlive']:
+            self.http_session.headers['Connection'] = 'close'
+
+        # Our results are tagged with our cluster configuration (incl. our pool size), so reports can find the
+        # matching lower-bound baseline. Suites that resize our pool reset our session, so this stays current.
+        self.config_hash = BaselineStore.config_hash(self.config)
+
+    def _is_request_running(self, client_context_id):
+        running_requests = self.http_session.get(self.running_requests_uri, timeout=self.CANCEL_TIMEOUT).json()
+        return any(r.get('clientContextID') == client_context_id for r in running_requests)
+
+    def cancel_request(self, client_context_id):
+        with self.tracer.span('cancel_request', category='statement', clientContextID=client_context_id):
+            return self._cancel_request(client_context_id)
+
+    def _cancel_request(self, client_context_id):
+        logger.info(f'Cancelling request {client_context_id} on the cluster.')
+        t_before = timeit.default_timer()
+        cancellation = {'clientContextID': client_context_id, 'isCancelled': False}
+        try:
+            cancel_response = self.http_session.delete(self.running_requests_uri, timeout=self.CANCEL_TIMEOUT,
+                                                       params={'client_context_id': client_context_id})
+            cancellation['cancelStatusCode'] = cancel_response.status_code
+
+            # The job must be gone before we issue anything else, otherwise it will contaminate our measurements.
+            while timeit.default_timer() - t_before < self.CANCEL_TIMEOUT:
+                if not self._is_request_running(client_context_id):
+                    cancellation['isCancelled'] = True
+                    break
+                time.sleep(self.CANCEL_POLL_INTERVAL)
+
+        except requests.exceptions.RequestException as e:
+            logger.warning(f'Exception caught while cancelling request {client_context_id}: {str(e)}')
+
+        cancellation['cancelLatency'] = timeit.default_timer() - t_before
+        if not cancellation['isCancelled']:
+            logger.warning(f'Could not confirm that request {client_context_id} was cancelled.')
+        else:
+            logger.info(f'Request {client_context_id} cancelled in {cancellation["cancelLatency"]} seconds.')
+        return cancellation
 
     def execute_sqlpp(self, statement, timeout=None):
-        lean_statement = ' '.join(statement.split())
-        query_parameters = {
-            'statement': lean_statement,
-            'plan-format': 'STRING',
-            'optimized-logical-plan': True,
-            'logical-plan': True,
-            'job': True
+        with self.tracer.span('execute_sqlpp', category='statement', statement=statement.strip()[:120]) as span_args:
+            response_json = self._execute_sqlpp(statement, timeout)
+            span_args.update({k: response_json[k] for k in ['status', 'clientTime'] if k in response_json})
+            if 'metrics' in response_json:
+                span_args['elapsedTime'] = response_json['metrics'].get('elapsedTime')
+            return response_json
+
+    def execute_script(self, statement_script, timeout=None):
+        """ Executes each statement of a script on its own (logging each), returning one aggregated response. """
+        statements = self.split_statements(statement_script)
+        context_statements, timed_statements = dict(), []
+        for statement in statements:
+            context_match = self.CONTEXT_STATEMENT_PATTERN.match(statement)
+            if context_match is not None:
+                # Each request is its own session, so USE + SET must prefix every statement that follows them.
+                context_key = 'USE' if context_match.group(1).upper() == 'USE' else context_match.group(2)
+                context_statements[context_key] = statement
+            else:
+                timed_statements.append((dict(context_statements), statement))
+        if len(timed_statements) <= 1:
+            return self.execute_sqlpp(statement_script, timeout=timeout)
+
+        script_id = str(uuid.uuid4())
+        statement_responses = []
+        with self.tracer.span('execute_script', category='statement', scriptID=script_id,
+                              numberOfStatements=len(timed_statements)) as span_args:
+            for i, (statement_context, statement) in enumerate(timed_statements):
+                response_json = self.execute_sqlpp('\n'.join(list(statement_context.values()) + [statement]),
+                                                   timeout=timeout)
+                response_json['script'] = {'scriptID': script_id, 'statementNumber': i + 1,
+                                           'numberOfStatements': len(timed_statements)}
+                self.log_results(dict(response_json))
+                statement_responses.append(response_json)
+
+                # As with a multi-statement request, we do not go past a failed statement.
+                if response_json['status'] != 'success':
+                    break
+
+            aggregated_response = self._aggregate_script_responses(statement_script, statement_responses)
+            aggregated_response['script'] = {'scriptID': script_id, 'numberOfStatements': len(timed_statements)}
+            span_args['status'] = aggregated_response['status']
+            return aggregated_response
+
+    def _aggregate_script_responses(self, statement_script, statement_responses):
+        # Our last response supplies the status + results. Times (and counts) are summed across our statements.
+        aggregated_response = {k: v for k, v in statement_responses[-1].items()
+                               if k not in {'plans', 'planHash', 'isPlanCaptured', 'clientBreakdown', 'script'}}
+        aggregated_response['statement'] = ' '.join(statement_script.split())
+        aggregated_response['clientTime'] = sum(r.get('clientTime', 0.0) for r in statement_responses)
+        aggregated_response['statementTimes'] = [self.response_latency(r) for r in statement_responses]
+
+        aggregated_metrics, duration_metrics = dict(), set()
+        for response_json in statement_responses:
+            for metric_name, metric_value in response_json.get('metrics', {}).items():
+                if isinstance(metric_value, str):
+                    metric_value = self.parse_duration(metric_value)
+                    duration_metrics.add(metric_name)
+                if isinstance(metric_value, (int, float)):
+                    aggregated_metrics[metric_name] = aggregated_metrics.get(metric_name, 0) + metric_value
+        aggregated_response['metrics'] = {k: f'{v}s' if k in duration_metrics else v
+                                          for k, v in aggregated_metrics.items()}
+        return aggregated_response
+
+    def _client_breakdown(self, response_json, connect_time, time_to_first_byte, transfer_time, decode_time,
+                          response_bytes):
+        client_breakdown = {
+            'connectTime': connect_time,
+            'timeToFirstByte': time_to_first_byte,
+            'transferTime': transfer_time,
+            'decodeTime': decode_time,
+            'responseBytes': response_bytes
         }
 
+        # Anything beyond the server's own elapsed time is overhead of our harness (and the network).
+        server_time = self.parse_duration(response_json['metrics']['elapsedTime']) \
+            if 'elapsedTime' in response_json.get('metrics', {}) else None
+        if server_time is not None:
+            client_time = connect_time + time_to_first_byte + transfer_time + decode_time
+            client_breakdown['serverTime'] = server_time
+            client_breakdown['harnessOverhead'] = client_time - server_time
+            client_breakdown['isClientBound'] = connect_time + transfer_time + decode_time > server_time
+        return client_breakdown
+
+    def _execute_sqlpp(self, statement, timeout=None):
+        lean_statement = ' '.join(statement.split())
+        query_parameters = {'statement': lean_statement}
+        template_key = self.statement_template(lean_statement) if self.is_lean_response else None
+        is_plan_requested = not self.is_lean_response or template_key not in self.captured_plan_hashes
+        if is_plan_requested:
+            query_parameters.update({
+                'plan-format': 'STRING',
+                'optimized-logical-plan': True,
+                'logical-plan': True,
+                'job': True
+            })
+
         # Retry the query until success.
         while True:
             try:
+                # Tag our request, so we can find (and cancel) it on the cluster if we time out.
+                query_parameters['client_context_id'] = str(uuid.uuid4())
                 t_before = timeit.default_timer()
-                response_json = requests.post(self.nc_uri, query_parameters, timeout=timeout).json()
-                response_json['clientTime'] = timeit.default_timer() - t_before
+                with self.tracer.span('post', category='network'):
+                    # We stream our response, so we can separate waiting on the server from reading its response.
+                    with self.http_session.post(self.nc_uri, query_parameters, timeout=timeout, stream=True) \
+                            as http_response:
+                        t_headers = timeit.default_timer()
+
+                        # Our connection is ours alone until we have read our response, so its timings are ours too.
+                        http_connection = http_response.raw.connection
+                        is_connection_reused = http_connection.requests_on_socket > 1
+                        connect_time = 0.0 if is_connection_reused else http_connection.connect_time
+                        response_content = http_response.content
+                        t_content = timeit.default_timer()
+                    response_json = json.loads(response_content)
+                    t_decoded = timeit.default_timer()
+
+                    # Our span writes its trace event as it exits, so our timings must be taken before then.
+                    response_json['clientTime'] = t_decoded - t_before
+                    response_json['isConnectionReused'] = is_connection_reused
+                    response_json['clientBreakdown'] = self._client_breakdown(
+                        response_json, connect_time, t_headers - t_before - connect_time,
+                        t_content - t_headers, t_decoded - t_content, len(response_content))
                 break
             except requests.exceptions.RequestException as e:
                 if timeout is not None and isinstance(e, requests.exceptions.ReadTimeout):
                     logger.warning(f'Statement {statement} has run longer than the specified timeout {timeout}.')
-                    response_json = {'status': f'Timeout. Exception: {str(e)}'}
+                    response_json = {
+                        'status': f'Timeout. Exception: {str(e)}',
+                        'clientContextID': query_parameters['client_context_id'],
+                        'cancellation': self.cancel_request(query_parameters['client_context_id'])
+                    }
                     break
                 else:
                     logger.warning(f'Exception caught: {str(e)}. Restarting the query in 5 seconds...')
@@ -53,25 +326,73 @@ class AbstractAsterixDBRunnable(AbstractBenchmarkRunnable, abc.ABC):
         if 'plans' in response_json and 'job' in response_json['plans']:
             response_json['plans']['job'] = json.loads(response_json['plans']['job'])
 
+        # Measured repetitions of a captured template reference their plan by hash.
+        if self.is_lean_response and response_json['status'] == 'success':
+            if is_plan_requested:
+                plan_hash = self.plan_hash(response_json['plans']) if 'plans' in response_json else None
+                self.captured_plan_hashes[template_key] = plan_hash
+                response_json['isPlanCaptured'] = plan_hash is not None
+            response_json['planHash'] = self.captured_plan_hashes[template_key]
+
         # Add the query to response.
         response_json['statement'] = lean_statement
         return response_json
 
-    def restart_db(self):
-        super(AbstractAsterixDBRunnable, self).restart_db()
+    def _is_cluster_ready(self):
+        cluster_state = requests.get(self.cluster_state_uri, timeout=self.READY_REQUEST_TIMEOUT).json()
+        if cluster_state.get('state') != 'ACTIVE':
+            return False, f'cluster state is {cluster_state.get("state")}'
+
+        # Our node names may be hosts rather than NC IDs, so we also require as many active NCs as nodes we expect.
+        expected_nodes = self.config['benchmark'].get('allNodesInCluster', [])
+        active_nodes = {nc.get('node_id') for nc in cluster_state.get('ncs', []) if nc.get('state') == 'ACTIVE'}
+        reported_nodes = {nc.get('node_id') for nc in cluster_state.get('ncs', [])}
+        if len(active_nodes) < len(expected_nodes) or \
+                any(n in reported_nodes and n not in active_nodes for n in expected_nodes):
+            return False, f'only {sorted(active_nodes)} of {expected_nodes} are ACTIVE'
+
+        # The cluster is ACTIVE, but our query service must also be accepting statements.
+        starting_response_json = requests.post(self.nc_uri, {
+            'statement': "SELECT 1;",
+            'client_context_id': str(uuid.uuid4()),
+        }, timeout=self.READY_REQUEST_TIMEOUT).json()
+        return starting_response_json['status'] == 'success', f'status is {starting_response_json["status"]}'
+
+    def wait_until_ready(self):
+        """ Polls the cluster (with exponential backoff) until all nodes are ACTIVE. Returns the time-to-ready. """
+        t_before = timeit.default_timer()
+        ready_backoff, number_of_probes = self.READY_INITIAL_BACKOFF, 0
         while True:
-            time.sleep(5)
+            number_of_probes = number_of_probes + 1
             try:
-                starting_response_json = requests.post(self.nc_uri, {
-                    'statement': "SELECT 1;",
-                    'client_context_id': str(uuid.uuid4()),
-                }).json()
-                if starting_response_json['status'] == 'success':
+                is_ready, not_ready_reason = self._is_cluster_ready()
+                if is_ready:
                     break
-                else:
-                    logger.info(f'Status from initial connection to cluster not success, '
-                                f'but {starting_response_json["status"]}. Trying again in 5 seconds...')
-                    logger.info(f'JSON dump: {starting_response_json}')
+                logger.debug(f'Cluster is not ready ({not_ready_reason}). Trying again in {ready_backoff} seconds...')
+
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.debug(f'Cluster is not reachable ({str(e)}). Trying again in {ready_backoff} seconds...')
+
+            time.sleep(ready_backoff)
+            ready_backoff = min(ready_backoff * 2, self.READY_MAXIMUM_BACKOFF)
+
+        time_to_ready = timeit.default_timer() - t_before
+        logger.info(f'Cluster is ready after {time_to_ready} seconds ({number_of_probes} probe(s)).')
+        return time_to_ready, number_of_probes
+
+    def restart_db(self):
+        with self.tracer.span('restart_db', category='restart'):
+            super(AbstractAsterixDBRunnable, self).restart_db()
+            with self.tracer.span('wait_until_ready', category='restart'):
+                time_to_ready, number_of_probes = self.wait_until_ready()
+
+        # Any pooled connections were to the old instance.
+        self.reset_http_session()
 
-            except requests.exceptions.ConnectionError:
-                logger.info('Connection refused, trying again in 5 seconds...')
+        # Record how long our restart took, so this is not hidden inside of our benchmark time.
+        self.restart_timings['readyDuration'] = time_to_ready
+        self.restart_timings['readyProbes'] = number_of_probes
+        self.restart_timings['restartDuration'] = self.restart_timings['stopDuration'] + \
+            self.restart_timings['startDuration'] + self.restart_timings['readyDuration']
+        logger.info(f'Restart has completed: {self.restart_timings}')
+        self.log_summary({'restart': dict(self.restart_timings)})
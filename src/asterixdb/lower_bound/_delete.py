@@ -7,6 +7,7 @@ logger = logging.getLogger(__name__)
 
 class LowerBoundDelete(AbstractLowerBoundRunnable):
     NUMBER_OF_REPEATS = 1000
+    STATEMENT_KIND = 'delete'
 
     def perform_benchmark(self):
         logger.info('Building dataverse and loading dataverse.')
@@ -22,7 +23,9 @@ class LowerBoundDelete(AbstractLowerBoundRunnable):
         self.log_results(results)
 
         logger.info('Now executing the lower bound statement.')
-        for i in range(self.NUMBER_OF_REPEATS):
+        sampler = self.adaptive_sampler(self.NUMBER_OF_REPEATS, max_samples=self.NUMBER_OF_REPEATS)
+        while sampler.should_continue():
+            i = sampler.number_of_samples
             logger.debug(f'Executing run {i + 1} for the lower bound statement.')
             results = self.execute_sqlpp("""
                 USE TestDataverse;
@@ -31,6 +34,10 @@ class LowerBoundDelete(AbstractLowerBoundRunnable):
             """)
             results['runNumber'] = i + 1
             self.log_results(results)
+            if results['status'] != 'success':
+                sampler.stop('failure')
+            sampler.add(self.response_latency(results))
+        self.log_sampling(sampler)
 
     def perform_post(self):
         logger.info('Removing test dataverse.')
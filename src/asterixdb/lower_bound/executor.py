@@ -5,17 +5,23 @@ import datetime
 import abc
 
 from src.asterixdb.executor import AbstractAsterixDBRunnable
+from src.asterixdb.baseline import BaselineStore
 
 logger = logging.getLogger(__name__)
 
 
 class AbstractLowerBoundRunnable(AbstractAsterixDBRunnable, abc.ABC):
+    STATEMENT_KIND = None  # One of BaselineStore.STATEMENT_KINDS.
+
     def _collect_config(self):
         parser = argparse.ArgumentParser(description='Benchmark lean CRUD on an AsterixDB instance.')
         parser.add_argument('--config', type=str, default='config/asterixdb.json', help='Path to the config file.')
+        parser.add_argument('--remeasure', action='store_true',
+                            help='Measure our baseline even if one exists for this cluster configuration.')
         parser_args = parser.parse_args()
         with open(parser_args.config) as config_file:
             config_json = json.load(config_file)
+        config_json['remeasure'] = parser_args.remeasure
 
         config_json['resultsDir'] = 'out/' + datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + '-' + \
             self.__class__.__name__ + '-A'
@@ -24,3 +30,36 @@ class AbstractLowerBoundRunnable(AbstractAsterixDBRunnable, abc.ABC):
 
     def __init__(self, **kwargs):
         super().__init__(**{**self._collect_config(), **kwargs})
+        self.baseline_samples = {m: [] for m in BaselineStore.METRICS}
+        self.baseline_sampling = None
+
+    def log_results(self, results):
+        # Our measured statements (and only those) carry a run number.
+        if 'runNumber' in results and results['status'] == 'success':
+            self.baseline_samples['elapsedTime'].append(self.response_latency(results))
+            self.baseline_samples['clientTime'].append(results['clientTime'])
+        super().log_results(results)
+
+    def log_sampling(self, sampler):
+        self.baseline_sampling = sampler.summary()
+        super().log_sampling(sampler)
+
+    def invoke(self):
+        baseline = self.baseline_store.get(self.config_hash, self.STATEMENT_KIND)
+        if baseline is not None and not self.config.get('remeasure', False):
+            logger.info(f'A {self.STATEMENT_KIND} baseline for configuration {self.config_hash} already exists. '
+                        f'Use --remeasure to measure it again.')
+            self.log_results({'baseline': {'statementKind': self.STATEMENT_KIND, 'isCached': True,
+                                           **{m: v['median'] for m, v in baseline['metrics'].items()}}})
+            self.close_outputs()
+            return
+
+        super().invoke()
+        if self.baseline_sampling is None or self.baseline_sampling['stopReason'] == 'failure':
+            logger.warning(f'Not storing a {self.STATEMENT_KIND} baseline, our lower bound statement did not succeed.')
+            return
+
+        # Our warm-up runs are not part of the fixed overhead we want to subtract.
+        warmup_samples = self.baseline_sampling['warmupSamples']
+        self.baseline_store.put(self.config, self.STATEMENT_KIND,
+                                {m: v[warmup_samples:] for m, v in self.baseline_samples.items()}, self.execution_id)
@@ -0,0 +1,129 @@
+import concurrent.futures
+import logging
+import timeit
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class OpenLoopLoadGenerator:
+    """ Issues statements on a fixed arrival schedule, regardless of whether earlier statements have returned. """
+    LATENCY_PERCENTILES = [50, 95, 99]
+    SATURATION_THROUGHPUT_RATIO = 0.9
+    SATURATION_LATENCY_FACTOR = 10.0
+
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument('--rates', type=float, nargs='+', default=None,
+                            help='Arrival rates (statements / second) to sweep in open-loop mode.')
+        parser.add_argument('--schedule', type=str, choices=['poisson', 'constant'], default='poisson',
+                            help='Arrival schedule for open-loop mode.')
+        parser.add_argument('--duration', type=float, default=60.0,
+                            help='Seconds to issue statements for, per arrival rate in open-loop mode.')
+        parser.add_argument('--max-outstanding', type=int, default=64,
+                            help='Maximum number of in-flight statements in open-loop mode.')
+
+    def __init__(self, runnable, schedule, duration, max_outstanding, seed=None):
+        self.runnable = runnable
+        self.schedule = schedule
+        self.duration = duration
+        self.max_outstanding = max_outstanding
+        self.seed = random.getrandbits(64) if seed is None else seed
+
+        # Every outstanding statement needs its own connection.
+        session_config = self.runnable.config['benchmark'].setdefault('httpSession',
+                                                                      {'poolSize': 1, 'isKeepAlive': True})
+        session_config['poolSize'] = max(session_config['poolSize'], self.max_outstanding)
+        self.runnable.reset_http_session()
+
+    def number_of_arrivals(self, rate):
+        # An upper bound on the number of statements we will issue, used to size our statement lists.
+        return int(rate * self.duration * 1.5) + 1
+
+    def _arrival_offsets(self, rate):
+        arrival_generator = random.Random(self.seed)
+        offset = 0.0
+        while True:
+            offset = offset + (arrival_generator.expovariate(rate) if self.schedule == 'poisson' else 1.0 / rate)
+            if offset >= self.duration:
+                return
+            yield offset
+
+    def _issue(self, statement, intended_start, schedule_start, request_number, rate, result_fields):
+        actual_start = timeit.default_timer()
+        results = self.runnable.execute_sqlpp(statement)
+        completion = timeit.default_timer()
+
+        # Latency is measured from when the statement *should* have been sent (i.e. no coordinated omission).
+        results['openLoop'] = {
+            'offeredRate': rate,
+            'schedule': self.schedule,
+            'requestNumber': request_number,
+            'intendedStartTime': intended_start - schedule_start,
+            'actualStartTime': actual_start - schedule_start,
+            'queueDelay': actual_start - intended_start,
+            'serviceTime': completion - actual_start,
+            'latency': completion - intended_start
+        }
+        if 'results' in results:
+            del results['results']
+        results.update(result_fields)
+        self.runnable.log_results(results)
+        return results['status'] == 'success', results['openLoop']['latency']
+
+    def run_at_rate(self, rate, statements, **result_fields):
+        logger.info(f'Issuing statements at {rate} / second ({self.schedule} arrivals) for {self.duration} seconds.')
+        request_futures = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_outstanding) as executor:
+            schedule_start = timeit.default_timer()
+            for i, offset in enumerate(self._arrival_offsets(rate)):
+                intended_start = schedule_start + offset
+                time.sleep(max(intended_start - timeit.default_timer(), 0))
+                request_futures.append(executor.submit(self._issue, statements[i % len(statements)], intended_start,
+                                                       schedule_start, i + 1, rate, result_fields))
+            schedule_end = timeit.default_timer()
+            request_outcomes = [f.result() for f in request_futures]
+        completion_end = timeit.default_timer()
+
+        sorted_latencies = sorted(latency for _, latency in request_outcomes)
+        summary = {
+            'offeredRate': rate,
+            'schedule': self.schedule,
+            'duration': self.duration,
+            'numberOfRequests': len(request_outcomes),
+            'numberOfFailures': sum(1 for is_successful, _ in request_outcomes if not is_successful),
+            'scheduleLag': schedule_end - schedule_start - self.duration,
+            'achievedThroughput': len(request_outcomes) / max(completion_end - schedule_start, self.duration),
+            'latencyPercentiles': {f'p{p}': self.runnable.percentile(sorted_latencies, p)
+                                   for p in self.LATENCY_PERCENTILES}
+        }
+        logger.info(f'Open-loop summary at {rate} / second: {summary}')
+        return summary
+
+    def sweep(self, rates, statements_f, **result_fields):
+        """ Runs each rate in ascending order, and reports the last rate before the cluster saturates. """
+        rate_summaries, saturation_rate, knee_rate = [], None, None
+        for rate in sorted(rates):
+            statements = statements_f(rate)
+            if len(statements) == 0:
+                # e.g. we have run out of (never before upserted) keys to write.
+                logger.warning(f'No statements left to issue at {rate} / second. Stopping our sweep.')
+                break
+            summary = self.run_at_rate(rate, statements, **result_fields)
+            rate_summaries.append(summary)
+
+            # We are saturated once we fall behind our offered load, or once tail latency blows up.
+            baseline_p99 = rate_summaries[0]['latencyPercentiles']['p99']
+            is_saturated = summary['achievedThroughput'] < self.SATURATION_THROUGHPUT_RATIO * rate or \
+                (baseline_p99 is not None and summary['latencyPercentiles']['p99'] is not None and
+                 summary['latencyPercentiles']['p99'] > self.SATURATION_LATENCY_FACTOR * baseline_p99)
+            if is_saturated and knee_rate is None:
+                knee_rate = rate
+            elif knee_rate is None:
+                saturation_rate = rate
+
+        sweep_summary = {'rates': rate_summaries, 'maxSustainedRate': saturation_rate, 'kneeRate': knee_rate}
+        self.runnable.log_summary({'openLoopSweep': sweep_summary, **result_fields})
+        logger.info(f'Maximum sustained rate: {saturation_rate}. First saturated rate: {knee_rate}.')
+        return sweep_summary
@@ -1,10 +1,45 @@
+import multiprocessing
 import datetime
 import decimal
 import random
+import shutil
 import faker
 import json
 import argparse
 import abc
+import os
+
+
+class FeistelPermutation:
+    """ Seeded bijection on [0, domain_size), using a balanced Feistel network + cycle-walking (O(1) memory). """
+    NUMBER_OF_ROUNDS = 6
+
+    def __init__(self, domain_size, seed):
+        self.domain_size = domain_size
+
+        # Our network works on an even number of bits that covers the domain, so cycle-walking takes < 4 steps.
+        self.half_bits = max((domain_size - 1).bit_length() + 1, 2) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        round_key_generator = random.Random(seed)
+        self.round_keys = [round_key_generator.getrandbits(64) for _ in range(self.NUMBER_OF_ROUNDS)]
+
+    def _round_function(self, right, round_key):
+        x = ((right ^ round_key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        return (x ^ (x >> 31)) & self.half_mask
+
+    def _encrypt(self, x):
+        left, right = x >> self.half_bits, x & self.half_mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ self._round_function(right, round_key)
+        return (left << self.half_bits) | right
+
+    def permute(self, index):
+        x = self._encrypt(index)
+        while x >= self.domain_size:
+            x = self._encrypt(x)
+        return x
 
 
 class PrimaryKeyGeneratorFactory:
@@ -19,13 +54,18 @@ class PrimaryKeyGeneratorFactory:
         return _range_based_pk_generator
 
     @staticmethod
-    def provide_rand_range_generator(start_id, end_id, dataset_size):
-        # Note this is all in memory! No large ranges!
-        def _random_range_based_pk_generator():
-            for pk in random.sample(range(start_id, end_id), dataset_size):
-                yield pk
+    def provide_permutation_generator(start_id, end_id, dataset_size, seed, offset=0):
+        # Positions [offset, offset + dataset_size) of one seeded permutation. Disjoint offsets never share a PK.
+        permutation = FeistelPermutation(end_id - start_id, seed)
+        if offset + dataset_size > end_id - start_id:
+            raise ValueError(f'Cannot draw {dataset_size} keys at offset {offset} from a range of '
+                             f'{end_id - start_id} keys.')
+
+        def _permutation_based_pk_generator():
+            for i in range(offset, offset + dataset_size):
+                yield start_id + permutation.permute(i)
 
-        return _random_range_based_pk_generator
+        return _permutation_based_pk_generator
 
 
 class _AbstractShopALotDatagen(abc.ABC):
@@ -171,6 +211,9 @@ class AbstractOrdersDatagen(_AbstractShopALotDatagen, abc.ABC):
         self.store_id_end = kwargs['store_end_id']
         self.store_id_zfill = len(str(self.store_id_end))
 
+        # All orders are placed this month. A fixed reference time keeps this reproducible across processes.
+        self.reference_time = kwargs.get('reference_time', None)
+
         self.product_iter = self._product_generator()
         super().__init__(primary_key='order_id', **kwargs)
 
@@ -185,7 +228,10 @@ class AbstractOrdersDatagen(_AbstractShopALotDatagen, abc.ABC):
             "product_id": product['product_id']
         }
 
-        time_placed = self.faker_datagen.date_time_this_month()
+        reference_time = datetime.datetime.now() if self.reference_time is None else self.reference_time
+        time_placed = self.faker_datagen.date_time_between_dates(
+            datetime_start=reference_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+            datetime_end=reference_time)
         pickup_time = self.faker_datagen.date_time_between_dates(
             datetime_start=time_placed, datetime_end=time_placed + datetime.timedelta(hours=6))
         date_fulfilled_field = str(self.faker_datagen.date_time_between_dates(
@@ -212,6 +258,15 @@ class AbstractOrdersDatagen(_AbstractShopALotDatagen, abc.ABC):
 
 
 class DatagenAbstractFactoryProvider:
+    @staticmethod
+    def provide_engine_class(datagen_class: _AbstractShopALotDatagen, engine='faker'):
+        if engine == 'faker':
+            return datagen_class
+
+        # The vectorized engine requires NumPy, so we only import it when asked for.
+        from src.asterixdb.shopalot.vectorized_datagen import VECTORIZED_DATAGEN_CLASSES
+        return VECTORIZED_DATAGEN_CLASSES[datagen_class.__name__]
+
     @staticmethod
     def provide_memory_abstract_factory(datagen_class: _AbstractShopALotDatagen):
         class _ForMemoryDatagen(datagen_class):
@@ -231,32 +286,42 @@ class DatagenAbstractFactoryProvider:
         return _ForMemoryDatagen
 
     @staticmethod
-    def provide_disk_abstract_factory(datagen_class: _AbstractShopALotDatagen):
+    def provide_disk_abstract_factory(datagen_class: _AbstractShopALotDatagen, shopalot_config):
         class _ToFileDatagen(datagen_class):
-            def __init__(self, **kwargs):
+            def __init__(self, shard_range=None, shard_number=None, reference_time=None, **kwargs):
                 config = {
                     'chunk_size': kwargs['chunkSize'],
                     'dataset_size': kwargs['idRange']['end'] - kwargs['idRange']['start'],
                     'pk_zfill': len(str(kwargs['idRange']['end'])),
-                    'user_start_id': main_config_json['users']['idRange']['start'],
-                    'user_end_id': main_config_json['users']['idRange']['end'],
-                    'store_start_id': main_config_json['stores']['idRange']['start'],
-                    'store_end_id': main_config_json['stores']['idRange']['end']
+                    'user_start_id': shopalot_config['users']['idRange']['start'],
+                    'user_end_id': shopalot_config['users']['idRange']['end'],
+                    'store_start_id': shopalot_config['stores']['idRange']['start'],
+                    'store_end_id': shopalot_config['stores']['idRange']['end'],
+                    'reference_time': datetime.datetime.now() if reference_time is None else reference_time
                 }
+
+                # A shard only generates a slice of the ID range (but keys are still formatted w/ the full range).
+                if shard_range is None:
+                    shard_range = kwargs['idRange']
                 primary_key_generator = PrimaryKeyGeneratorFactory.\
-                    provide_range_generator(kwargs['idRange']['start'], kwargs['idRange']['end'])
+                    provide_range_generator(shard_range['start'], shard_range['end'])
                 super().__init__(primary_key_generator=primary_key_generator, **config)
 
+                def _open_output(filename):
+                    if shard_number is not None:
+                        filename = ShardedDatagenExecutor.shard_filename(filename, shard_number)
+                    return open(filename, 'w')
+
                 self.atom_fps = {
-                    'full': open(kwargs['atomDataverse']['fullFilename'], 'w'),
-                    'eighth': open(kwargs['atomDataverse']['eighthFilename'], 'w')
+                    'full': _open_output(kwargs['atomDataverse']['fullFilename']),
+                    'eighth': _open_output(kwargs['atomDataverse']['eighthFilename'])
                 }
                 self.sarr_fps = {
-                    'full': open(kwargs['sarrDataverse']['fullFilename'], 'w'),
-                    'eighth': open(kwargs['sarrDataverse']['eighthFilename'], 'w')
+                    'full': _open_output(kwargs['sarrDataverse']['fullFilename']),
+                    'eighth': _open_output(kwargs['sarrDataverse']['eighthFilename'])
                 }
 
-                self.datagen_counter = kwargs['idRange']['start']
+                self.datagen_counter = shard_range['start']
 
             @staticmethod
             def _write_to_file(out_fp, out_json):
@@ -279,13 +344,127 @@ class DatagenAbstractFactoryProvider:
         return _ToFileDatagen
 
 
+class ShardedDatagenExecutor:
+    """ Generates a dataset across a process pool, where each worker owns a contiguous slice of the ID range. """
+    DATAVERSE_KEYS = ['atomDataverse', 'sarrDataverse']
+    FILENAME_KEYS = ['fullFilename', 'eighthFilename']
+
+    @staticmethod
+    def shard_filename(filename, shard_number):
+        filename_root, filename_extension = os.path.splitext(filename)
+        return f'{filename_root}-Shard{shard_number}{filename_extension}'
+
+    @staticmethod
+    def partition_range(start_id, end_id, num_shards):
+        shard_ranges, shard_start = [], start_id
+        for i in range(num_shards):
+            shard_end = start_id + ((end_id - start_id) * (i + 1)) // num_shards
+            if shard_end > shard_start:
+                shard_ranges.append({'start': shard_start, 'end': shard_end})
+            shard_start = shard_end
+
+        return shard_ranges
+
+    @staticmethod
+    def _invoke_shard(datagen_class, shopalot_config, dataset_name, shard_range, shard_number, reference_time):
+        datagen_factory = DatagenAbstractFactoryProvider.provide_disk_abstract_factory(datagen_class, shopalot_config)
+        datagen_instance = datagen_factory(shard_range=shard_range, shard_number=shard_number,
+                                           reference_time=reference_time, **shopalot_config[dataset_name])
+        datagen_instance.invoke()
+        return shard_number
+
+    def __init__(self, datagen_class, shopalot_config, dataset_name, num_workers, num_shards=None, shard_nodes=None):
+        self.datagen_class = datagen_class
+        self.shopalot_config = shopalot_config
+        self.dataset_name = dataset_name
+        self.num_workers = num_workers
+        self.shard_nodes = shard_nodes
+
+        # We can have more shards than workers (e.g. one shard per NC partition), but never fewer.
+        dataset_config = self.shopalot_config[self.dataset_name]
+        self.shard_ranges = self.partition_range(dataset_config['idRange']['start'], dataset_config['idRange']['end'],
+                                                 self.num_workers if num_shards is None else num_shards)
+
+    def _concatenate_shards(self):
+        dataset_config = self.shopalot_config[self.dataset_name]
+        for dataverse_key in self.DATAVERSE_KEYS:
+            for filename_key in self.FILENAME_KEYS:
+                output_filename = dataset_config[dataverse_key][filename_key]
+                with open(output_filename, 'wb') as output_fp:
+                    for shard_number in range(len(self.shard_ranges)):
+                        shard_filename = self.shard_filename(output_filename, shard_number)
+                        with open(shard_filename, 'rb') as shard_fp:
+                            shutil.copyfileobj(shard_fp, output_fp)
+                        os.remove(shard_filename)
+
+    def _write_manifest(self):
+        dataset_config = self.shopalot_config[self.dataset_name]
+        manifest_json = {'idRange': dataset_config['idRange'], 'shardRanges': self.shard_ranges}
+
+        # Shards are assigned to our nodes round-robin. The files must be copied to (or shared with) their node.
+        if self.shard_nodes is not None:
+            manifest_json['shardNodes'] = [self.shard_nodes[i % len(self.shard_nodes)]
+                                           for i in range(len(self.shard_ranges))]
+        for dataverse_key in self.DATAVERSE_KEYS:
+            manifest_json[dataverse_key] = {}
+            for filename_key in self.FILENAME_KEYS:
+                output_filename = dataset_config[dataverse_key][filename_key]
+                manifest_json[dataverse_key][filename_key] = \
+                    [self.shard_filename(output_filename, i) for i in range(len(self.shard_ranges))]
+
+        manifest_filename = self.manifest_filename(self.shopalot_config, self.dataset_name)
+        with open(manifest_filename, 'w') as manifest_fp:
+            json.dump(manifest_json, manifest_fp, indent=2)
+        return manifest_filename
+
+    @staticmethod
+    def manifest_filename(shopalot_config, dataset_name):
+        return os.path.join(shopalot_config['dataPath'], f'{dataset_name.capitalize()}Manifest.json')
+
+    def invoke(self, is_manifest=False, reference_time=None):
+        # Every shard must agree on what "now" is.
+        if reference_time is None:
+            reference_time = datetime.datetime.now()
+
+        with multiprocessing.Pool(processes=min(self.num_workers, len(self.shard_ranges))) as pool:
+            shard_results = [pool.apply_async(self._invoke_shard, (self.datagen_class, self.shopalot_config,
+                                                                   self.dataset_name, shard_range, i, reference_time))
+                             for i, shard_range in enumerate(self.shard_ranges)]
+            [r.get() for r in shard_results]
+
+        # Shards are written in ID order, so concatenating them gives us the same files as a serial run.
+        if is_manifest:
+            return self._write_manifest()
+        else:
+            self._concatenate_shards()
+            return None
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Generate ShopALot JSON data.')
     parser.add_argument('dataset', type=str, choices=['user', 'store', 'order'], help='Which dataset to generate.')
     parser.add_argument('--config', type=str, default='config/shopalot.json', help='Path to the config file.')
+    parser.add_argument('--engine', type=str, choices=['faker', 'vectorized'], default=None,
+                        help='Record generation engine. Defaults to the "engine" entry in the config file.')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes to generate the data with.')
+    parser.add_argument('--manifest', action='store_true',
+                        help='Keep the per-worker shard files and write a manifest, instead of concatenating.')
+    parser.add_argument('--shards', type=int, default=None,
+                        help='Number of shard files to write with --manifest. Defaults to the number of workers.')
+    parser.add_argument('--per-node', action='store_true',
+                        help='Assign shards to the nodes in "allNodesInCluster" of the given cluster config file.')
+    parser.add_argument('--cluster', type=str, default='config/asterixdb.json', help='Path to the cluster config file.')
     command_line_args = parser.parse_args()
+    if command_line_args.workers < 1:
+        parser.error('--workers must be at least 1.')
+    if command_line_args.shards is not None and not command_line_args.manifest:
+        parser.error('--shards only applies with --manifest (shards are otherwise concatenated into one file).')
     with open(command_line_args.config) as config_file:
         main_config_json = json.load(config_file)
+    main_shard_nodes = None
+    if command_line_args.per_node:
+        with open(command_line_args.cluster) as cluster_file:
+            main_shard_nodes = json.load(cluster_file)['benchmark']['allNodesInCluster']
 
     # Determine our parent class, based on the given dataset.
     if command_line_args.dataset == 'user':
@@ -294,8 +473,15 @@ if __name__ == '__main__':
         datagen_parent = AbstractStoresDatagen
     else:
         datagen_parent = AbstractOrdersDatagen
+    datagen_engine = command_line_args.engine or main_config_json.get('engine', 'faker')
+    datagen_parent = DatagenAbstractFactoryProvider.provide_engine_class(datagen_parent, datagen_engine)
 
     # Invoke our datagen.
-    datagen_factory = DatagenAbstractFactoryProvider.provide_disk_abstract_factory(datagen_parent)
-    datagen_instance = datagen_factory(**(main_config_json[command_line_args.dataset + 's']))
-    datagen_instance.invoke()
+    if command_line_args.workers > 1 or command_line_args.manifest:
+        sharded_datagen = ShardedDatagenExecutor(datagen_parent, main_config_json, command_line_args.dataset + 's',
+                                                 command_line_args.workers, command_line_args.shards, main_shard_nodes)
+        sharded_datagen.invoke(is_manifest=command_line_args.manifest)
+    else:
+        datagen_factory = DatagenAbstractFactoryProvider.provide_disk_abstract_factory(datagen_parent, main_config_json)
+        datagen_instance = datagen_factory(**(main_config_json[command_line_args.dataset + 's']))
+        datagen_instance.invoke()
@@ -26,6 +26,55 @@ class OrdersEqualityPredicateQuery(AbstractEqualityPredicateQuery):
             'num_queries': 500
         })
 
+    def atom_statement(self, sample_order, atom_num):
+        sample_order_qty = sample_order['item']['qty']
+        sample_order_product = sample_order['item']['product_id']
+        return f"""
+            SELECT O
+            FROM ShopALot.ATOM.Orders O
+            WHERE O.item.qty = {sample_order_qty} AND 
+                  O.item.product_id = "{sample_order_product}";
+        """
+
+    def sarr_statement(self, sample_order, sarr_num):
+        sample_order_qty = sample_order['items'][0]['qty']
+        sample_order_product = sample_order['items'][0]['product_id']
+        if sarr_num == 1:
+            return f"""
+                SELECT O
+                FROM ShopALot.SARR.Orders O
+                UNNEST O.items OI
+                WHERE OI.qty = {sample_order_qty} AND 
+                      OI.product_id = "{sample_order_product}"
+                LIMIT 10;
+            """
+        elif sarr_num == 2:
+            return f"""
+                SELECT DISTINCT O
+                FROM ShopALot.SARR.Orders O
+                UNNEST O.items OI
+                WHERE OI.qty = {sample_order_qty} AND 
+                      OI.product_id = "{sample_order_product}"
+                LIMIT 10;
+            """
+        elif sarr_num == 3:
+            return f"""
+                SELECT O    
+                FROM ShopALot.SARR.Orders O
+                WHERE (SOME OI IN O.items SATISFIES OI.qty = {sample_order_qty} AND 
+                       OI.product_id = "{sample_order_product}")
+                LIMIT 10;
+            """
+        else:
+            return f"""
+                SELECT O    
+                FROM ShopALot.SARR.Orders O
+                WHERE LEN(O.items) > 0 AND 
+                      (EVERY OI IN O.items SATISFIES OI.qty = {sample_order_qty} AND 
+                       OI.product_id = "{sample_order_product}")
+                LIMIT 10;
+            """
+
     def benchmark_atom(self, working_sample_objects, atom_num):
         if not self.enable_index_only(atom_num == 1):
             return False
@@ -33,12 +82,7 @@ class OrdersEqualityPredicateQuery(AbstractEqualityPredicateQuery):
         for i, sample_order in enumerate(working_sample_objects):
             sample_order_qty = sample_order['item']['qty']
             sample_order_product = sample_order['item']['product_id']
-            results = self.execute_sqlpp(f"""
-                SELECT O
-                FROM ShopALot.ATOM.Orders O
-                WHERE O.item.qty = {sample_order_qty} AND 
-                      O.item.product_id = "{sample_order_product}";
-            """)
+            results = self.execute_sqlpp(self.atom_statement(sample_order, atom_num))
             if len(results['results']) == 0:
                 logger.error(f'Query {i + 1} was not successful! "[{sample_order_qty}, '
                              f'{sample_order_product}]" not found.')
@@ -54,42 +98,7 @@ class OrdersEqualityPredicateQuery(AbstractEqualityPredicateQuery):
         for i, sample_order in enumerate(working_sample_objects):
             sample_order_qty = sample_order['items'][0]['qty']
             sample_order_product = sample_order['items'][0]['product_id']
-            if sarr_num == 1:
-                results = self.execute_sqlpp(f"""
-                    SELECT O
-                    FROM ShopALot.SARR.Orders O
-                    UNNEST O.items OI
-                    WHERE OI.qty = {sample_order_qty} AND 
-                          OI.product_id = "{sample_order_product}"
-                    LIMIT 10;
-                """)
-            elif sarr_num == 2:
-                results = self.execute_sqlpp(f"""
-                    SELECT DISTINCT O
-                    FROM ShopALot.SARR.Orders O
-                    UNNEST O.items OI
-                    WHERE OI.qty = {sample_order_qty} AND 
-                          OI.product_id = "{sample_order_product}"
-                    LIMIT 10;
-                """)
-            elif sarr_num == 3:
-                results = self.execute_sqlpp(f"""
-                    SELECT O    
-                    FROM ShopALot.SARR.Orders O
-                    WHERE (SOME OI IN O.items SATISFIES OI.qty = {sample_order_qty} AND 
-                           OI.product_id = "{sample_order_product}")
-                    LIMIT 10;
-                """)
-            else:
-                results = self.execute_sqlpp(f"""
-                    SELECT O    
-                    FROM ShopALot.SARR.Orders O
-                    WHERE LEN(O.items) > 0 AND 
-                          (EVERY OI IN O.items SATISFIES OI.qty = {sample_order_qty} AND 
-                           OI.product_id = "{sample_order_product}")
-                    LIMIT 10;
-                """)
-
+            results = self.execute_sqlpp(self.sarr_statement(sample_order, sarr_num))
             if len(results['results']) == 0:
                 logger.error(f'Query {i + 1} was not successful! "[{sample_order_qty}, '
                              f'{sample_order_product}]" not found.')
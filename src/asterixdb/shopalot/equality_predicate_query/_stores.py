@@ -22,18 +22,56 @@ class StoresEqualityPredicateQuery(AbstractEqualityPredicateQuery):
             'num_queries': 40
         })
 
+    def atom_statement(self, sample_store, atom_num):
+        sample_category = sample_store['category']
+        return f"""
+             SELECT S
+             FROM ShopALot.ATOM.Stores S
+             WHERE S.category = "{sample_category}"
+             LIMIT 10;
+         """
+
+    def sarr_statement(self, sample_store, sarr_num):
+        sample_category = sample_store['categories'][0]
+        if sarr_num == 1:
+            return f"""
+                SELECT S
+                FROM ShopALot.SARR.Stores S
+                UNNEST S.categories SC 
+                WHERE SC = "{sample_category}"
+                LIMIT 10;
+            """
+        elif sarr_num == 2:
+            return f"""
+                SELECT DISTINCT S
+                FROM ShopALot.SARR.Stores S
+                UNNEST S.categories SC 
+                WHERE SC = "{sample_category}"
+                LIMIT 10;
+            """
+        elif sarr_num == 3:
+            return f"""
+                SELECT S
+                FROM ShopALot.SARR.Stores S
+                WHERE "{sample_category}" IN S.categories
+                LIMIT 10;
+            """
+        else:
+            return f"""
+                SELECT S
+                FROM ShopALot.SARR.Stores S
+                WHERE LEN(S.categories) > 0 AND
+                     (EVERY SC IN S.categories SATISFIES SC = "{sample_category}")
+                LIMIT 10;
+            """
+
     def benchmark_atom(self, working_sample_objects, atom_num):
         if not self.enable_index_only(atom_num == 1):
             return False
 
         for i, sample_store in enumerate(working_sample_objects):
             sample_category = sample_store['category']
-            results = self.execute_sqlpp(f"""
-                 SELECT S
-                 FROM ShopALot.ATOM.Stores S
-                 WHERE S.category = "{sample_category}"
-                 LIMIT 10;
-             """)
+            results = self.execute_sqlpp(self.atom_statement(sample_store, atom_num))
             if len(results['results']) == 0:
                 logger.error(f'Query {i + 1} was not successful! "{sample_category}" not found.')
                 return False
@@ -47,38 +85,7 @@ class StoresEqualityPredicateQuery(AbstractEqualityPredicateQuery):
     def benchmark_sarr(self, working_sample_objects, sarr_num):
         for i, sample_store in enumerate(working_sample_objects):
             sample_category = sample_store['categories'][0]
-            if sarr_num == 1:
-                results = self.execute_sqlpp(f"""
-                    SELECT S
-                    FROM ShopALot.SARR.Stores S
-                    UNNEST S.categories SC 
-                    WHERE SC = "{sample_category}"
-                    LIMIT 10;
-                """)
-            elif sarr_num == 2:
-                results = self.execute_sqlpp(f"""
-                    SELECT DISTINCT S
-                    FROM ShopALot.SARR.Stores S
-                    UNNEST S.categories SC 
-                    WHERE SC = "{sample_category}"
-                    LIMIT 10;
-                """)
-            elif sarr_num == 3:
-                results = self.execute_sqlpp(f"""
-                    SELECT S
-                    FROM ShopALot.SARR.Stores S
-                    WHERE "{sample_category}" IN S.categories
-                    LIMIT 10;
-                """)
-            else:
-                results = self.execute_sqlpp(f"""
-                    SELECT S
-                    FROM ShopALot.SARR.Stores S
-                    WHERE LEN(S.categories) > 0 AND
-                         (EVERY SC IN S.categories SATISFIES SC = "{sample_category}")
-                    LIMIT 10;
-                """)
-
+            results = self.execute_sqlpp(self.sarr_statement(sample_store, sarr_num))
             if len(results['results']) == 0:
                 logger.error(f'Query {i + 1} was not successful! "{sample_category}" not found.')
                 return False
@@ -22,17 +22,51 @@ class UsersEqualityPredicateQuery(AbstractEqualityPredicateQuery):
             'num_queries': 500
         })
 
+    def atom_statement(self, sample_user, atom_num):
+        sample_user_number = sample_user['phone']['number']
+        return f"""
+            SELECT U
+            FROM ShopALot.ATOM.Users U
+            WHERE U.phone.number = "{sample_user_number}";
+        """
+
+    def sarr_statement(self, sample_user, sarr_num):
+        sample_user_number = sample_user['phones'][0]['number']
+        if sarr_num == 1:
+            return f"""
+                SELECT U
+                FROM ShopALot.SARR.Users U
+                UNNEST U.phones UP
+                WHERE UP.number = "{sample_user_number}";
+            """
+        elif sarr_num == 2:
+            return f"""
+                SELECT DISTINCT U
+                FROM ShopALot.SARR.Users U
+                UNNEST U.phones UP
+                WHERE UP.number = "{sample_user_number}";
+            """
+        elif sarr_num == 3:
+            return f"""
+                SELECT U
+                FROM ShopALot.SARR.Users U
+                WHERE (SOME UP IN U.phones SATISFIES UP.number = "{sample_user_number}");
+            """
+        else:
+            return f"""
+                SELECT U
+                FROM ShopALot.SARR.Users U
+                WHERE LEN(U.phones) > 0 AND 
+                     (EVERY UP IN U.phones SATISFIES UP.number = "{sample_user_number}");
+            """
+
     def benchmark_atom(self, working_sample_objects, atom_num):
         if not self.enable_index_only(atom_num == 1):
             return False
 
         for i, sample_user in enumerate(working_sample_objects):
             sample_user_number = sample_user['phone']['number']
-            results = self.execute_sqlpp(f"""
-                 SELECT U
-                 FROM ShopALot.ATOM.Users U
-                 WHERE U.phone.number = "{sample_user_number}";
-             """)
+            results = self.execute_sqlpp(self.atom_statement(sample_user, atom_num))
             if len(results['results']) == 0:
                 logger.error(f'Query {i + 1} was not successful! "{sample_user_number}" not found.')
                 return False
@@ -46,34 +80,7 @@ class UsersEqualityPredicateQuery(AbstractEqualityPredicateQuery):
     def benchmark_sarr(self, working_sample_objects, sarr_num):
         for i, sample_user in enumerate(working_sample_objects):
             sample_user_number = sample_user['phones'][0]['number']
-            if sarr_num == 1:
-                results = self.execute_sqlpp(f"""
-                    SELECT U
-                    FROM ShopALot.SARR.Users U
-                    UNNEST U.phones UP
-                    WHERE UP.number = "{sample_user_number}";
-                """)
-            elif sarr_num == 2:
-                results = self.execute_sqlpp(f"""
-                    SELECT DISTINCT U
-                    FROM ShopALot.SARR.Users U
-                    UNNEST U.phones UP
-                    WHERE UP.number = "{sample_user_number}";
-                """)
-            elif sarr_num == 3:
-                results = self.execute_sqlpp(f"""
-                    SELECT U
-                    FROM ShopALot.SARR.Users U
-                    WHERE (SOME UP IN U.phones SATISFIES UP.number = "{sample_user_number}");
-                """)
-            else:
-                results = self.execute_sqlpp(f"""
-                    SELECT U
-                    FROM ShopALot.SARR.Users U
-                    WHERE LEN(U.phones) > 0 AND 
-                         (EVERY UP IN U.phones SATISFIES UP.number = "{sample_user_number}");
-                """)
-
+            results = self.execute_sqlpp(self.sarr_statement(sample_user, sarr_num))
             if len(results['results']) == 0:
                 logger.error(f'Query {i + 1} was not successful! "{sample_user_number}" not found.')
                 return False
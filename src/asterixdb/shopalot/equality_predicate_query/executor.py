@@ -1,7 +1,12 @@
+import concurrent.futures
+import threading
+import timeit
 import logging
+import random
 import abc
 
 from src.asterixdb.shopalot.executor import AbstractShopALotRunnable
+from src.asterixdb.open_loop import OpenLoopLoadGenerator
 from src.asterixdb.shopalot.datagen import DatagenAbstractFactoryProvider
 from src.asterixdb.shopalot.datagen import PrimaryKeyGeneratorFactory
 
@@ -9,6 +14,12 @@ logger = logging.getLogger(__name__)
 
 
 class AbstractEqualityPredicateQuery(AbstractShopALotRunnable, abc.ABC):
+    LATENCY_PERCENTILES = [50, 95, 99]
+
+    def _add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1, help='Number of concurrent clients issuing queries.')
+        OpenLoopLoadGenerator.add_arguments(parser)
+
     def __init__(self, **kwargs):
         self.index_names = kwargs['index_names']
         self.dataset_name = kwargs['dataset_name']
@@ -17,7 +28,25 @@ class AbstractEqualityPredicateQuery(AbstractShopALotRunnable, abc.ABC):
         self.chunk_size = kwargs['chunk_size']
         super().__init__()
 
-        datagen_factory = DatagenAbstractFactoryProvider.provide_memory_abstract_factory(kwargs['datagen_class'])
+        # Samples are drawn from one seeded permutation, so no two query runs share a sample.
+        self.sample_seed = random.getrandbits(64)
+        self.sample_offset = 0
+        logger.info(f'Sampling query parameters using the seed {self.sample_seed}.')
+
+        # Each client needs its own connection to the cluster.
+        self.num_clients = self.config['arguments']['clients']
+        self.client_context = threading.local()
+        self.variant_latencies = []
+        self.variant_number = None
+        if self.num_clients > 1:
+            session_config = self.config['benchmark'].setdefault('httpSession', {'poolSize': 1, 'isKeepAlive': True})
+            session_config['poolSize'] = max(session_config['poolSize'], self.num_clients)
+            self.reset_http_session()
+
+        # Our samples must come from the same engine that generated our dataset.
+        datagen_class = DatagenAbstractFactoryProvider.provide_engine_class(
+            kwargs['datagen_class'], self.config['shopalot'].get('engine', 'faker'))
+        datagen_factory = DatagenAbstractFactoryProvider.provide_memory_abstract_factory(datagen_class)
         self.datagen = datagen_factory(primary_key_generator=None, pk_zfill=len(str(self.dataset_size)), **kwargs)
 
     def enable_index_only(self, is_index_only):
@@ -32,6 +61,14 @@ class AbstractEqualityPredicateQuery(AbstractShopALotRunnable, abc.ABC):
         else:
             return True
 
+    @abc.abstractmethod
+    def atom_statement(self, sample_object, atom_num):
+        pass
+
+    @abc.abstractmethod
+    def sarr_statement(self, sample_object, sarr_num):
+        pass
+
     @abc.abstractmethod
     def benchmark_atom(self, working_sample_objects, atom_num):
         pass
@@ -42,47 +79,120 @@ class AbstractEqualityPredicateQuery(AbstractShopALotRunnable, abc.ABC):
 
     def get_sample_data(self, dataverse):
         primary_key_generator = PrimaryKeyGeneratorFactory.\
-            provide_rand_range_generator(0, self.dataset_size, self.num_queries)
+            provide_permutation_generator(0, self.dataset_size, self.num_queries, self.sample_seed, self.sample_offset)
         self.datagen.reset_generation(primary_key_generator)
-        self.datagen.invoke()
+        with self.tracer.span('datagen', category='datagen', offset=self.sample_offset, size=self.num_queries):
+            self.datagen.invoke()
+        self.sample_offset = self.sample_offset + self.num_queries
 
         if dataverse == self.ATOM_DATAVERSE:
             return self.datagen.atom_json
         else:
             return self.datagen.sarr_json
 
+    def log_results(self, results):
+        if self.variant_number is not None and 'metrics' in results:
+            results['queryNumber'] = self.variant_number
+        if hasattr(self.client_context, 'client_number'):
+            results['clientNumber'] = self.client_context.client_number
+            results['numberOfClients'] = self.num_clients
+        # Timeouts (and records that are not statement responses) have no latency of their own.
+        if 'clientTime' in results:
+            with self.results_lock:
+                self.variant_latencies.append(results['clientTime'])
+        super(AbstractEqualityPredicateQuery, self).log_results(results)
+
+    def _run_client(self, benchmark_f, client_number, working_sample_objects, variant_number):
+        self.client_context.client_number = client_number
+        return benchmark_f(working_sample_objects, variant_number)
+
+    def _benchmark_variant(self, benchmark_f, variant_name, variant_number):
+        working_sample_objects = self.get_sample_data(self.dataverse)
+        self.variant_latencies = []
+        self.variant_number = variant_number
+
+        # With more than one client, each client works through its own (disjoint) share of the samples.
+        t_before = timeit.default_timer()
+        if self.num_clients == 1:
+            is_successful = benchmark_f(working_sample_objects, variant_number)
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.num_clients) as executor:
+                client_futures = [executor.submit(self._run_client, benchmark_f, k + 1,
+                                                  working_sample_objects[k::self.num_clients], variant_number)
+                                  for k in range(self.num_clients)]
+                is_successful = all([f.result() for f in client_futures])
+        wall_clock_time = timeit.default_timer() - t_before
+
+        sorted_latencies = sorted(self.variant_latencies)
+        throughput = {
+            'variant': f'{variant_name}-{variant_number}',
+            'numberOfClients': self.num_clients,
+            'numberOfQueries': len(sorted_latencies),
+            'wallClockTime': wall_clock_time,
+            'queriesPerSecond': len(sorted_latencies) / wall_clock_time,
+            'latencyPercentiles': {f'p{p}': self.percentile(sorted_latencies, p) for p in self.LATENCY_PERCENTILES}
+        }
+        logger.info(f'Throughput for {throughput["variant"]}: {throughput}')
+        if self.num_clients > 1:
+            super(AbstractEqualityPredicateQuery, self).log_results({'throughput': throughput})
+
+        return is_successful
+
+    def _sweep_open_loop(self):
+        arguments = self.config['arguments']
+        load_generator = OpenLoopLoadGenerator(self, arguments['schedule'], arguments['duration'],
+                                               arguments['max_outstanding'], seed=self.sample_seed)
+        if self.dataverse == self.ATOM_DATAVERSE:
+            statement_f, variant_numbers = self.atom_statement, [1, 2]
+        else:
+            statement_f, variant_numbers = self.sarr_statement, [1, 2, 3, 4]
+
+        # Our statements are built up front, so statement construction is never on the arrival schedule.
+        working_sample_objects = self.get_sample_data(self.dataverse)
+        for variant_number in variant_numbers:
+            logger.info(f'Sweeping arrival rates {arguments["rates"]} for {self.dataverse.upper()}, '
+                        f'{self.dataset_name}, query variant {variant_number}.')
+            statements = [statement_f(s, variant_number) for s in working_sample_objects]
+            load_generator.sweep(arguments['rates'], lambda rate: statements,
+                                 variant=f'{self.dataverse}-{variant_number}')
+
     def perform_benchmark(self):
         if not self.do_indexes_exist(self.index_names, self.dataset_name):
             logger.warning(f'Indexes not found. Assuming that this is benchmarking non-indexed operations.')
 
+        if self.config['arguments']['rates'] is not None:
+            logger.info(f'Executing open-loop equality_predicate_query on {self.dataset_name}.')
+            self._sweep_open_loop()
+            return
+
         if self.dataverse == self.ATOM_DATAVERSE:
             logger.info(f'Executing equality_predicate_query on {self.dataset_name} for ATOM.')
             logger.info(f'Running benchmark for: ATOM, {self.dataset_name}, {str(self.index_names)}, index-only.')
-            if not self.benchmark_atom(self.get_sample_data(self.dataverse), atom_num=1):
+            if not self._benchmark_variant(self.benchmark_atom, 'atom', 1):
                 return
 
             logger.info(f'Running benchmark for: ATOM, {self.dataset_name}, {str(self.index_names)}, not index-only.')
-            if not self.benchmark_atom(self.get_sample_data(self.dataverse), atom_num=2):
+            if not self._benchmark_variant(self.benchmark_atom, 'atom', 2):
                 return
 
         else:
             logger.info(f'Executing equality_predicate_query on {self.dataset_name} for SARR.')
             logger.info(f'Running benchmark for SARR, {self.dataset_name}, {str(self.index_names)}, '
                         f'unnest-style query, no materialization.')
-            if not self.benchmark_sarr(self.get_sample_data(self.dataverse), sarr_num=1):
+            if not self._benchmark_variant(self.benchmark_sarr, 'sarr', 1):
                 return
 
             logger.info(f'Running benchmark for SARR, {self.dataset_name}, {str(self.index_names)}, '
                         f'unnest-style query, with materialization.')
-            if not self.benchmark_sarr(self.get_sample_data(self.dataverse), sarr_num=2):
+            if not self._benchmark_variant(self.benchmark_sarr, 'sarr', 2):
                 return
 
             logger.info(f'Running benchmark for SARR, {self.dataset_name}, {str(self.index_names)}, '
                         f'existential quantification query.')
-            if not self.benchmark_sarr(self.get_sample_data(self.dataverse), sarr_num=3):
+            if not self._benchmark_variant(self.benchmark_sarr, 'sarr', 3):
                 return
 
             logger.info(f'Running benchmark for SARR, {self.dataset_name}, {str(self.index_names)}, '
                         f'universal quantification query.')
-            if not self.benchmark_sarr(self.get_sample_data(self.dataverse), sarr_num=4):
+            if not self._benchmark_variant(self.benchmark_sarr, 'sarr', 4):
                 return
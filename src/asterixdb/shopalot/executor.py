@@ -5,6 +5,8 @@ import json
 import abc
 
 from src.asterixdb.executor import AbstractAsterixDBRunnable
+from src.asterixdb.shopalot.datagen import ShardedDatagenExecutor
+from src.asterixdb.baseline import BaselineStore
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,11 @@ class AbstractShopALotRunnable(AbstractAsterixDBRunnable, abc.ABC):
         parser.add_argument('dataverse', type=str, choices=['atom', 'sarr'], help='Dataverse to benchmark.')
         parser.add_argument('--config', type=str, default='config/asterixdb.json', help='Path to the config file.')
         parser.add_argument('--datagen', type=str, default='config/shopalot.json', help='Path to the datagen file.')
+        parser.add_argument('--sharded', action='store_true',
+                            help='Load from the shard files listed in our datagen manifest (i.e. datagen --manifest).')
+        self._add_arguments(parser)
+        if self.IS_RESUMABLE:
+            parser.add_argument('--resume', type=str, default=None, help='Results directory of a run to resume.')
         parser_args = parser.parse_args()
         with open(parser_args.config) as config_file:
             config_json = json.load(config_file)
@@ -25,16 +32,49 @@ class AbstractShopALotRunnable(AbstractAsterixDBRunnable, abc.ABC):
             config_json['shopalot'] = json.load(datagen_file)
 
         config_json['dataverse'] = parser_args.dataverse
+        config_json['arguments'] = vars(parser_args)
         config_json['resultsDir'] = 'out/' + datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + '-' + \
             self.__class__.__name__ + '-' + parser_args.dataverse.upper() + '-A'
+        if getattr(parser_args, 'resume', None) is not None:
+            config_json['resultsDir'] = parser_args.resume.rstrip('/')
+            config_json['resume'] = parser_args.resume
 
         return {**config_json, **kwargs}
 
+    def _add_arguments(self, parser):
+        # Suites can extend our command line here. Their values are available in self.config['arguments'].
+        pass
+
     def __init__(self, **kwargs):
         super().__init__(**self._collect_config(**kwargs))
         self.dataverse = self.config['dataverse']
+        self.load_profile = None
+
+    def load_source(self, dataset_name, dataverse_key):
+        """ Returns the localfs path(s) to LOAD a dataset from. Each path is parsed by its own partition. """
+        dataset_config = self.config['shopalot'][dataset_name]
+        if not self.config['arguments'].get('sharded', False):
+            load_filenames = [dataset_config[dataverse_key]['fullFilename']]
+            load_nodes = ['localhost']
+            shard_ranges = [dataset_config['idRange']]
+        else:
+            with open(ShardedDatagenExecutor.manifest_filename(self.config['shopalot'], dataset_name)) as manifest_fp:
+                manifest_json = json.load(manifest_fp)
+            load_filenames = manifest_json[dataverse_key]['fullFilename']
+            load_nodes = manifest_json.get('shardNodes', ['localhost'] * len(load_filenames))
+            shard_ranges = manifest_json['shardRanges']
+
+        # Our LOAD throughput is reported against the shards we loaded from (i.e. the ranges they were generated for).
+        shard_records = [r['end'] - r['start'] for r in shard_ranges]
+        self.load_profile = {'dataset': dataset_name, 'shardCount': len(load_filenames),
+                             'shardRecords': shard_records, 'numberOfRecords': sum(shard_records)}
+        return ','.join(f'{n}:///{f}' for n, f in zip(load_nodes, load_filenames))
 
     def do_indexes_exist(self, index_names, dataset_name):
+        with self.tracer.span('do_indexes_exist', category='metadata', indexNames=index_names):
+            return self._do_indexes_exist(index_names, dataset_name)
+
+    def _do_indexes_exist(self, index_names, dataset_name):
         for index_name in index_names:
             if self.dataverse == self.ATOM_DATAVERSE:
                 logger.info(f'Checking that the index "{index_name}" exists on ATOM.')
@@ -64,8 +104,18 @@ class AbstractShopALotRunnable(AbstractAsterixDBRunnable, abc.ABC):
 
         return True
 
+    def tag_record(self, record):
+        record['dataverse'] = self.dataverse
+        super(AbstractShopALotRunnable, self).tag_record(record)
+
     def log_results(self, results):
-        results['dataverse'] = self.dataverse
+        # Only the LOAD itself has a throughput, not the script around it (nor the aggregate of that script).
+        is_statement_record = 'script' not in results or 'statementNumber' in results['script']
+        if self.load_profile is not None and is_statement_record and \
+                BaselineStore.statement_kind(results.get('statement', '')) == 'load':
+            load_latency = self.response_latency(results)
+            results['load'] = {**self.load_profile, 'recordsPerSecond':
+                               self.load_profile['numberOfRecords'] / load_latency if load_latency else None}
         super(AbstractShopALotRunnable, self).log_results(results)
 
     def invoke(self):
@@ -1,17 +1,119 @@
+import threading
+import hashlib
 import logging
+import queue
+import faker
 import json
+import datetime
 import abc
+import os
 import random
 
 from src.asterixdb.shopalot.executor import AbstractShopALotRunnable
+from src.asterixdb.open_loop import OpenLoopLoadGenerator
 from src.asterixdb.shopalot.datagen import DatagenAbstractFactoryProvider
 from src.asterixdb.shopalot.datagen import PrimaryKeyGeneratorFactory
 
 logger = logging.getLogger(__name__)
 
 
+class ChunkPrefetcher:
+    """ Drains a chunk generator on a background thread, holding at most max_prefetch chunks ahead. """
+    _END_OF_CHUNKS = object()
+
+    def __init__(self, chunk_generator, max_prefetch):
+        self.chunk_generator = chunk_generator
+        self.chunk_queue = queue.Queue(maxsize=max_prefetch)
+        self.stop_event = threading.Event()
+        self.producer_exception = None
+        self.producer_thread = threading.Thread(target=self._produce, daemon=True)
+
+    def _put(self, item):
+        while not self.stop_event.is_set():
+            try:
+                self.chunk_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self):
+        try:
+            for chunk in self.chunk_generator:
+                if not self._put(chunk):
+                    return
+        except Exception as e:
+            logger.error(f'Exception caught while generating chunk: {str(e)}')
+            self.producer_exception = e
+        self._put(self._END_OF_CHUNKS)
+
+    def __enter__(self):
+        self.producer_thread.start()
+        return self
+
+    def __iter__(self):
+        while True:
+            chunk = self.chunk_queue.get()
+            if chunk is self._END_OF_CHUNKS:
+                break
+            yield chunk
+
+        if self.producer_exception is not None:
+            raise self.producer_exception
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # If the consumer stops early, unblock our producer and wait for it to exit.
+        self.stop_event.set()
+        self.producer_thread.join()
+        return False
+
+
+class ChunkCache:
+    """ Serialized chunks on disk, addressed by a hash of everything that determines their content. """
+    CACHE_VERSION = 2
+
+    def __init__(self, cache_dir, **key_parts):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.base_key = json.dumps({'cacheVersion': self.CACHE_VERSION, **key_parts}, sort_keys=True)
+        self.base_digest = hashlib.sha256(self.base_key.encode('utf-8')).hexdigest()
+
+    def _chunk_filename(self, **chunk_parts):
+        chunk_key = self.base_key + json.dumps(chunk_parts, sort_keys=True)
+        return os.path.join(self.cache_dir, hashlib.sha256(chunk_key.encode('utf-8')).hexdigest() + '.json')
+
+    def derive_seed(self):
+        return int(self.base_digest[:16], 16)
+
+    def reference_time(self):
+        """ Chunks embed timestamps, so all runs that share our chunks must also share the "now" they were made at. """
+        reference_filename = os.path.join(self.cache_dir, self.base_digest + '-reference-time.json')
+        if not os.path.exists(reference_filename):
+            with open(reference_filename + '.tmp', 'w') as reference_fp:
+                json.dump({'referenceTime': datetime.datetime.now().isoformat()}, reference_fp)
+            os.replace(reference_filename + '.tmp', reference_filename)
+        with open(reference_filename) as reference_fp:
+            return datetime.datetime.fromisoformat(json.load(reference_fp)['referenceTime'])
+
+    def fetch_or_generate(self, generate_f, **chunk_parts):
+        chunk_filename = self._chunk_filename(**chunk_parts)
+        if os.path.exists(chunk_filename):
+            with open(chunk_filename, encoding='utf-8') as chunk_fp:
+                logger.debug(f'Using cached chunk {chunk_filename}.')
+                return chunk_fp.read()
+
+        # Write to a temporary file first, so an interrupted run never leaves a partial chunk behind.
+        chunk_text = generate_f()
+        with open(chunk_filename + '.tmp', 'w', encoding='utf-8') as chunk_fp:
+            chunk_fp.write(chunk_text)
+        os.replace(chunk_filename + '.tmp', chunk_filename)
+        return chunk_text
+
+
 class AbstractInsertUpsertDelete(AbstractShopALotRunnable, abc.ABC):
+    IS_RESUMABLE = True
     DATASET_UPSERT_ALPHAS = [1.0]
+    CHUNK_PREFETCH_DEPTH = 2
     DATASET_INCREMENT_SIZE = 0.005
     DATASET_DECREMENT_SIZE = 0.005
 
@@ -26,14 +128,60 @@ class AbstractInsertUpsertDelete(AbstractShopALotRunnable, abc.ABC):
         self.upsert_epoch = kwargs['upsert_epoch']
         self.delete_epoch = kwargs['delete_epoch']
 
+        # Upsert keys are drawn from one seeded permutation, so no PK is upserted twice across epochs.
+        self.upsert_seed = random.getrandbits(64)
+        self.upsert_offset = 0
+
+        super().__init__()
+
         # We need to remove primary key before invoking our factory.
         factory_args = kwargs
         del factory_args['primary_key']
-
-        # Invoke our factory.
-        datagen_factory = DatagenAbstractFactoryProvider.provide_memory_abstract_factory(kwargs['datagen_class'])
+        datagen_class = DatagenAbstractFactoryProvider.provide_engine_class(
+            kwargs['datagen_class'], self.config['shopalot'].get('engine', 'faker'))
+
+        # Chunks only depend on our datagen config (+ dataset, dataverse, and PK range), so we can reuse them.
+        chunk_cache_config = self.config['shopalot'].get('chunkCache', {'isEnabled': False})
+        if chunk_cache_config['isEnabled']:
+            self.chunk_cache = ChunkCache(
+                chunk_cache_config['cacheDir'],
+                shopalot={k: v for k, v in self.config['shopalot'].items() if k != 'chunkCache'},
+                datagenClass=datagen_class.__name__,
+                fakerVersion=faker.VERSION,
+                dataset=self.dataset_name,
+                dataverse=self.dataverse
+            )
+
+            # Upsert keys (and order timestamps) must be the same across runs for their chunks to be reused.
+            self.upsert_seed = self.chunk_cache.derive_seed()
+            factory_args['reference_time'] = self.chunk_cache.reference_time()
+            logger.info(f'Using the chunk cache at: {chunk_cache_config["cacheDir"]}')
+        else:
+            self.chunk_cache = None
+
+        # Invoke our factory, using the same engine that generated our dataset.
+        datagen_factory = DatagenAbstractFactoryProvider.provide_memory_abstract_factory(datagen_class)
         self.datagen = datagen_factory(primary_key_generator=None, pk_zfill=len(str(self.dataset_size)), **factory_args)
-        super().__init__()
+
+        # A resumed run must draw the same upsert keys (and delete chunks) as the run it continues.
+        if 'upsertSeed' in self.checkpoint.state:
+            self.upsert_seed = self.checkpoint.state['upsertSeed']
+        else:
+            self.checkpoint.save_state(upsertSeed=self.upsert_seed)
+        self.delete_random = random.Random()
+        if 'deleteRandomState' in self.checkpoint.state:
+            version, internal_state, gauss_next = self.checkpoint.state['deleteRandomState']
+            self.delete_random.setstate((version, tuple(internal_state), gauss_next))
+
+    def _add_arguments(self, parser):
+        OpenLoopLoadGenerator.add_arguments(parser)
+
+    def _fetch_or_generate_chunk(self, generate_f, **chunk_parts):
+        with self.tracer.span('datagen', category='datagen', **chunk_parts):
+            if self.chunk_cache is None:
+                return generate_f()
+            else:
+                return self.chunk_cache.fetch_or_generate(generate_f, **chunk_parts)
 
     def _perform_insert_upsert(self, i, operation, text, **kwargs):
         # First, insert into our buffer dataset.
@@ -74,67 +222,105 @@ class AbstractInsertUpsertDelete(AbstractShopALotRunnable, abc.ABC):
         self.log_results(results)
         return True
 
-    def _benchmark_insert(self):
+    def _generate_insert_text(self, start_id, end_id):
+        # Invoke our data generator.
+        primary_key_generator = PrimaryKeyGeneratorFactory.provide_range_generator(start_id, end_id)
+        self.datagen.reset_generation(primary_key_generator)
+        self.datagen.invoke()
+
+        # Pull our insert chunk.
+        if self.dataverse == self.ATOM_DATAVERSE:
+            insert_chunk = self.datagen.atom_json
+        else:
+            insert_chunk = self.datagen.sarr_json
+
+        return ',\n'.join([json.dumps(s) for s in insert_chunk])
+
+    def _generate_upsert_text(self, offset, alpha):
+        # Invoke our data generator.
+        primary_key_generator = PrimaryKeyGeneratorFactory. \
+            provide_permutation_generator(0, self.dataset_size, self.chunk_size, self.upsert_seed, offset)
+        self.datagen.reset_generation(primary_key_generator)
+        self.datagen.invoke()
+
+        # Pull our upsert chunk. Apply transformation as needed.
+        if self.dataverse == self.ATOM_DATAVERSE:
+            upsert_chunk = self.datagen.atom_json
+            chunk_updater = self.datagen.atom_mapper
+        else:
+            upsert_chunk = self.datagen.sarr_json
+            chunk_updater = lambda a: self.datagen.sarr_mapper(self.datagen.atom_mapper(a))
+
+        for record in upsert_chunk[0:round(self.chunk_size * alpha)]:
+            old_pk = int(record[self.primary_key])
+            new_record = chunk_updater(old_pk + 1)
+            new_record[self.primary_key] = old_pk
+
+        return ',\n'.join([json.dumps(s) for s in upsert_chunk])
+
+    def _generate_insert_chunks(self):
         working_range = {'start': self.dataset_size, 'end': self.dataset_size + self.chunk_size}
         for i in range(self.insert_epoch):
-            # Invoke our data generator.
-            primary_key_generator = PrimaryKeyGeneratorFactory. \
-                provide_range_generator(working_range['start'], working_range['end'])
-            self.datagen.reset_generation(primary_key_generator)
-            self.datagen.invoke()
-
+            if self.checkpoint.is_completed('insert', i):
+                yield None  # This chunk was inserted before we were resumed.
+            else:
+                yield self._fetch_or_generate_chunk(
+                    lambda: self._generate_insert_text(working_range['start'], working_range['end']),
+                    operation='insert', start=working_range['start'], end=working_range['end']
+                )
             working_range['start'] = working_range['start'] + self.chunk_size
             working_range['end'] = working_range['end'] + self.chunk_size
 
-            # Pull our insert chunk.
-            if self.dataverse == self.ATOM_DATAVERSE:
-                insert_chunk = self.datagen.atom_json
+    def _generate_upsert_chunks(self, alpha):
+        for i in range(self.upsert_epoch):
+            if self.checkpoint.is_completed('upsert', alpha, i):
+                yield None  # This chunk was upserted before we were resumed.
             else:
-                insert_chunk = self.datagen.sarr_json
+                yield self._fetch_or_generate_chunk(
+                    lambda: self._generate_upsert_text(self.upsert_offset, alpha),
+                    operation='upsert', seed=self.upsert_seed, offset=self.upsert_offset, size=self.chunk_size,
+                    alpha=alpha
+                )
+            self.upsert_offset = self.upsert_offset + self.chunk_size
 
-            # Perform the insert itself.
-            insert_text = ',\n'.join([json.dumps(s) for s in insert_chunk])
-            if not self._perform_insert_upsert(i, 'insert', insert_text):
-                return False
+    def _benchmark_insert(self):
+        # Our next chunk is generated while the current chunk is being inserted.
+        with ChunkPrefetcher(self._generate_insert_chunks(), self.CHUNK_PREFETCH_DEPTH) as insert_chunks:
+            for i, insert_text in enumerate(insert_chunks):
+                if insert_text is None:
+                    logger.info(f'Skipping insert {i + 1}. This has already been completed.')
+                    continue
+                if not self._perform_insert_upsert(i, 'insert', insert_text):
+                    return False
+                self.complete_unit('insert', i)
 
         return True
 
     def _benchmark_upsert(self):
+        logger.info(f'Sampling upsert keys using the seed {self.upsert_seed}.')
         for alpha in self.DATASET_UPSERT_ALPHAS:
             logger.info(f'Now using alpha value of {alpha}.')
-            for i in range(self.upsert_epoch):
-                # Invoke our data generator.
-                primary_key_generator = PrimaryKeyGeneratorFactory. \
-                    provide_rand_range_generator(0, self.dataset_size, self.chunk_size)
-                self.datagen.reset_generation(primary_key_generator)
-                self.datagen.invoke()
-
-                # Pull our upsert chunk. Apply transformation as needed.
-                if self.dataverse == self.ATOM_DATAVERSE:
-                    upsert_chunk = self.datagen.atom_json
-                    chunk_updater = self.datagen.atom_mapper
-                else:
-                    upsert_chunk = self.datagen.sarr_json
-                    chunk_updater = lambda a: self.datagen.sarr_mapper(self.datagen.atom_mapper(a))
-
-                for record in upsert_chunk[0:round(self.chunk_size * alpha)]:
-                    old_pk = int(record[self.primary_key])
-                    new_record = chunk_updater(old_pk + 1)
-                    new_record[self.primary_key] = old_pk
-
-                # Perform the upsert itself.
-                upsert_text = ',\n'.join([json.dumps(s) for s in upsert_chunk])
-                if not self._perform_insert_upsert(i, 'upsert', upsert_text, alpha=alpha):
-                    return False
+            with ChunkPrefetcher(self._generate_upsert_chunks(alpha), self.CHUNK_PREFETCH_DEPTH) as upsert_chunks:
+                for i, upsert_text in enumerate(upsert_chunks):
+                    if upsert_text is None:
+                        logger.info(f'Skipping upsert {i + 1}. This has already been completed.')
+                        continue
+                    if not self._perform_insert_upsert(i, 'upsert', upsert_text, alpha=alpha):
+                        return False
+                    self.complete_unit('upsert', alpha, i)
 
         return True
 
     def _benchmark_delete(self):
-        delete_chunk_ids = set()
+        delete_chunk_ids = set(self.checkpoint.state.get('deleteChunkIDs', []))
         for i in range(self.delete_epoch):
-            chunk_id = random.randint(0, self.chunk_size)
+            if self.checkpoint.is_completed('delete', i):
+                logger.info(f'Skipping delete {i + 1}. This has already been completed.')
+                continue
+
+            chunk_id = self.delete_random.randint(0, self.chunk_size)
             while chunk_id in delete_chunk_ids:
-                chunk_id = random.randint(0, self.chunk_size)
+                chunk_id = self.delete_random.randint(0, self.chunk_size)
 
             logger.debug(f'Deleting using chunk_id: {self.datagen.format_key(chunk_id)}')
             delete_chunk_ids.add(chunk_id)
@@ -150,6 +336,8 @@ class AbstractInsertUpsertDelete(AbstractShopALotRunnable, abc.ABC):
             logger.debug(f'Delete {i + 1} was successful. Execution time: {results["metrics"]["elapsedTime"]}')
             results['runNumber'] = i + 1
             self.log_results(results)
+            self.complete_unit('delete', i, deleteChunkIDs=sorted(delete_chunk_ids),
+                               deleteRandomState=self.delete_random.getstate())
 
         return True
 
@@ -165,28 +353,61 @@ class AbstractInsertUpsertDelete(AbstractShopALotRunnable, abc.ABC):
 
         return True
 
+    def _generate_open_loop_upserts(self, num_statements):
+        # Each arrival upserts a single (never before upserted) record.
+        num_statements = min(num_statements, self.dataset_size - self.upsert_offset)
+        primary_key_generator = PrimaryKeyGeneratorFactory. \
+            provide_permutation_generator(0, self.dataset_size, num_statements, self.upsert_seed, self.upsert_offset)
+        self.datagen.reset_generation(primary_key_generator)
+        self.datagen.invoke()
+        self.upsert_offset = self.upsert_offset + num_statements
+
+        upsert_records = self.datagen.atom_json if self.dataverse == self.ATOM_DATAVERSE else self.datagen.sarr_json
+        return [f'UPSERT INTO ShopALot.{self.dataverse.upper()}.{self.dataset_name} [{json.dumps(r)}];'
+                for r in upsert_records]
+
+    def _sweep_open_loop(self):
+        arguments = self.config['arguments']
+        load_generator = OpenLoopLoadGenerator(self, arguments['schedule'], arguments['duration'],
+                                               arguments['max_outstanding'], seed=self.upsert_seed)
+        logger.info(f'Sweeping arrival rates {arguments["rates"]} for {self.dataverse.upper()} upserts.')
+        load_generator.sweep(arguments['rates'],
+                             lambda rate: self._generate_open_loop_upserts(load_generator.number_of_arrivals(rate)),
+                             variant=f'{self.dataverse}-upsert')
+
     def perform_benchmark(self):
         if not self.do_indexes_exist(self.index_names, self.dataset_name):
             logger.warning(f'Indexes not found. Assuming that this is benchmarking non-indexed operations.')
 
+        if self.config['arguments']['rates'] is not None:
+            logger.info(f'Executing open-loop upserts on {self.dataset_name} for {self.dataverse.upper()}.')
+            self._sweep_open_loop()
+            return
+
         logger.info(f'Executing insert_upsert_delete on {self.dataset_name} for {self.dataverse.upper()}.')
         logger.info(f'Running benchmark for {self.dataverse.upper()} inserts.')
-        if not self._benchmark_insert():
-            return
+        with self.tracer.span('insert', category='phase'):
+            if not self._benchmark_insert():
+                return
 
         self.restart_db()
         logger.info(f'Running benchmark for {self.dataverse.upper()} upserts.')
-        if not self._benchmark_upsert():
-            return
+        with self.tracer.span('upsert', category='phase'):
+            if not self._benchmark_upsert():
+                return
 
         self.restart_db()
         logger.info(f'Indexing chunk_id {self.dataverse.upper()}.')
-        if not self._index_chunk_id():
-            return
+        with self.tracer.span('index_chunk_id', category='phase'):
+            if not self.checkpoint.is_completed('index_chunk_id'):
+                if not self._index_chunk_id():
+                    return
+                self.complete_unit('index_chunk_id')
 
         logger.info(f'Running benchmark for {self.dataverse.upper()} deletes.')
-        if not self._benchmark_delete():
-            return
+        with self.tracer.span('delete', category='phase'):
+            if not self._benchmark_delete():
+                return
 
     def perform_post(self):
         logger.info(f'Removing the index on chunk_id for {self.dataverse.upper()}.')
@@ -11,7 +11,7 @@ class LoadBasicOrdersDataset(AbstractLoadBasicDataset):
                          atom_type_ddl="CREATE TYPE OrdersType AS { order_id: string };")
 
     def benchmark_sarr(self, run_number):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATASET ShopALot.SARR.Orders IF EXISTS;
 
             USE ShopALot.SARR;
@@ -20,18 +20,18 @@ class LoadBasicOrdersDataset(AbstractLoadBasicDataset):
             LOAD DATASET ShopALot.SARR.Orders USING localfs (
                 ("path"="%s"), ("format"="json")
             );
-        """ % ('localhost:///' + self.config['shopalot']['orders']['sarrDataverse']['fullFilename']))
+        """ % self.load_source('orders', 'sarrDataverse'))
         if results['status'] != 'success':
             logger.error(f'Result of bulk-loading was not success, but {results["status"]}.')
-            return False
+            return None
 
         logger.info(f'Run {run_number + 1} has finished executing.')
         results['runNumber'] = run_number + 1
         self.log_results(results)
-        return True
+        return results
 
     def benchmark_atom(self, run_number):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATASET ShopALot.ATOM.Orders IF EXISTS;
 
             USE ShopALot.ATOM;
@@ -40,15 +40,15 @@ class LoadBasicOrdersDataset(AbstractLoadBasicDataset):
             LOAD DATASET ShopALot.ATOM.Orders USING localfs (
                 ("path"="%s"), ("format"="json")
             );
-         """ % ('localhost:///' + self.config['shopalot']['orders']['atomDataverse']['fullFilename']))
+         """ % self.load_source('orders', 'atomDataverse'))
         if results['status'] != 'success':
             logger.error(f'Result of bulk-loading was not success, but {results["status"]}.')
-            return False
+            return None
 
         logger.info(f'Run {run_number + 1} has finished executing.')
         results['runNumber'] = run_number + 1
         self.log_results(results)
-        return True
+        return results
 
 
 if __name__ == '__main__':
@@ -11,7 +11,7 @@ class LoadBasicStoresDataset(AbstractLoadBasicDataset):
                          atom_type_ddl="CREATE TYPE StoresType AS { store_id: string };")
 
     def benchmark_sarr(self, run_number):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATASET ShopALot.SARR.Stores IF EXISTS;
 
             USE ShopALot.SARR;
@@ -20,18 +20,18 @@ class LoadBasicStoresDataset(AbstractLoadBasicDataset):
             LOAD DATASET ShopALot.SARR.Stores USING localfs (
                 ("path"="%s"), ("format"="json")
             );
-          """ % ('localhost:///' + self.config['shopalot']['stores']['sarrDataverse']['fullFilename']))
+          """ % self.load_source('stores', 'sarrDataverse'))
         if results['status'] != 'success':
             logger.error(f'Result of bulk-loading was not success, but {results["status"]}.')
-            return False
+            return None
 
         logger.info(f'Run {run_number + 1} has finished executing.')
         results['runNumber'] = run_number + 1
         self.log_results(results)
-        return True
+        return results
 
     def benchmark_atom(self, run_number):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
              DROP DATASET ShopALot.ATOM.Stores IF EXISTS;
 
              USE ShopALot.ATOM;
@@ -40,15 +40,15 @@ class LoadBasicStoresDataset(AbstractLoadBasicDataset):
              LOAD DATASET ShopALot.ATOM.Stores USING localfs (
                  ("path"="%s"), ("format"="json")
              );
-          """ % ('localhost:///' + self.config['shopalot']['stores']['atomDataverse']['fullFilename']))
+          """ % self.load_source('stores', 'atomDataverse'))
         if results['status'] != 'success':
             logger.error(f'Result of bulk-loading was not success, but {results["status"]}.')
-            return False
+            return None
 
         logger.info(f'Run {run_number + 1} has finished executing.')
         results['runNumber'] = run_number + 1
         self.log_results(results)
-        return True
+        return results
 
 
 if __name__ == '__main__':
@@ -11,7 +11,7 @@ class LoadBasicUsersDataset(AbstractLoadBasicDataset):
                          atom_type_ddl="CREATE TYPE UsersType AS { user_id: string };")
 
     def benchmark_sarr(self, run_number):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATASET ShopALot.SARR.Users IF EXISTS;
 
             USE ShopALot.SARR;
@@ -20,18 +20,18 @@ class LoadBasicUsersDataset(AbstractLoadBasicDataset):
             LOAD DATASET ShopALot.SARR.Users USING localfs (
                 ("path"="%s"), ("format"="json")
             );
-          """ % ('localhost:///' + self.config['shopalot']['users']['sarrDataverse']['fullFilename']))
+          """ % self.load_source('users', 'sarrDataverse'))
         if results['status'] != 'success':
             logger.error(f'Result of bulk-loading was not success, but {results["status"]}.')
-            return False
+            return None
 
         logger.info(f'Run {run_number + 1} has finished executing.')
         results['runNumber'] = run_number + 1
         self.log_results(results)
-        return True
+        return results
 
     def benchmark_atom(self, run_number):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
              DROP DATASET ShopALot.ATOM.Users IF EXISTS;
 
              USE ShopALot.ATOM;
@@ -40,15 +40,15 @@ class LoadBasicUsersDataset(AbstractLoadBasicDataset):
              LOAD DATASET ShopALot.ATOM.Users USING localfs (
                  ("path"="%s"), ("format"="json")
              );
-          """ % ('localhost:///' + self.config['shopalot']['users']['atomDataverse']['fullFilename']))
+          """ % self.load_source('users', 'atomDataverse'))
         if results['status'] != 'success':
             logger.error(f'Result of bulk-loading was not success, but {results["status"]}.')
-            return False
+            return None
 
         logger.info(f'Run {run_number + 1} has finished executing.')
         results['runNumber'] = run_number + 1
         self.log_results(results)
-        return True
+        return results
 
 
 if __name__ == '__main__':
@@ -8,6 +8,7 @@ logger = logging.getLogger(__name__)
 
 class AbstractLoadBasicDataset(AbstractShopALotRunnable, abc.ABC):
     NUMBER_OF_REPEATS = 3
+    MAXIMUM_NUMBER_OF_REPEATS = 10
 
     def __init__(self, **kwargs):
         self.sarr_type_ddl = kwargs['sarr_type_ddl']
@@ -22,6 +23,21 @@ class AbstractLoadBasicDataset(AbstractShopALotRunnable, abc.ABC):
     def benchmark_atom(self, run_number):
         pass
 
+    def _benchmark_until_stable(self, benchmark_f):
+        sampler = self.adaptive_sampler(self.NUMBER_OF_REPEATS, min_samples=self.NUMBER_OF_REPEATS,
+                                        max_samples=self.MAXIMUM_NUMBER_OF_REPEATS, label=benchmark_f.__name__)
+        while sampler.should_continue():
+            results = benchmark_f(sampler.number_of_samples)
+            if results is None:
+                sampler.stop('failure')
+                break
+
+            # Each run ends with its LOAD, so we sample on the server time of that statement (not DROP + CREATE).
+            sampler.add(results.get('statementTimes', [self.response_latency(results)])[-1])
+
+        self.log_sampling(sampler)
+        return sampler.stop_reason != 'failure'
+
     def perform_benchmark(self):
         if self.dataverse == self.SARR_DATAVERSE:
             logger.info('Executing load_basic_dataset on Users for SARR.')
@@ -38,9 +54,8 @@ class AbstractLoadBasicDataset(AbstractShopALotRunnable, abc.ABC):
                 return
             self.log_results(results)
 
-            for i in range(self.NUMBER_OF_REPEATS):
-                if not self.benchmark_sarr(i):
-                    return
+            if not self._benchmark_until_stable(self.benchmark_sarr):
+                return
         else:
             logger.info('Executing load_basic_dataset on Users for ATOM.')
             logger.info('Starting Algebricks-layer bulk loading for ATOM.')
@@ -56,9 +71,8 @@ class AbstractLoadBasicDataset(AbstractShopALotRunnable, abc.ABC):
                 return
             self.log_results(results)
 
-            for i in range(self.NUMBER_OF_REPEATS):
-                if not self.benchmark_atom(i):
-                    return
+            if not self._benchmark_until_stable(self.benchmark_atom):
+                return
 
     def perform_post(self):
         logger.info('Dropping the SARR and ATOM dataverses.')
@@ -10,7 +10,7 @@ class LoadBasicOrdersDataverse(AbstractShopALotRunnable):
         super().__init__()
 
     def _benchmark_load_sarr(self):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATAVERSE ShopALot.SARR IF EXISTS;
             CREATE DATAVERSE ShopALot.SARR;
             USE ShopALot.SARR;
@@ -21,11 +21,11 @@ class LoadBasicOrdersDataverse(AbstractShopALotRunnable):
             LOAD DATASET ShopALot.SARR.Orders USING localfs (
                 ("path"="%s"), ("format"="json")
             );
-        """ % ('localhost:///' + self.config['shopalot']['orders']['sarrDataverse']['fullFilename']))
+        """ % self.load_source('orders', 'sarrDataverse'))
         self.log_results(results)
 
     def _benchmark_load_atom(self):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATAVERSE ShopALot.ATOM IF EXISTS;
             CREATE DATAVERSE ShopALot.ATOM;
             USE ShopALot.ATOM;
@@ -36,7 +36,7 @@ class LoadBasicOrdersDataverse(AbstractShopALotRunnable):
             LOAD DATASET ShopALot.ATOM.Orders USING localfs (
                 ("path"="%s"), ("format"="json")
             );
-        """ % ('localhost:///' + self.config['shopalot']['orders']['atomDataverse']['fullFilename']))
+        """ % self.load_source('orders', 'atomDataverse'))
         self.log_results(results)
 
     def perform_benchmark(self):
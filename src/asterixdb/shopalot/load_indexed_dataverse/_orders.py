@@ -10,7 +10,7 @@ class LoadIndexedOrdersDataverse(AbstractShopALotRunnable):
         super().__init__()
 
     def _benchmark_load_sarr(self):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATAVERSE ShopALot.SARR IF EXISTS;
             CREATE DATAVERSE ShopALot.SARR;
             USE ShopALot.SARR;
@@ -24,11 +24,11 @@ class LoadIndexedOrdersDataverse(AbstractShopALotRunnable):
 
             CREATE INDEX ordersItemQtyIdx ON Orders(UNNEST items SELECT qty : int);
             CREATE INDEX ordersItemProductIdx ON Orders(UNNEST items SELECT product_id : string);
-        """ % ('localhost:///' + self.config['shopalot']['orders']['sarrDataverse']['fullFilename']))
+        """ % self.load_source('orders', 'sarrDataverse'))
         self.log_results(results)
 
     def _benchmark_load_atom(self):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATAVERSE ShopALot.ATOM IF EXISTS;
             CREATE DATAVERSE ShopALot.ATOM;
             USE ShopALot.ATOM;
@@ -42,7 +42,7 @@ class LoadIndexedOrdersDataverse(AbstractShopALotRunnable):
             
             CREATE INDEX ordersItemQtyIdx ON Orders(item.qty : int);
             CREATE INDEX ordersItemProductIdx ON Orders(item.product_id : string);
-        """ % ('localhost:///' + self.config['shopalot']['orders']['atomDataverse']['fullFilename']))
+        """ % self.load_source('orders', 'atomDataverse'))
         self.log_results(results)
 
     def perform_benchmark(self):
@@ -10,7 +10,7 @@ class LoadIndexedStoresDataverse(AbstractShopALotRunnable):
         super().__init__()
 
     def _benchmark_load_sarr(self):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATAVERSE ShopALot.SARR IF EXISTS;
             CREATE DATAVERSE ShopALot.SARR;
             USE ShopALot.SARR;
@@ -23,11 +23,11 @@ class LoadIndexedStoresDataverse(AbstractShopALotRunnable):
             );
 
             CREATE INDEX storesCatIdx ON Stores(UNNEST categories : string);
-          """ % ('localhost:///' + self.config['shopalot']['stores']['sarrDataverse']['fullFilename']))
+          """ % self.load_source('stores', 'sarrDataverse'))
         self.log_results(results)
 
     def _benchmark_load_atom(self):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATAVERSE ShopALot.ATOM IF EXISTS;
             CREATE DATAVERSE ShopALot.ATOM;
             USE ShopALot.ATOM;
@@ -40,7 +40,7 @@ class LoadIndexedStoresDataverse(AbstractShopALotRunnable):
             );
             
             CREATE INDEX storesCatIdx ON Stores(category : string ?);
-           """ % ('localhost:///' + self.config['shopalot']['stores']['atomDataverse']['fullFilename']))
+           """ % self.load_source('stores', 'atomDataverse'))
         self.log_results(results)
 
     def perform_benchmark(self):
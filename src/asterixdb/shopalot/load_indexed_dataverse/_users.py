@@ -7,7 +7,7 @@ logger = logging.getLogger(__name__)
 
 class LoadIndexedUsersDataverse(AbstractShopALotRunnable):
     def _benchmark_load_sarr(self):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATAVERSE ShopALot.SARR IF EXISTS;
             CREATE DATAVERSE ShopALot.SARR;
             USE ShopALot.SARR;
@@ -20,11 +20,11 @@ class LoadIndexedUsersDataverse(AbstractShopALotRunnable):
             );
 
             CREATE INDEX usersNumberIdx ON Users(UNNEST phones SELECT number : string);
-          """ % ('localhost:///' + self.config['shopalot']['users']['sarrDataverse']['fullFilename']))
+          """ % self.load_source('users', 'sarrDataverse'))
         self.log_results(results)
 
     def _benchmark_load_atom(self):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATAVERSE ShopALot.ATOM IF EXISTS;
             CREATE DATAVERSE ShopALot.ATOM;
             USE ShopALot.ATOM;
@@ -37,7 +37,7 @@ class LoadIndexedUsersDataverse(AbstractShopALotRunnable):
             );
 
             CREATE INDEX usersNumberIdx ON Users (phone.number : string ?);
-          """ % ('localhost:///' + self.config['shopalot']['users']['atomDataverse']['fullFilename']))
+          """ % self.load_source('users', 'atomDataverse'))
         self.log_results(results)
 
     def perform_benchmark(self):
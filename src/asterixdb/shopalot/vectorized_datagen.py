@@ -0,0 +1,227 @@
+import functools
+import itertools
+import datetime
+import faker
+import numpy
+import abc
+
+from src.asterixdb.shopalot.datagen import AbstractUsersDatagen
+from src.asterixdb.shopalot.datagen import AbstractStoresDatagen
+from src.asterixdb.shopalot.datagen import AbstractOrdersDatagen
+
+
+class PhiloxCounterStream:
+    """ Philox4x32-10 over NumPy arrays. The PK is the counter, so no state is carried between records. """
+    MULTIPLIERS = (0xD2511F53, 0xCD9E8D57)
+    WEYL_CONSTANTS = (0x9E3779B9, 0xBB67AE85)
+    WORD_MASK = 0xFFFFFFFF
+    NUMBER_OF_ROUNDS = 10
+
+    def __init__(self, seed):
+        self.key = (seed & self.WORD_MASK, (seed >> 32) & self.WORD_MASK)
+
+    def words(self, pks, block):
+        """ Returns four arrays of 32-bit words for the counter (PK, block). """
+        pks = numpy.asarray(pks, dtype=numpy.uint64)
+        mask = numpy.uint64(self.WORD_MASK)
+        shift = numpy.uint64(32)
+        m0, m1 = numpy.uint64(self.MULTIPLIERS[0]), numpy.uint64(self.MULTIPLIERS[1])
+
+        c0, c1 = pks & mask, pks >> shift
+        c2, c3 = numpy.full_like(pks, block), numpy.zeros_like(pks)
+        k0, k1 = self.key
+        for _ in range(self.NUMBER_OF_ROUNDS):
+            p0, p1 = c0 * m0, c2 * m1
+            c0, c1, c2, c3 = (p1 >> shift) ^ c1 ^ numpy.uint64(k0), p1 & mask, \
+                (p0 >> shift) ^ c3 ^ numpy.uint64(k1), p0 & mask
+            k0 = (k0 + self.WEYL_CONSTANTS[0]) & self.WORD_MASK
+            k1 = (k1 + self.WEYL_CONSTANTS[1]) & self.WORD_MASK
+
+        return c0, c1, c2, c3
+
+    @staticmethod
+    def to_uniform(word):
+        return word.astype(numpy.float64) / 4294967296.0
+
+    @staticmethod
+    def to_long(high_word, low_word):
+        return (high_word << numpy.uint64(32)) | low_word
+
+
+class _AbstractVectorizedDatagen(abc.ABC):
+    DEFAULT_SEED = 20210609
+    VOCABULARY_SEED = 0
+    VOCABULARY_SIZE = 4096
+    BATCH_SIZE = 10000
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def sample_vocabulary(provider_name, vocabulary_size):
+        vocabulary_datagen = faker.Faker()
+        vocabulary_datagen.seed_instance(_AbstractVectorizedDatagen.VOCABULARY_SEED)
+        provider = getattr(vocabulary_datagen, provider_name)
+        return numpy.array([provider() for _ in range(vocabulary_size)], dtype=object)
+
+    @staticmethod
+    def format_phone_numbers(phone_digits):
+        area_codes = (phone_digits // 10 ** 7) % 800 + 200
+        exchange_codes = (phone_digits // 10 ** 4) % 1000
+        line_numbers = phone_digits % 10 ** 4
+        return [f'{a:03d}-{e:03d}-{n:04d}' for a, e, n in
+                zip(area_codes.tolist(), exchange_codes.tolist(), line_numbers.tolist())]
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.philox_stream = PhiloxCounterStream(kwargs.get('datagen_seed', self.DEFAULT_SEED))
+
+    def vocabulary(self, provider_name):
+        return self.sample_vocabulary(provider_name, self.VOCABULARY_SIZE)
+
+    @abc.abstractmethod
+    def atom_batch_mapper(self, pks):
+        pass
+
+    def atom_mapper(self, pk):
+        return self.atom_batch_mapper(numpy.array([pk], dtype=numpy.uint64))[0]
+
+    def invoke(self):
+        primary_key_iter = self.primary_key_generator()
+        while True:
+            pk_batch = list(itertools.islice(primary_key_iter, self.BATCH_SIZE))
+            if len(pk_batch) == 0:
+                break
+
+            # Each record is a pure function of its PK, so there is nothing to reseed here.
+            for atom_json in self.atom_batch_mapper(numpy.array(pk_batch, dtype=numpy.uint64)):
+                self.json_consumer(atom_json, self.sarr_mapper(atom_json))
+
+        self.close_resources()
+
+
+class AbstractVectorizedUsersDatagen(_AbstractVectorizedDatagen, AbstractUsersDatagen, abc.ABC):
+    def atom_batch_mapper(self, pks):
+        w0, w1, w2, w3 = self.philox_stream.words(pks, 0)
+        phone_types = numpy.array(self.PHONE_TYPES, dtype=object)[w0 % numpy.uint64(len(self.PHONE_TYPES))]
+        first_names = self.vocabulary('first_name')[w1 % numpy.uint64(self.VOCABULARY_SIZE)]
+        last_names = self.vocabulary('last_name')[w2 % numpy.uint64(self.VOCABULARY_SIZE)]
+        phone_numbers = self.format_phone_numbers(self.philox_stream.to_long(w3, self.philox_stream.words(pks, 1)[0]))
+
+        return [{
+            "user_id": self.format_key(pk),
+            "chunk_id": self.format_key(self.chunk_id_mapper(pk, self.chunk_size)),
+            "name": {
+                "first": first_name,
+                "last": last_name
+            },
+            "phone": {
+                "type": phone_type,
+                "number": phone_number
+            }
+        } for pk, phone_type, first_name, last_name, phone_number in
+            zip(pks.tolist(), phone_types, first_names, last_names, phone_numbers)]
+
+
+class AbstractVectorizedStoresDatagen(_AbstractVectorizedDatagen, AbstractStoresDatagen, abc.ABC):
+    def atom_batch_mapper(self, pks):
+        w0, w1, w2, w3 = self.philox_stream.words(pks, 0)
+        store_names = numpy.array(self.STORE_NAMES, dtype=object)[w0 % numpy.uint64(len(self.STORE_NAMES))]
+        store_categories = numpy.array(self.PRODUCT_CATEGORIES, dtype=object)[
+            w1 % numpy.uint64(len(self.PRODUCT_CATEGORIES))]
+        cities = self.vocabulary('city')[w2 % numpy.uint64(self.VOCABULARY_SIZE)]
+        street_names = self.vocabulary('street_name')[w3 % numpy.uint64(self.VOCABULARY_SIZE)]
+
+        w4, w5, w6, w7 = self.philox_stream.words(pks, 1)
+        building_numbers = (w4 % numpy.uint64(99900) + numpy.uint64(100)).tolist()
+        zip_codes = (w5 % numpy.uint64(100000)).tolist()
+        phone_numbers = self.format_phone_numbers(self.philox_stream.to_long(w6, w7))
+
+        return [{
+            "store_id": self.format_key(pk),
+            "chunk_id": self.format_key(self.chunk_id_mapper(pk, self.chunk_size)),
+            "name": store_name,
+            "address": {
+                "city": city,
+                "street": f'{building_number} {street_name}',
+                "zip_code": str(zip_code).zfill(5).lstrip('0'),
+            },
+            "phone": phone_number,
+            "category": store_category
+        } for pk, store_name, store_category, city, street_name, building_number, zip_code, phone_number in
+            zip(pks.tolist(), store_names, store_categories, cities, street_names, building_numbers, zip_codes,
+                phone_numbers)]
+
+
+class AbstractVectorizedOrdersDatagen(_AbstractVectorizedDatagen, AbstractOrdersDatagen, abc.ABC):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        # Each record is a pure function of its PK, so "now" is fixed once for our run (and not per batch).
+        if self.reference_time is None:
+            self.reference_time = datetime.datetime.now()
+
+    @staticmethod
+    def _format_datetimes(month_start, offset_seconds):
+        datetimes = numpy.datetime64(month_start, 's') + offset_seconds.astype('timedelta64[s]')
+        return [d.replace('T', ' ') for d in numpy.datetime_as_string(datetimes, unit='s').tolist()]
+
+    @staticmethod
+    def _format_uuids(w0, w1, w2, w3):
+        # Mark these as version 4, variant 1 (i.e. the same shape as uuid.uuid4()).
+        w1 = (w1 & numpy.uint64(0xFFFF0FFF)) | numpy.uint64(0x00004000)
+        w2 = (w2 & numpy.uint64(0x3FFFFFFF)) | numpy.uint64(0x80000000)
+        return [f'{a:08x}-{b >> 16:04x}-{b & 0xFFFF:04x}-{c >> 16:04x}-{c & 0xFFFF:04x}{d:08x}' for a, b, c, d in
+                zip(w0.tolist(), w1.tolist(), w2.tolist(), w3.tolist())]
+
+    def atom_batch_mapper(self, pks):
+        to_uniform = self.philox_stream.to_uniform
+        w0, w1, w2, w3 = self.philox_stream.words(pks, 0)
+        product_ids = [str(p).zfill(3) for p in (w0 % numpy.uint64(542)).tolist()]
+        list_prices = numpy.maximum(to_uniform(w1) * 50, 0.99)
+        prices = numpy.maximum(list_prices + (list_prices * to_uniform(w2)) - (list_prices / 2.0), 0.99)
+        prices = (numpy.floor(prices * 100 + 0.5) / 100).tolist()
+
+        # Quantities follow |N(1, 10)|, drawn w/ the Box-Muller transform.
+        w4, w5, w6, w7 = self.philox_stream.words(pks, 1)
+        normals = numpy.sqrt(-2.0 * numpy.log(1.0 - to_uniform(w4))) * numpy.cos(2.0 * numpy.pi * to_uniform(w5))
+        quantities = numpy.abs(1 + 10 * normals).astype(numpy.int64).tolist()
+
+        # All orders are placed this month, picked up within 6 hours, and fulfilled within 6 hours of pickup.
+        month_start = self.reference_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        month_seconds = int((self.reference_time - month_start).total_seconds())
+        placed_offsets = numpy.floor(to_uniform(w3) * month_seconds).astype(numpy.int64)
+        pickup_offsets = placed_offsets + numpy.floor(to_uniform(w6) * 6 * 3600).astype(numpy.int64)
+        fulfilled_offsets = pickup_offsets + numpy.floor(to_uniform(w7) * 6 * 3600).astype(numpy.int64)
+        times_placed = self._format_datetimes(month_start, placed_offsets)
+        times_fulfilled = self._format_datetimes(month_start, fulfilled_offsets)
+
+        w8, w9, w10, w11 = self.philox_stream.words(pks, 2)
+        user_ids = self.philox_stream.to_long(w8, w9) % numpy.uint64(self.user_id_end - self.user_id_start + 1)
+        user_ids = [str(u + self.user_id_start).zfill(self.user_id_zfill) for u in user_ids.tolist()]
+        store_ids = self.philox_stream.to_long(w10, w11) % numpy.uint64(self.store_id_end - self.store_id_start + 1)
+        store_ids = [str(s + self.store_id_start).zfill(self.store_id_zfill) for s in store_ids.tolist()]
+        item_ids = self._format_uuids(*self.philox_stream.words(pks, 3))
+
+        return [{
+            "order_id": self.format_key(pk),
+            "chunk_id": self.format_key(self.chunk_id_mapper(pk, self.chunk_size)),
+            "time_placed": time_placed,
+            "time_fulfilled": time_fulfilled,
+            "user_id": user_id,
+            "store_id": store_id,
+            "item": {
+                "item_id": item_id,
+                "qty": quantity,
+                "price": price,
+                "product_id": product_id
+            }
+        } for pk, time_placed, time_fulfilled, user_id, store_id, item_id, quantity, price, product_id in
+            zip(pks.tolist(), times_placed, times_fulfilled, user_ids, store_ids, item_ids, quantities, prices,
+                product_ids)]
+
+
+# Keyed by name, as datagen.py may also be running as __main__ (where its classes are distinct from these).
+VECTORIZED_DATAGEN_CLASSES = {
+    AbstractUsersDatagen.__name__: AbstractVectorizedUsersDatagen,
+    AbstractStoresDatagen.__name__: AbstractVectorizedStoresDatagen,
+    AbstractOrdersDatagen.__name__: AbstractVectorizedOrdersDatagen
+}
@@ -7,20 +7,29 @@ logger = logging.getLogger(__name__)
 
 class BasicAnalyticalQuery(AbstractQueryRunnable):
     def _execute_and_log(self, query_f, query_number, run_number, timeout=None, **parameters):
+        if self.checkpoint.is_completed('query', query_number, run_number):
+            logger.info(f'Skipping query {query_number}, run number {run_number}. This has already been completed.')
+            return self.checkpoint.unit_result('query', query_number, run_number)
+
         logger.info(f'Executing query {query_number}, run number {run_number}.')
         results = self.execute_sqlpp('\nUSE TPC_CH;\n\n' + query_f(**parameters), timeout=timeout)
 
         if results['status'] != 'success':
+            # A timed-out query is still a measurement (e.g. of how long its cancellation took).
             logger.error(f'Query execution not successful! Parameters: {parameters}')
-            return False
+            results.update({'runNumber': run_number, 'queryNumber': query_number, 'parameters': parameters})
+            self.log_results(results)
+            return None
         elif len(results['results']) == 0:
             logger.warning(f'No results found... Execution time: {results["metrics"]["elapsedTime"]}')
-            return True
+            self.complete_unit('query', query_number, run_number, result=self.response_latency(results))
+            return self.response_latency(results)
         else:
             logger.debug(f'Query was successful. Execution time: {results["metrics"]["elapsedTime"]}')
             results.update({'runNumber': run_number, 'queryNumber': query_number, 'parameters': parameters})
             self.log_results(results)
-            return True
+            self.complete_unit('query', query_number, run_number, result=self.response_latency(results))
+            return self.response_latency(results)
 
     def __init__(self):
         super().__init__(num_queries=40, num_slow_queries=0)
@@ -28,19 +37,7 @@ class BasicAnalyticalQuery(AbstractQueryRunnable):
     def perform_benchmark(self):
         logger.info('Executing basic analytical query suite.')
 
-        for i in range(self.config['num_queries']):
-            date_pair = self.config['tpc_ch']['parameters']['dateRange'] \
-                [i % len(self.config['tpc_ch']['parameters']['dateRange'])]
-            date_1, date_2 = date_pair['date1'], date_pair['date2']
-
-            # Execute all queries.
-            self._execute_and_log(self.query_1, 1, i + 1, timeout=1800, date_1=date_1, date_2=date_2)
-            self._execute_and_log(self.query_6, 6, i + 1, timeout=1800, date_1=date_1, date_2=date_2)
-            self._execute_and_log(self.query_7, 7, i + 1, timeout=1800, date_1=date_1, date_2=date_2)
-            self._execute_and_log(self.query_12, 12, i + 1, timeout=1800, date_1=date_1, date_2=date_2)
-            self._execute_and_log(self.query_14, 14, i + 1, timeout=1800, date_1=date_1, date_2=date_2)
-            self._execute_and_log(self.query_15, 15, i + 1, timeout=1800, date_1=date_1, date_2=date_2)
-            self._execute_and_log(self.query_20, 20, i + 1, timeout=1800, date_1=date_1, date_2=date_2)
+        self._execute_until_stable(self._execute_and_log)
 
         for i in range(self.config['num_slow_queries']):
             date_pair = self.config['tpc_ch']['parameters']['dateRange'] \
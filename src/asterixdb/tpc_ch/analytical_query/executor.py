@@ -7,6 +7,35 @@ logger = logging.getLogger(__name__)
 
 
 class AbstractQueryRunnable(AbstractTPCCHRunnable, abc.ABC):
+    IS_RESUMABLE = True
+    QUERY_NUMBERS = [1, 6, 7, 12, 14, 15, 20]
+    MAXIMUM_RUNS_FACTOR = 2
+
+    def _execute_until_stable(self, execute_f):
+        """ Repeats each query (given an execute function that returns its latency) until its median is stable. """
+        maximum_runs, samplers = self.config['num_queries'] * self.MAXIMUM_RUNS_FACTOR, dict()
+        for i in range(maximum_runs):
+            date_pair = self.config['tpc_ch']['parameters']['dateRange'] \
+                [i % len(self.config['tpc_ch']['parameters']['dateRange'])]
+            date_1, date_2 = date_pair['date1'], date_pair['date2']
+
+            # Queries stop independently of one another, but we keep interleaving those that remain.
+            remaining_numbers = [n for n in self.QUERY_NUMBERS if n not in samplers or samplers[n].should_continue()]
+            if len(remaining_numbers) == 0:
+                break
+            for query_number in remaining_numbers:
+                # Each sampler starts its clock (i.e. its time budget) just before its query first runs.
+                if query_number not in samplers:
+                    samplers[query_number] = self.adaptive_sampler(self.config['num_queries'], max_samples=maximum_runs,
+                                                                   label=f'query_{query_number}')
+                samplers[query_number].add(execute_f(getattr(self, f'query_{query_number}'), query_number, i + 1,
+                                                     timeout=1800, date_1=date_1, date_2=date_2))
+
+        for sampler in samplers.values():
+            if sampler.should_continue():
+                sampler.stop('maxRuns')
+            self.log_sampling(sampler)
+
     @staticmethod
     def query_1(date_1, date_2):
         """ Can utilize an index on the ol_delivery_d field. """
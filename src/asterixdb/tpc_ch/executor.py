@@ -14,6 +14,8 @@ class AbstractTPCCHRunnable(AbstractAsterixDBRunnable, abc.ABC):
         parser = argparse.ArgumentParser(description='Benchmark TPC_CH queries on an AsterixDB instance.')
         parser.add_argument('--config', type=str, default='config/asterixdb.json', help='Path to the config file.')
         parser.add_argument('--datagen', type=str, default='config/tpc_ch.json', help='Path to the datagen file.')
+        if self.IS_RESUMABLE:
+            parser.add_argument('--resume', type=str, default=None, help='Results directory of a run to resume.')
         parser_args = parser.parse_args()
         with open(parser_args.config) as config_file:
             config_json = json.load(config_file)
@@ -22,6 +24,9 @@ class AbstractTPCCHRunnable(AbstractAsterixDBRunnable, abc.ABC):
 
         config_json['resultsDir'] = 'out/' + datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + '-' + \
             self.__class__.__name__ + '-A'
+        if getattr(parser_args, 'resume', None) is not None:
+            config_json['resultsDir'] = parser_args.resume.rstrip('/')
+            config_json['resume'] = parser_args.resume
 
         return {**config_json, **kwargs}
 
@@ -7,7 +7,7 @@ logger = logging.getLogger(__name__)
 
 class LoadIndexedDataverse(AbstractLoadDataverseRunnable):
     def _create_indexes(self):
-        results = self.execute_sqlpp(f"""
+        results = self.execute_script(f"""
             USE TPC_CH;
             
             CREATE INDEX orderlineDelivDateIdx ON Orders ( UNNEST o_orderline SELECT ol_delivery_d : string );
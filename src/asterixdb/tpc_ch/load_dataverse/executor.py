@@ -1,5 +1,8 @@
+import concurrent.futures
 import logging
+import timeit
 import abc
+import os
 
 from src.asterixdb.tpc_ch.executor import AbstractTPCCHRunnable
 
@@ -7,8 +10,11 @@ logger = logging.getLogger(__name__)
 
 
 class AbstractLoadDataverseRunnable(AbstractTPCCHRunnable, abc.ABC):
+    DATASET_FILES = {'Customer': 'customer.json', 'Nation': 'nation.json', 'Orders': 'orders.json',
+                     'Stock': 'stock.json', 'Item': 'item.json', 'Region': 'region.json', 'Supplier': 'supplier.json'}
+
     def create_dataverse(self):
-        results = self.execute_sqlpp("""
+        results = self.execute_script("""
             DROP DATAVERSE TPC_CH IF EXISTS;
             CREATE DATAVERSE TPC_CH;
             USE TPC_CH;
@@ -36,17 +42,81 @@ class AbstractLoadDataverseRunnable(AbstractTPCCHRunnable, abc.ABC):
         """)
         self.log_results(results)
 
-    def load_dataverse(self):
+    def _data_filename(self, dataset_name):
+        return os.path.join(self.config['tpc_ch']['dataPath'], self.DATASET_FILES[dataset_name])
+
+    def _file_size(self, dataset_name):
+        data_filename = self._data_filename(dataset_name)
+        return os.path.getsize(data_filename) if os.path.isfile(data_filename) else None
+
+    def _file_records(self, dataset_name):
+        """ Our data files hold one JSON record per line. """
+        data_filename = self._data_filename(dataset_name)
+        if not os.path.isfile(data_filename):
+            return None
+        with open(data_filename, 'rb') as data_fp:
+            return sum(1 for line in data_fp if line.strip() != b'')
+
+    def _plan_loads(self):
+        """ Largest files first, so our longest load is never the last one to start. """
+        return sorted(self.DATASET_FILES.keys(), key=lambda d: self._file_size(d) or 0, reverse=True)
+
+    def _load_dataset(self, dataset_name):
         data_path = 'localhost:///' + self.config['tpc_ch']['dataPath']
-        results = self.execute_sqlpp(f"""
-            USE TPC_CH;
+        with self.tracer.span('load_dataset', category='load', dataset=dataset_name):
+            results = self.execute_sqlpp(f"""
+                USE TPC_CH;
+                LOAD DATASET TPC_CH.{dataset_name} USING localfs (
+                    ("path"="{data_path}/{self.DATASET_FILES[dataset_name]}"), ("format"="json")
+                );
+            """)
+        if results['status'] != 'success':
+            logger.error(f'Loading {dataset_name} was not successful, but {results["status"]}.')
+        return results
 
-            LOAD DATASET TPC_CH.Customer USING localfs ( ("path"="{data_path}/customer.json"), ("format"="json") );
-            LOAD DATASET TPC_CH.Nation USING localfs ( ("path"="{data_path}/nation.json"), ("format"="json") );
-            LOAD DATASET TPC_CH.Orders USING localfs ( ("path"="{data_path}/orders.json"), ("format"="json") );
-            LOAD DATASET TPC_CH.Stock USING localfs ( ("path"="{data_path}/stock.json"), ("format"="json") );    
-            LOAD DATASET TPC_CH.Item USING localfs ( ("path"="{data_path}/item.json"), ("format"="json") );            
-            LOAD DATASET TPC_CH.Region USING localfs ( ("path"="{data_path}/region.json"), ("format"="json") );                  
-            LOAD DATASET TPC_CH.Supplier USING localfs ( ("path"="{data_path}/supplier.json"), ("format"="json") );            
-        """)
+    def _log_load_results(self, dataset_name, results, parallelism):
+        # We scan our source files after the load window, so our scans do not compete with the loads themselves.
+        number_of_records, number_of_bytes = self._file_records(dataset_name), self._file_size(dataset_name)
+        load_latency = self.response_latency(results)
+        results['load'] = {'dataset': dataset_name, 'parallelism': parallelism}
+
+        # Without a local copy of our source file, we have nothing to report our throughput against.
+        if number_of_records is not None:
+            results['load']['numberOfRecords'] = number_of_records
+            if load_latency:
+                results['load']['recordsPerSecond'] = number_of_records / load_latency
+        if number_of_bytes is not None:
+            results['load']['numberOfBytes'] = number_of_bytes
+            if load_latency:
+                results['load']['bytesPerSecond'] = number_of_bytes / load_latency
         self.log_results(results)
+        return load_latency
+
+    def load_dataverse(self):
+        # Each dataset is loaded by its own request, so independent loads can run concurrently on separate connections.
+        parallelism = self.config['tpc_ch'].get('loadParallelism', 1)
+        if parallelism > 1:
+            # Our concurrent loads would otherwise queue for (or discard) the connections of a smaller pool.
+            session_config = self.config['benchmark'].setdefault('httpSession', {'poolSize': 1, 'isKeepAlive': True})
+            if session_config['poolSize'] < parallelism:
+                session_config['poolSize'] = parallelism
+                self.reset_http_session()
+        load_plan = self._plan_loads()
+        logger.info(f'Loading {load_plan} with a parallelism of {parallelism}.')
+        t_before = timeit.default_timer()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=parallelism) as executor:
+            load_results = list(executor.map(self._load_dataset, load_plan))
+        wall_clock_time = timeit.default_timer() - t_before
+
+        load_latencies = {d: self._log_load_results(d, r, parallelism) for d, r in zip(load_plan, load_results)}
+        successful_latencies = {d: v for d, v in load_latencies.items() if v is not None}
+        load_window = {
+            'parallelism': parallelism,
+            'plan': load_plan,
+            'wallClockTime': wall_clock_time,
+            'isSuccessful': all(r['status'] == 'success' for r in load_results),
+            'dominantDataset': max(successful_latencies, key=successful_latencies.get)
+            if len(successful_latencies) > 0 else None
+        }
+        logger.info(f'Load window: {load_window}')
+        self.log_results({'loadWindow': load_window})
@@ -0,0 +1,63 @@
+import logging
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint:
+    """ Append-only record of completed units of work (and suite state), so an interrupted run can be resumed. """
+
+    def __init__(self, checkpoint_filename, execution_id):
+        # Without a filename (i.e. without file output), we only remember our units for the lifetime of this run.
+        self.checkpoint_filename = checkpoint_filename
+        self.execution_id = execution_id
+        self.completed_units = dict()
+        self.state = dict()
+
+        if self.checkpoint_filename is None:
+            return
+        elif os.path.isfile(self.checkpoint_filename):
+            with open(self.checkpoint_filename) as checkpoint_fp:
+                for line in checkpoint_fp:
+                    # A crash can leave a partial last line. That unit was never completed, so we ignore it.
+                    try:
+                        checkpoint_entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f'Ignoring a partial checkpoint entry: {line.strip()}')
+                        continue
+                    if 'executionID' in checkpoint_entry:
+                        self.execution_id = checkpoint_entry['executionID']
+                    if checkpoint_entry.get('unit') is not None:
+                        self.completed_units[tuple(checkpoint_entry['unit'])] = checkpoint_entry.get('result')
+                    self.state.update(checkpoint_entry.get('state', {}))
+            logger.info(f'Resuming execution {self.execution_id} from {self.checkpoint_filename}, '
+                        f'with {len(self.completed_units)} completed unit(s).')
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_filename)), exist_ok=True)
+            self._append({'executionID': self.execution_id})
+
+    def _append(self, checkpoint_entry):
+        # Each entry must be on disk before we move on, otherwise a crash could lose a completed measurement.
+        if self.checkpoint_filename is None:
+            return
+        with open(self.checkpoint_filename, 'a') as checkpoint_fp:
+            checkpoint_fp.write(json.dumps(checkpoint_entry) + '\n')
+            checkpoint_fp.flush()
+            os.fsync(checkpoint_fp.fileno())
+
+    def is_completed(self, *unit):
+        return tuple(unit) in self.completed_units
+
+    def unit_result(self, *unit):
+        """ The result (e.g. the latency) recorded with a completed unit, so a resumed run can still account for it. """
+        return self.completed_units.get(tuple(unit))
+
+    def complete(self, *unit, result=None, **state):
+        self.completed_units[tuple(unit)] = result
+        self.state.update(state)
+        self._append({'unit': list(unit), 'result': result, 'state': state})
+
+    def save_state(self, **state):
+        self.state.update(state)
+        self._append({'state': state})
@@ -1,13 +1,22 @@
 import logging.config
 import datetime
 import logging
-import socket
 import uuid
 import os
 import subprocess
+import collections
+import threading
+import timeit
+import queue
 import abc
 import json
 
+from src.plan_store import PlanStore
+from src.feed import AnalysisFeedWriter
+from src.sqlite_store import SQLiteResultsStore
+from src.tracing import Tracer
+from src.checkpoint import Checkpoint
+from src.sampling import AdaptiveSampler
 
 with open('config/logging.json') as logging_config_file:
     logging_json = json.load(logging_config_file)
@@ -15,73 +24,277 @@ with open('config/logging.json') as logging_config_file:
     logger = logging.getLogger(__name__)
 
 
+class ResultsSink:
+    """ Writes results to disk / the analysis cluster / the console on a background thread, in batches. """
+    _STOP = object()
+
+    def __init__(self, results_config, results_fp=None, feed_writer=None, results_store=None):
+        self.results_config = results_config
+        self.results_fp = results_fp
+        self.feed_writer = feed_writer
+        self.results_store = results_store
+        self.batch_size = results_config.get('sinkBatchSize', 100)
+        self.results_queue = queue.Queue(maxsize=results_config.get('sinkQueueSize', 10000))
+
+        # Counters, so we know if our sink could not keep up.
+        self.max_queue_depth = 0
+        self.dropped_records = 0
+        self.written_records = 0
+        self.written_batches = 0
+
+        self.sink_thread = threading.Thread(target=self._drain, daemon=True)
+        self.sink_thread.start()
+
+    @property
+    def queue_depth(self):
+        return self.results_queue.qsize()
+
+    def submit(self, results, is_file=True):
+        # We never block the measurement path. If our queue is full, the record is dropped (and counted).
+        try:
+            self.results_queue.put_nowait((results, is_file))
+            self.max_queue_depth = max(self.max_queue_depth, self.results_queue.qsize())
+        except queue.Full:
+            self.dropped_records = self.dropped_records + 1
+            logger.warning(f'Results queue is full. {self.dropped_records} record(s) have been dropped.')
+
+    def _write_batch(self, results_batch):
+        # To the results file.
+        file_batch = [r for r, is_file in results_batch if is_file]
+        if self.results_config['isFile'] and len(file_batch) > 0:
+            logger.debug(f'Recording {len(file_batch)} result(s) to disk.')
+            self.results_fp.write(''.join(json.dumps(r) + '\n' for r in file_batch))
+            self.results_fp.flush()
+
+        # To our local SQLite database. Each batch is one transaction.
+        if self.results_store is not None and len(file_batch) > 0:
+            logger.debug(f'Recording {len(file_batch)} result(s) to SQLite.')
+            self.results_store.write(file_batch)
+
+        # To the analysis cluster.
+        if self.results_config['isSocket']:
+            logger.debug(f'Recording {len(results_batch)} result(s) to cluster through feed.')
+            self.feed_writer.write([r for r, _ in results_batch])
+
+        # To the console.
+        if self.results_config['isConsole']:
+            logger.debug('Writing result to console.')
+            [logger.debug(json.dumps(r)) for r, _ in results_batch]
+
+    def _drain(self):
+        is_stopping = False
+        while not is_stopping:
+            results_batch = [self.results_queue.get()]
+            while len(results_batch) < self.batch_size and results_batch[-1] is not self._STOP:
+                try:
+                    results_batch.append(self.results_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if results_batch[-1] is self._STOP:
+                is_stopping = True
+                results_batch.pop()
+            try:
+                if len(results_batch) > 0:
+                    self._write_batch(results_batch)
+                    self.written_records = self.written_records + len(results_batch)
+                    self.written_batches = self.written_batches + 1
+            except Exception as e:
+                logger.error(f'Could not record {len(results_batch)} result(s): {str(e)}')
+            finally:
+                [self.results_queue.task_done() for _ in range(len(results_batch) + (1 if is_stopping else 0))]
+
+        # Our SQLite connection belongs to this thread, so it must also be closed here.
+        if self.results_store is not None:
+            self.results_store.close()
+
+    def flush(self):
+        self.results_queue.join()
+
+    def close(self):
+        self.results_queue.put(self._STOP)
+        self.sink_thread.join()
+        logger.info(f'Results sink has finished. Records written: {self.written_records}, '
+                    f'batches written: {self.written_batches}, records dropped: {self.dropped_records}, '
+                    f'max queue depth: {self.max_queue_depth}.')
+
+
 class AbstractBenchmarkRunnable(abc.ABC):
+    SUBPROCESS_TAIL_SIZE = 100
+
+    # Only suites that skip the units in our checkpoint can be resumed (i.e. accept --resume).
+    IS_RESUMABLE = False
+
     @staticmethod
-    def call_subprocess(command, is_log=True):
+    def call_subprocess(command, is_log=True, timeout=None, tail_size=SUBPROCESS_TAIL_SIZE):
+        t_before = timeit.default_timer()
         subprocess_pipe = subprocess.Popen(
             command,
             stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
+            stderr=subprocess.PIPE,
             universal_newlines=True
         )
 
-        resultant = ''
-        for stdout_line in iter(subprocess_pipe.stdout.readline, ""):
-            if stdout_line.strip() != '':
-                resultant += stdout_line
-                for line in resultant.strip().split('\n'):
+        # Each stream is pumped on its own thread, so neither can fill its pipe and stall the command.
+        output_tail = collections.deque(maxlen=tail_size)
+
+        def _pump(stream, stream_name):
+            for stream_line in iter(stream.readline, ''):
+                stream_line = stream_line.rstrip('\n')
+                if stream_line.strip() != '':
+                    output_tail.append(stream_line)
                     if is_log:
-                        logger.debug(line)
-        subprocess_pipe.stdout.close()
-        return resultant
+                        logger.debug(stream_line if stream_name == 'stdout' else f'[{stream_name}] {stream_line}')
+            stream.close()
+
+        stream_pumps = [threading.Thread(target=_pump, args=(subprocess_pipe.stdout, 'stdout'), daemon=True),
+                        threading.Thread(target=_pump, args=(subprocess_pipe.stderr, 'stderr'), daemon=True)]
+        [p.start() for p in stream_pumps]
+        is_timed_out = False
+        try:
+            subprocess_pipe.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f'Command {command} has run longer than the specified timeout {timeout}. Killing it.')
+            is_timed_out = True
+            subprocess_pipe.kill()
+            subprocess_pipe.wait()
+        [p.join(timeout=5) for p in stream_pumps]
+
+        subprocess_result = {
+            'command': command,
+            'returnCode': subprocess_pipe.returncode,
+            'isTimedOut': is_timed_out,
+            'duration': timeit.default_timer() - t_before,
+            'outputTail': '\n'.join(output_tail)
+        }
+        logger.info(f'Command {command} finished in {subprocess_result["duration"]} seconds '
+                    f'with return code {subprocess_result["returnCode"]}.')
+        return subprocess_result
+
+    @staticmethod
+    def percentile(sorted_values, percentile):
+        # Nearest-rank percentile, as our sample counts are small.
+        if len(sorted_values) == 0:
+            return None
+        rank = max(int(-(-percentile * len(sorted_values) // 100)), 1)
+        return sorted_values[rank - 1]
 
     def __init__(self, **kwargs):
         self.config = {**logging_json, **kwargs}
         logger.info(f'Using the following configuration: {self.config}')
         self.working_system = kwargs['working_system']
         self.execution_id = str(uuid.uuid4())
+        self.results_lock = threading.Lock()
+        self.restart_timings = dict()
 
-        # Setup our benchmarking outputs (to analysis cluster, to file).
+        # Setup our benchmarking outputs (to analysis cluster, to file). A resumed run appends to its old outputs.
+        self.is_resume = self.config.get('resume') is not None
+        if self.is_resume and not self.config['results']['isFile']:
+            raise RuntimeError('Only runs with file output have a checkpoint to resume from.')
+        self.results_fp, self.feed_writer = None, None
         if self.config['results']['isFile']:
-            os.mkdir(os.getcwd() + '/' + self.config['resultsDir'])
+            if not self.is_resume:
+                os.mkdir(os.getcwd() + '/' + self.config['resultsDir'])
             logger.info(f'Results will be stored in: {self.config["resultsDir"]}')
-            self.results_fp = open(self.config['resultsDir'] + '/' + 'results.json', 'w')
+            self.results_fp = open(self.config['resultsDir'] + '/' + 'results.json', 'a' if self.is_resume else 'w')
         if self.config['results']['isSocket']:
-            self.results_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.results_socket.connect((self.config['analysisCluster']['clusterController']['address'],
-                                         self.config['analysisCluster']['feedSocketPort']))
+            self.feed_writer = AnalysisFeedWriter(self.config['analysisCluster']['clusterController']['address'],
+                                                  self.config['analysisCluster']['feedSocketPort'],
+                                                  self.config['resultsDir'])
+
+        # Completed units of work are recorded here. If we are resuming, we also continue under the same execution ID.
+        self.checkpoint = Checkpoint(self.config['resultsDir'] + '/checkpoint.json'
+                                     if self.config['results']['isFile'] else None, self.execution_id)
+        if self.is_resume:
+            self.execution_id = self.checkpoint.execution_id
+        elif len(self.checkpoint.completed_units) > 0:
+            raise RuntimeError(f'{self.config["resultsDir"]} holds a checkpoint. Use --resume to continue it.')
+
+        self.results_store = None
+        if self.config['results'].get('isSQLite', False):
+            self.results_store = SQLiteResultsStore(self.config['results']['sqliteFile'], self.execution_id,
+                                                    self.__class__.__name__, self.working_system,
+                                                    self.config.get('resultsDir'), self.config)
+
+        # Serialization + I/O for our results happens off of the measurement path.
+        self.results_sink = ResultsSink(self.config['results'], self.results_fp, self.feed_writer, self.results_store)
+
+        # Spans let us see where our wall-clock time goes (e.g. datagen vs. network vs. server).
+        trace_filename = 'trace.json' if not self.is_resume else \
+            'trace-' + datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + '.json'
+        self.tracer = Tracer(self.config['resultsDir'] + '/' + trace_filename
+                             if self.config['results'].get('isTrace', False) else None)
+
+        # Plans repeat verbatim across runs, so we record each distinct plan once and reference it by hash.
+        self.plan_store = None
+        if self.config['results'].get('isPlanStore', False):
+            self.plan_store = PlanStore(self.config['resultsDir'] + '/plans' if self.config['results']['isFile']
+                                        else None)
+
+    def tag_record(self, record):
+        """ Tags that every record of this runnable carries. Suites extend this (and not log_results) for such tags. """
+        record['logTime'] = str(datetime.datetime.now())
+        record['executionID'] = self.execution_id
+        record['workingSystem'] = self.working_system
 
     def log_results(self, results):
-        results['logTime'] = str(datetime.datetime.now())
-        results['executionID'] = self.execution_id
-        results['workingSystem'] = self.working_system
+        self.tag_record(results)
+        if self.plan_store is not None and 'plans' in results:
+            plans = results.pop('plans')
+            results['planHash'], is_new_plan = self.plan_store.put(plans)
 
-        # To the results file.
-        if self.config['results']['isFile']:
-            logger.debug('Recording result to disk.')
-            json.dump(results, self.results_fp)
-            self.results_fp.write('\n')
+            # The analysis cluster has no access to our store, so it receives each distinct plan as its own record.
+            if is_new_plan and self.config['results']['isSocket']:
+                plan_fields = ['logTime', 'executionID', 'workingSystem', 'dataverse', 'planHash']
+                self.results_sink.submit({**{k: results[k] for k in plan_fields if k in results}, 'plans': plans},
+                                         is_file=False)
+        self.results_sink.submit(dict(results))
 
-        # To the analysis cluster. We must provide our own key.
-        if self.config['results']['isSocket']:
-            results['id'] = str(uuid.uuid4())
-            logger.debug('Recording result to cluster through feed.')
-            if not self.results_socket.sendall(json.dumps(results).encode('ascii')) is None:
-                logger.warning('Analysis cluster did not accept record!')
-            else:
-                logger.info('Result successfully sent to cluster.')
+    def complete_unit(self, *unit, result=None, **state):
+        """ Checkpoints a unit of work, but only after the records it logged (through our sink) are on disk. """
+        self.results_sink.flush()
+        if self.results_fp is not None:
+            os.fsync(self.results_fp.fileno())
+        self.checkpoint.complete(*unit, result=result, **state)
 
-        # To the console.
-        if self.config['results']['isConsole']:
-            logger.debug('Writing result to console.')
-            logger.debug(json.dumps(results))
+    def log_summary(self, summary):
+        """ Logs a record that is not a statement response (e.g. restart timings), without our suite's log_results. """
+        self.tag_record(summary)
+        self.results_sink.submit(dict(summary))
+
+    def adaptive_sampler(self, fixed_samples, min_samples=None, max_samples=None, label=None):
+        """ Returns a sampler for one measurement. Without adaptive sampling, we take exactly fixed_samples. """
+        sampling_config = self.config['benchmark'].get('adaptiveSampling', {'isEnabled': False})
+        if not sampling_config['isEnabled']:
+            return AdaptiveSampler(target_relative_ci=0, min_samples=fixed_samples, max_samples=fixed_samples,
+                                   label=label)
+        return AdaptiveSampler(
+            target_relative_ci=sampling_config['targetRelativeCI'],
+            confidence=sampling_config['confidence'],
+            min_samples=sampling_config['minSamples'] if min_samples is None else min_samples,
+            max_samples=sampling_config['maxSamples'] if max_samples is None else max_samples,
+            time_budget=sampling_config.get('timeBudget', None),
+            label=label
+        )
+
+    def log_sampling(self, sampler):
+        # Analysis should skip the first warmupSamples runs, and may want to know why we stopped.
+        self.log_results({'sampling': sampler.summary()})
 
     def restart_db(self):
+        command_timeout = self.config['benchmark'].get('commandTimeout', None)
         logger.info('Running STOP command.')
-        self.call_subprocess(self.config['benchmark']['stopCommand'])
+        with self.tracer.span('stopCommand', category='restart'):
+            stop_result = self.call_subprocess(self.config['benchmark']['stopCommand'], timeout=command_timeout)
         logger.info('Running START command.')
-        self.call_subprocess(self.config['benchmark']['startCommand'])
+        with self.tracer.span('startCommand', category='restart'):
+            start_result = self.call_subprocess(self.config['benchmark']['startCommand'], timeout=command_timeout)
         logger.info('Waiting for database to start...')
+        self.restart_timings = {
+            'stopDuration': stop_result['duration'],
+            'startDuration': start_result['duration'],
+            'isTimedOut': stop_result['isTimedOut'] or start_result['isTimedOut']
+        }
 
     @abc.abstractmethod
     def perform_benchmark(self):
@@ -93,23 +306,36 @@ class AbstractBenchmarkRunnable(abc.ABC):
     def invoke(self):
         logger.info(f'Working with execution id: {self.execution_id}.')
 
-        # Restart the cluster. For queries, this minimizes the chance that we access a cached page.
-        self.restart_db()
+        with self.tracer.span('invoke', category='invoke', executionID=self.execution_id):
+            # Restart the cluster. For queries, this minimizes the chance that we access a cached page.
+            self.restart_db()
 
-        # Perform the benchmark.
-        logger.debug('Executing the benchmark.')
-        self.perform_benchmark()
+            # Perform the benchmark.
+            logger.debug('Executing the benchmark.')
+            with self.tracer.span('perform_benchmark', category='invoke'):
+                self.perform_benchmark()
 
-        # Populate our results directory.
-        logger.info('Running finalize command for copying config + log files.')
-        [h.flush() for h in logger.handlers]
-        self.call_subprocess([self.config['benchmark']['postCommand'], self.config['resultsDir']])
+            # Populate our results directory.
+            logger.info('Flushing any queued results.')
+            with self.tracer.span('flushResults', category='invoke'):
+                self.results_sink.flush()
+            logger.info('Running finalize command for copying config + log files.')
+            [h.flush() for h in logger.handlers]
+            with self.tracer.span('postCommand', category='invoke'):
+                self.call_subprocess([self.config['benchmark']['postCommand'], self.config['resultsDir']],
+                                     timeout=self.config['benchmark'].get('commandTimeout', None))
 
-        # Perform any post action.
-        self.perform_post()
+            # Perform any post action.
+            with self.tracer.span('perform_post', category='invoke'):
+                self.perform_post()
 
+        self.close_outputs()
+        logger.info('Benchmark has finished executing.')
+
+    def close_outputs(self):
+        self.tracer.close()
+        self.results_sink.close()
         if self.config['results']['isFile']:
             self.results_fp.close()
         if self.config['results']['isSocket']:
-            self.results_socket.close()
-        logger.info('Benchmark has finished executing.')
+            self.feed_writer.close()
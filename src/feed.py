@@ -0,0 +1,200 @@
+import datetime
+import argparse
+import select
+import logging
+import socket
+import timeit
+import json
+import uuid
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisFeedWriter:
+    """ Batched writer for the analysis feed, which spools to a local journal while the feed is down. """
+    CONNECT_TIMEOUT = 5.0
+    INITIAL_BACKOFF = 0.5
+    MAXIMUM_BACKOFF = 30.0
+    REPLAY_BATCH_SIZE = 500
+
+    @staticmethod
+    def key_records(records):
+        # The socket adapter needs our own key. A record is keyed once, so the feed can tell a replayed record apart.
+        return [r if 'id' in r else {**r, 'id': str(uuid.uuid4())} for r in records]
+
+    @staticmethod
+    def frame_records(records):
+        # The socket adapter parses a stream of ADM records.
+        return ''.join(json.dumps(r) + '\n' for r in records).encode('utf-8')
+
+    def __init__(self, address, port, journal_dir, is_recording_metrics=True):
+        self.address = address
+        self.port = port
+        self.feed_socket = None
+        self.backoff = self.INITIAL_BACKOFF
+        self.next_connect_time = 0.0
+
+        # Records that could not be sent are kept here, and are replayed (in order) once we reconnect.
+        os.makedirs(journal_dir, exist_ok=True)
+        self.journal_filename = os.path.join(journal_dir, 'feed-journal.json')
+        self.metrics_filename = os.path.join(journal_dir, 'feed-metrics.json') if is_recording_metrics else None
+        self.journaled_records = self._count_journal()
+        self.metrics = {
+            'recordsSent': 0,
+            'bytesSent': 0,
+            'batchesSent': 0,
+            'recordsJournaled': 0,
+            'recordsReplayed': 0,
+            'connectAttempts': 0,
+            'reconnects': 0,
+            'sendFailures': 0,
+            'sendTime': 0.0,
+            'maxLag': 0.0
+        }
+        self._connect()
+
+    def _count_journal(self):
+        if not os.path.isfile(self.journal_filename):
+            return 0
+        with open(self.journal_filename) as journal_fp:
+            return sum(1 for line in journal_fp if line.strip() != '')
+
+    @property
+    def is_connected(self):
+        return self.feed_socket is not None
+
+    def _connect(self):
+        if self.is_connected or timeit.default_timer() < self.next_connect_time:
+            return self.is_connected
+
+        self.metrics['connectAttempts'] = self.metrics['connectAttempts'] + 1
+        try:
+            self.feed_socket = socket.create_connection((self.address, self.port), timeout=self.CONNECT_TIMEOUT)
+            if self.metrics['connectAttempts'] > 1:
+                self.metrics['reconnects'] = self.metrics['reconnects'] + 1
+            logger.info(f'Connected to the analysis feed at {self.address}:{self.port}.')
+            self.backoff = self.INITIAL_BACKOFF
+            return True
+
+        except OSError as e:
+            logger.warning(f'Could not connect to the analysis feed: {str(e)}. Trying again in {self.backoff} seconds.')
+            self.next_connect_time = timeit.default_timer() + self.backoff
+            self.backoff = min(self.backoff * 2, self.MAXIMUM_BACKOFF)
+            return False
+
+    def _disconnect(self):
+        if self.feed_socket is not None:
+            try:
+                self.feed_socket.close()
+            except OSError:
+                pass
+        self.feed_socket = None
+        self.next_connect_time = timeit.default_timer() + self.backoff
+        self.backoff = min(self.backoff * 2, self.MAXIMUM_BACKOFF)
+
+    def _is_peer_closed(self):
+        # The feed never writes to us, so a readable socket means the feed has closed its end.
+        is_readable, _, _ = select.select([self.feed_socket], [], [], 0)
+        return len(is_readable) > 0 and self.feed_socket.recv(1, socket.MSG_PEEK) == b''
+
+    def _send(self, records):
+        # sendall returns None even if the feed has gone away, so we check that the feed is still there first.
+        payload = self.frame_records(records)
+        t_before = timeit.default_timer()
+        try:
+            if self._is_peer_closed():
+                raise ConnectionResetError('Analysis feed has closed the connection.')
+            self.feed_socket.sendall(payload)
+        except OSError as e:
+            logger.warning(f'Analysis feed did not accept {len(records)} record(s): {str(e)}.')
+            self.metrics['sendFailures'] = self.metrics['sendFailures'] + 1
+            self._disconnect()
+            return False
+
+        self.metrics['sendTime'] = self.metrics['sendTime'] + timeit.default_timer() - t_before
+        self.metrics['recordsSent'] = self.metrics['recordsSent'] + len(records)
+        self.metrics['bytesSent'] = self.metrics['bytesSent'] + len(payload)
+        self.metrics['batchesSent'] = self.metrics['batchesSent'] + 1
+        return True
+
+    def _journal(self, records):
+        with open(self.journal_filename, 'a') as journal_fp:
+            journal_fp.write(''.join(json.dumps(r) + '\n' for r in records))
+        self.journaled_records = self.journaled_records + len(records)
+        self.metrics['recordsJournaled'] = self.metrics['recordsJournaled'] + len(records)
+        logger.info(f'{len(records)} record(s) spooled to {self.journal_filename}.')
+
+    def _replay(self):
+        with open(self.journal_filename) as journal_fp:
+            journal_records = self.key_records([json.loads(line) for line in journal_fp if line.strip() != ''])
+
+        logger.info(f'Replaying {len(journal_records)} journaled record(s) to the analysis feed.')
+        for i in range(0, len(journal_records), self.REPLAY_BATCH_SIZE):
+            if not self._send(journal_records[i:i + self.REPLAY_BATCH_SIZE]):
+                # Keep whatever we could not send, and try again on our next connection.
+                temporary_filename = self.journal_filename + '.tmp'
+                with open(temporary_filename, 'w') as journal_fp:
+                    journal_fp.write(''.join(json.dumps(r) + '\n' for r in journal_records[i:]))
+                os.replace(temporary_filename, self.journal_filename)
+                self.journaled_records = len(journal_records) - i
+                self.metrics['recordsReplayed'] = self.metrics['recordsReplayed'] + i
+                return False
+
+        os.remove(self.journal_filename)
+        self.journaled_records = 0
+        self.metrics['recordsReplayed'] = self.metrics['recordsReplayed'] + len(journal_records)
+        return True
+
+    def write(self, records):
+        """ Sends the given records to the feed. If the feed is down, the records are journaled instead. """
+        if len(records) == 0:
+            return
+        records = self.key_records(records)
+
+        # Our journal must be drained first, so the feed receives records in the order they were logged.
+        is_sent = self._connect() and (self.journaled_records == 0 or self._replay()) and self._send(records)
+        if not is_sent:
+            self._journal(records)
+            return
+
+        # Lag is the time between a record being logged and it reaching the feed.
+        now = datetime.datetime.now()
+        for r in records:
+            if 'logTime' in r:
+                lag = (now - datetime.datetime.fromisoformat(r['logTime'])).total_seconds()
+                self.metrics['maxLag'] = max(self.metrics['maxLag'], lag)
+
+    def close(self):
+        # Give our journal one last chance to reach the feed.
+        if self.journaled_records > 0:
+            self.next_connect_time = 0.0
+            if self._connect():
+                self._replay()
+        if self.journaled_records > 0:
+            logger.warning(f'{self.journaled_records} record(s) could not be sent to the analysis feed. '
+                           f'Replay these later with: python3 -m src.feed {self.journal_filename}')
+        self._disconnect()
+
+        self.metrics['recordsPending'] = self.journaled_records
+        self.metrics['throughput'] = self.metrics['recordsSent'] / self.metrics['sendTime'] \
+            if self.metrics['sendTime'] > 0 else None
+        if self.metrics_filename is not None:
+            with open(self.metrics_filename, 'w') as metrics_fp:
+                json.dump(self.metrics, metrics_fp)
+        logger.info(f'Analysis feed metrics: {self.metrics}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a feed journal to the analysis cluster.')
+    parser.add_argument('journal', type=str, help='Journal file (feed-journal.json) to replay.')
+    parser.add_argument('--config', type=str, default='config/logging.json', help='Path to the logging config.')
+    parser_args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    with open(parser_args.config) as config_file:
+        analysis_cluster = json.load(config_file)['analysisCluster']
+    feed_writer = AnalysisFeedWriter(analysis_cluster['clusterController']['address'],
+                                     analysis_cluster['feedSocketPort'], os.path.dirname(parser_args.journal),
+                                     is_recording_metrics=False)
+    feed_writer.close()
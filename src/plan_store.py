@@ -0,0 +1,72 @@
+import functools
+import argparse
+import threading
+import hashlib
+import logging
+import json
+import sys
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class PlanStore:
+    """ Content-addressed store for query plans, so each distinct plan is only recorded once per run. """
+
+    @staticmethod
+    def content_hash(plans):
+        return hashlib.sha256(json.dumps(plans, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def __init__(self, store_dir=None):
+        self.store_dir = store_dir
+        self.seen_hashes = set()
+        self.store_lock = threading.Lock()
+        if self.store_dir is not None:
+            os.makedirs(self.store_dir, exist_ok=True)
+
+    def _plan_filename(self, plan_hash):
+        return os.path.join(self.store_dir, plan_hash + '.json')
+
+    def put(self, plans):
+        """ Returns the hash of the given plans, and whether this is the first time we have seen them. """
+        plan_hash = self.content_hash(plans)
+        with self.store_lock:
+            if plan_hash in self.seen_hashes:
+                return plan_hash, False
+            self.seen_hashes.add(plan_hash)
+
+        # Write to a temporary file first, so a reader never sees a partial plan.
+        if self.store_dir is not None and not os.path.exists(self._plan_filename(plan_hash)):
+            temporary_filename = self._plan_filename(plan_hash) + '.tmp'
+            with open(temporary_filename, 'w') as plan_fp:
+                json.dump(plans, plan_fp)
+            os.replace(temporary_filename, self._plan_filename(plan_hash))
+            logger.debug(f'Stored new plan {plan_hash}.')
+
+        return plan_hash, True
+
+    @functools.lru_cache(maxsize=256)
+    def get(self, plan_hash):
+        with open(self._plan_filename(plan_hash)) as plan_fp:
+            return json.load(plan_fp)
+
+    def rehydrate(self, results_fp):
+        """ Yields each record of a results file, with its plans restored from the store. """
+        for line in results_fp:
+            if line.strip() == '':
+                continue
+            results = json.loads(line)
+            if 'planHash' in results and results['planHash'] is not None and 'plans' not in results:
+                results['plans'] = self.get(results['planHash'])
+            yield results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rehydrate the plans of a results directory, as JSON lines.')
+    parser.add_argument('resultsDir', type=str, help='Results directory of the benchmark run.')
+    parser_args = parser.parse_args()
+
+    plan_store = PlanStore(os.path.join(parser_args.resultsDir, 'plans'))
+    with open(os.path.join(parser_args.resultsDir, 'results.json')) as results_file:
+        for rehydrated_results in plan_store.rehydrate(results_file):
+            sys.stdout.write(json.dumps(rehydrated_results) + '\n')
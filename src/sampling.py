@@ -0,0 +1,103 @@
+import statistics
+import logging
+import timeit
+import math
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveSampler:
+    """ Decides how many times to repeat a measurement, by the relative confidence interval of its median. """
+    WARMUP_BATCH_SIZE = 5
+    Z_SCORES = {0.90: 1.645, 0.95: 1.960, 0.99: 2.576}
+
+    def __init__(self, target_relative_ci=0.05, confidence=0.95, min_samples=30, max_samples=1000, time_budget=None,
+                 label=None):
+        self.target_relative_ci = target_relative_ci
+        self.z_score = self.Z_SCORES[confidence]
+        self.confidence = confidence
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.time_budget = time_budget
+        self.label = label
+
+        self.samples = []
+        self.number_of_failures = 0
+        self.stop_reason = None
+        self.start_time = timeit.default_timer()
+
+    @property
+    def number_of_samples(self):
+        return len(self.samples)
+
+    def warmup_samples(self):
+        """ MSER-5: the truncation point (in the first half) that minimizes the standard error of what remains. """
+        batch_means = [statistics.mean(self.samples[i:i + self.WARMUP_BATCH_SIZE])
+                       for i in range(0, len(self.samples) - self.WARMUP_BATCH_SIZE + 1, self.WARMUP_BATCH_SIZE)]
+        if len(batch_means) < 4:
+            return 0
+
+        best_truncation, best_statistic = 0, math.inf
+        for d in range(0, len(batch_means) // 2):
+            remaining = batch_means[d:]
+            mser_statistic = statistics.pvariance(remaining) / len(remaining)
+            if mser_statistic < best_statistic:
+                best_truncation, best_statistic = d, mser_statistic
+        return best_truncation * self.WARMUP_BATCH_SIZE
+
+    def median_interval(self):
+        """ Distribution-free confidence interval of our median (from order statistics), without our warm-up. """
+        steady_samples = sorted(self.samples[self.warmup_samples():])
+        n = len(steady_samples)
+        if n == 0:
+            return None, None, None
+        lower_rank = max(math.floor(n / 2 - self.z_score * math.sqrt(n) / 2), 0)
+        upper_rank = min(math.ceil(n / 2 + self.z_score * math.sqrt(n) / 2), n - 1)
+        return statistics.median(steady_samples), steady_samples[lower_rank], steady_samples[upper_rank]
+
+    def relative_ci(self):
+        median, lower, upper = self.median_interval()
+        if median is None or median == 0:
+            return None
+        return (upper - lower) / median
+
+    def add(self, sample):
+        # A failed (e.g. timed-out) measurement has no sample, but it still counts as an attempt toward max_samples.
+        if sample is not None:
+            self.samples.append(sample)
+        else:
+            self.number_of_failures = self.number_of_failures + 1
+
+    def stop(self, stop_reason):
+        if self.stop_reason is None:
+            self.stop_reason = stop_reason
+            logger.info(f'Stopped sampling {self.label or ""} after {self.number_of_samples} sample(s): {stop_reason}.')
+
+    def should_continue(self):
+        if self.stop_reason is not None:
+            return False
+        elif self.number_of_samples + self.number_of_failures >= self.max_samples:
+            self.stop('maxSamples')
+        elif self.time_budget is not None and timeit.default_timer() - self.start_time > self.time_budget:
+            self.stop('timeBudget')
+        elif self.number_of_samples >= self.min_samples:
+            relative_ci = self.relative_ci()
+            if relative_ci is not None and relative_ci <= self.target_relative_ci:
+                self.stop('converged')
+        return self.stop_reason is None
+
+    def summary(self):
+        median, lower, upper = self.median_interval()
+        return {
+            'label': self.label,
+            'stopReason': self.stop_reason,
+            'numberOfSamples': self.number_of_samples,
+            'numberOfFailures': self.number_of_failures,
+            'warmupSamples': self.warmup_samples(),
+            'median': median,
+            'medianInterval': [lower, upper],
+            'relativeCI': self.relative_ci(),
+            'targetRelativeCI': self.target_relative_ci,
+            'confidence': self.confidence,
+            'samplingTime': timeit.default_timer() - self.start_time
+        }
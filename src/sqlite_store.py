@@ -0,0 +1,91 @@
+import logging
+import sqlite3
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteResultsStore:
+    """ Local results backend, so results can be queried across runs without the analysis cluster. """
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS Executions (
+            executionID     TEXT PRIMARY KEY,
+            suite           TEXT,
+            workingSystem   TEXT,
+            resultsDir      TEXT,
+            startTime       TEXT,
+            config          TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Results (
+            resultID        INTEGER PRIMARY KEY,
+            executionID     TEXT NOT NULL REFERENCES Executions (executionID),
+            suite           TEXT,
+            dataverse       TEXT,
+            queryNumber     INTEGER,
+            runNumber       INTEGER,
+            logTime         TEXT,
+            status          TEXT,
+            clientTime      REAL,
+            planHash        TEXT,
+            metrics         TEXT,
+            parameters      TEXT,
+            record          TEXT
+        )
+        """,
+        'CREATE INDEX IF NOT EXISTS resultsExecutionIDIdx ON Results (executionID)',
+        'CREATE INDEX IF NOT EXISTS resultsSuiteIdx ON Results (suite)',
+        'CREATE INDEX IF NOT EXISTS resultsDataverseIdx ON Results (dataverse)',
+        'CREATE INDEX IF NOT EXISTS resultsQueryNumberIdx ON Results (queryNumber)',
+        'CREATE INDEX IF NOT EXISTS resultsRunNumberIdx ON Results (runNumber)'
+    ]
+
+    # These fields have their own columns, so they are not repeated in the record column.
+    COLUMN_FIELDS = ['executionID', 'dataverse', 'queryNumber', 'runNumber', 'logTime', 'status', 'clientTime',
+                     'planHash', 'metrics', 'parameters']
+
+    def __init__(self, database_filename, execution_id, suite, working_system, results_dir, config):
+        self.database_filename = database_filename
+        self.execution = (execution_id, suite, working_system, results_dir, None, json.dumps(config, default=str))
+        self.suite = suite
+        self.connection = None
+
+    def _connect(self):
+        # Our connection is opened lazily, so it belongs to the thread that writes our results.
+        os.makedirs(os.path.dirname(os.path.abspath(self.database_filename)), exist_ok=True)
+        self.connection = sqlite3.connect(self.database_filename, timeout=60)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        with self.connection:
+            [self.connection.execute(s) for s in self.SCHEMA]
+        logger.info(f'Results will also be stored in the SQLite database: {self.database_filename}')
+
+    def _to_row(self, results):
+        def _json_column(field_name):
+            return json.dumps(results[field_name]) if results.get(field_name) is not None else None
+
+        return (
+            results.get('executionID', self.execution[0]), self.suite, results.get('dataverse'),
+            results.get('queryNumber'), results.get('runNumber'), results.get('logTime'), results.get('status'),
+            results.get('clientTime'), results.get('planHash'), _json_column('metrics'), _json_column('parameters'),
+            json.dumps({k: v for k, v in results.items() if k not in self.COLUMN_FIELDS})
+        )
+
+    def write(self, records):
+        """ Inserts the given records in one transaction. """
+        if self.connection is None:
+            self._connect()
+        with self.connection:
+            self.connection.execute('INSERT OR IGNORE INTO Executions VALUES (?, ?, ?, ?, ?, ?)',
+                                    self.execution[:4] + (records[0].get('logTime'),) + self.execution[5:])
+            self.connection.executemany('INSERT INTO Results (executionID, suite, dataverse, queryNumber, runNumber, '
+                                        'logTime, status, clientTime, planHash, metrics, parameters, record) '
+                                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                        [self._to_row(r) for r in records])
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
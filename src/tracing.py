@@ -0,0 +1,78 @@
+import contextlib
+import threading
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    """ Records nested spans to a file in the Chrome trace-event format (viewable in chrome://tracing or Perfetto). """
+
+    def __init__(self, trace_filename=None):
+        self.trace_filename = trace_filename
+        self.trace_fp = None
+        self.trace_lock = threading.Lock()
+        self.named_threads = set()
+        self.process_id = os.getpid()
+        self.start_time = time.monotonic_ns()
+        if self.trace_filename is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.trace_filename)), exist_ok=True)
+            self.trace_fp = open(self.trace_filename, 'w')
+
+            # The closing bracket is optional in this format, so a run that dies mid-way still leaves a usable trace.
+            self.trace_fp.write('[\n')
+            logger.info(f'Tracing spans to: {self.trace_filename}')
+
+    @property
+    def is_enabled(self):
+        return self.trace_fp is not None
+
+    def _timestamp(self):
+        # Microseconds since our tracer started, from a monotonic clock.
+        return (time.monotonic_ns() - self.start_time) / 1000.0
+
+    def _write_event(self, event):
+        with self.trace_lock:
+            if self.trace_fp is None:
+                return  # Our tracer was closed while this span was still open.
+            thread_id = event['tid']
+            if thread_id not in self.named_threads:
+                self.named_threads.add(thread_id)
+                self.trace_fp.write(json.dumps({'name': 'thread_name', 'ph': 'M', 'pid': self.process_id,
+                                                'tid': thread_id,
+                                                'args': {'name': threading.current_thread().name}}) + ',\n')
+            self.trace_fp.write(json.dumps(event, default=str) + ',\n')
+
+    @contextlib.contextmanager
+    def span(self, name, category='benchmark', **args):
+        """ Times the enclosed block. Spans on the same thread nest by time, so no parent needs to be given. """
+        if not self.is_enabled:
+            yield args
+            return
+
+        t_begin = self._timestamp()
+        try:
+            yield args
+        finally:
+            self._write_event({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': t_begin,
+                'dur': self._timestamp() - t_begin,
+                'pid': self.process_id,
+                'tid': threading.get_ident(),
+                'args': args
+            })
+
+    def close(self):
+        if not self.is_enabled:
+            return
+        with self.trace_lock:
+            self.trace_fp.write(json.dumps({'name': 'process_name', 'ph': 'M', 'pid': self.process_id,
+                                            'args': {'name': 'ilima'}}) + '\n]\n')
+            self.trace_fp.close()
+            self.trace_fp = None
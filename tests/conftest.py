@@ -0,0 +1,127 @@
+import http.server
+import threading
+import shutil
+import json
+import sys
+import os
+import urllib.parse
+
+import pytest
+
+# Our suites read config/ (and log to out/) relative to the repository root.
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(REPOSITORY_ROOT)
+os.makedirs('out', exist_ok=True)
+sys.path.insert(0, REPOSITORY_ROOT)
+
+
+class MockAsterixDB:
+    """ A stand-in for an AsterixDB cluster controller: its query service, cluster state and running requests. """
+
+    def __init__(self):
+        self.statements, self.client_addresses, self.cancelled_requests = [], set(), []
+        self.respond_f = self.default_response
+        mock = self
+
+        class _RequestHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body):
+                response_content = json.dumps(body).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response_content)))
+                self.end_headers()
+                self.wfile.write(response_content)
+
+            def do_GET(self):
+                if self.path.startswith('/admin/cluster'):
+                    self._send({'state': 'ACTIVE', 'ncs': [{'node_id': 'nc1', 'state': 'ACTIVE'}]})
+                else:
+                    self._send([])
+
+            def do_POST(self):
+                request_content = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+                query_parameters = {k: v[0] for k, v in urllib.parse.parse_qs(request_content).items()}
+                mock.statements.append(query_parameters.get('statement', ''))
+                mock.client_addresses.add(self.client_address)
+                self._send(mock.respond_f(query_parameters.get('statement', '')))
+
+            def do_DELETE(self):
+                query_parameters = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                mock.cancelled_requests.append(query_parameters.get('client_context_id', [''])[0])
+                self._send({})
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _RequestHandler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def default_response(statement):
+        return {'status': 'success', 'results': [{'x': 1}],
+                'metrics': {'elapsedTime': '1.5ms', 'executionTime': '1.2ms', 'resultCount': 1, 'resultSize': 10}}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def asterixdb():
+    mock = MockAsterixDB()
+    yield mock
+    mock.close()
+
+
+@pytest.fixture
+def benchmark_config(asterixdb, tmp_path):
+    return {
+        'startCommand': 'tools/no_command.sh',
+        'stopCommand': 'tools/no_command.sh',
+        'postCommand': 'tools/no_command.sh',
+        'commandTimeout': 60,
+        'clusterController': {'address': '127.0.0.1', 'port': asterixdb.port},
+        'allNodesInCluster': ['nc1'],
+        'isLeanResponse': False,
+        'httpSession': {'poolSize': 4, 'isKeepAlive': True},
+        'adaptiveSampling': {'isEnabled': False},
+        'baseline': {'storeDir': str(tmp_path / 'baselines')}
+    }
+
+
+@pytest.fixture
+def config_file(benchmark_config, tmp_path):
+    """ An asterixdb.json that points at our mock cluster, for suites that read their own command line. """
+    config_filename = tmp_path / 'asterixdb.json'
+    config_filename.write_text(json.dumps({'benchmark': benchmark_config, 'package': 'resources/asterixdb'}))
+    return str(config_filename)
+
+
+@pytest.fixture(autouse=True)
+def results_config(monkeypatch):
+    """ Results go to a file only (never to the analysis cluster). """
+    import src.executor
+    monkeypatch.setitem(src.executor.logging_json, 'results', {
+        'isSocket': False, 'isFile': True, 'isConsole': False, 'isPlanStore': False, 'isTrace': False,
+        'isSQLite': False, 'sinkQueueSize': 1000, 'sinkBatchSize': 10
+    })
+
+
+@pytest.fixture
+def results_dirs():
+    """ Results directories that a test creates under out/, removed afterwards. """
+    created_dirs = []
+    yield created_dirs
+    [shutil.rmtree(d, ignore_errors=True) for d in created_dirs]
+
+
+@pytest.fixture
+def read_results():
+    def _read_results(results_dir):
+        with open(os.path.join(results_dir, 'results.json')) as results_fp:
+            return [json.loads(line) for line in results_fp if line.strip() != '']
+    return _read_results
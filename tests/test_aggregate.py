@@ -0,0 +1,58 @@
+import subprocess
+import random
+import sys
+
+import pytest
+
+from src.asterixdb.aggregate import LatencySketch
+from src.asterixdb.duration import parse_duration
+
+
+@pytest.mark.parametrize('duration, seconds', [
+    ('12.3ms', 0.0123), ('1m2.5s', 62.5), ('250us', 250e-6), ('250µs', 250e-6), ('7ns', 7e-9),
+    ('1h', 3600.0), (3, 3.0), (0.25, 0.25)
+])
+def test_parse_duration(duration, seconds):
+    assert parse_duration(duration) == pytest.approx(seconds)
+
+
+def test_parse_duration_without_units():
+    assert parse_duration('fast') is None
+
+
+def test_aggregate_does_not_import_executor():
+    # Aggregating results must not need our config/ or attach a handler to out/ilima.log.
+    imported_modules = subprocess.run([sys.executable, '-c', 'import sys, src.asterixdb.aggregate; '
+                                                             'print(sorted(sys.modules))'],
+                                      capture_output=True, text=True, check=True).stdout
+    assert "'src.executor'" not in imported_modules
+    assert "'src.asterixdb.executor'" not in imported_modules
+
+
+def test_latency_sketch_quantiles_within_relative_error():
+    random_generator = random.Random(0)
+    values = sorted(random_generator.lognormvariate(-5, 1) for _ in range(10000))
+    sketch = LatencySketch()
+    [sketch.add(v) for v in values]
+
+    assert sketch.count == len(values)
+    assert sketch.total == pytest.approx(sum(values))
+    for q in [0.01, 0.5, 0.9, 0.99]:
+        exact_value = values[max(int(q * len(values) + 0.999999), 1) - 1]
+        assert sketch.quantile(q) == pytest.approx(exact_value, rel=LatencySketch.RELATIVE_ERROR)
+
+
+def test_latency_sketch_merge():
+    left_sketch, right_sketch, whole_sketch = LatencySketch(), LatencySketch(), LatencySketch()
+    for i in range(1, 1001):
+        (left_sketch if i % 2 == 0 else right_sketch).add(i / 1000)
+        whole_sketch.add(i / 1000)
+
+    merged_sketch = left_sketch.merge(right_sketch)
+    assert merged_sketch.count == whole_sketch.count
+    assert merged_sketch.bucket_counts == whole_sketch.bucket_counts
+    assert merged_sketch.quantile(0.5) == whole_sketch.quantile(0.5)
+
+
+def test_empty_latency_sketch():
+    assert LatencySketch().quantile(0.5) is None
@@ -0,0 +1,92 @@
+import time
+import sys
+
+from src.asterixdb.tpc_ch.analytical_query._basic import BasicAnalyticalQuery
+
+
+def test_samplers_start_when_their_query_first_runs(config_file, monkeypatch, results_dirs):
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = BasicAnalyticalQuery()
+    results_dirs.append(suite.config['resultsDir'])
+    suite.config['num_queries'] = 2
+
+    events, adaptive_sampler = [], suite.adaptive_sampler
+    monkeypatch.setattr(suite, 'adaptive_sampler',
+                        lambda *args, **kwargs: events.append(('sampler', kwargs['label'])) or
+                        adaptive_sampler(*args, **kwargs))
+
+    def _execute_f(query_f, query_number, run_number, **kwargs):
+        events.append(('query', f'query_{query_number}'))
+        return 1.0
+
+    suite._execute_until_stable(_execute_f)
+    suite.close_outputs()
+
+    # Each time budget starts just before its own query, not with the first query of the suite.
+    first_run_events = events[:2 * len(BasicAnalyticalQuery.QUERY_NUMBERS)]
+    assert first_run_events == [e for n in BasicAnalyticalQuery.QUERY_NUMBERS
+                                for e in [('sampler', f'query_{n}'), ('query', f'query_{n}')]]
+    assert events[len(first_run_events):] == [('query', f'query_{n}') for n in BasicAnalyticalQuery.QUERY_NUMBERS]
+
+
+def test_resume_counts_completed_runs(config_file, monkeypatch, results_dirs, read_results):
+    monkeypatch.setattr(BasicAnalyticalQuery, 'QUERY_NUMBERS', [1])
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = BasicAnalyticalQuery()
+    results_dirs.append(suite.config['resultsDir'])
+
+    # We are interrupted after our first two runs.
+    date_pair = suite.config['tpc_ch']['parameters']['dateRange'][0]
+    for run_number in [1, 2]:
+        suite._execute_and_log(suite.query_1, 1, run_number, date_1=date_pair['date1'], date_2=date_pair['date2'])
+    suite.close_outputs()
+
+    # Our completed runs still count toward num_queries, so we only execute the runs that remain.
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file, '--resume', suite.config['resultsDir']])
+    resumed_suite = BasicAnalyticalQuery()
+    resumed_suite.config['num_queries'] = 4
+    resumed_suite._execute_until_stable(resumed_suite._execute_and_log)
+    resumed_suite.close_outputs()
+
+    records = read_results(suite.config['resultsDir'])
+    assert [r['runNumber'] for r in records if r.get('queryNumber') == 1] == [1, 2, 3, 4]
+    assert [r['sampling']['numberOfSamples'] for r in records if 'sampling' in r] == [4]
+
+
+def test_failed_runs_count_as_attempts(config_file, monkeypatch, results_dirs, read_results):
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = BasicAnalyticalQuery()
+    results_dirs.append(suite.config['resultsDir'])
+    suite.config['num_queries'] = 2
+
+    # A query that always times out is attempted num_queries times, not MAXIMUM_RUNS_FACTOR times as often.
+    run_numbers = []
+    suite._execute_until_stable(lambda query_f, query_number, run_number, **kwargs: run_numbers.append(run_number))
+    suite.close_outputs()
+
+    assert run_numbers == [r for r in [1, 2] for _ in BasicAnalyticalQuery.QUERY_NUMBERS]
+    sampling_records = [r['sampling'] for r in read_results(suite.config['resultsDir']) if 'sampling' in r]
+    assert all(s['numberOfFailures'] == 2 and s['stopReason'] == 'maxSamples' for s in sampling_records)
+
+
+def test_timed_out_query_is_cancelled_and_logged(asterixdb, config_file, monkeypatch, results_dirs, read_results):
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = BasicAnalyticalQuery()
+    results_dirs.append(suite.config['resultsDir'])
+    asterixdb.respond_f = lambda statement: time.sleep(0.5) or asterixdb.default_response(statement)
+
+    date_pair = suite.config['tpc_ch']['parameters']['dateRange'][0]
+    latency = suite._execute_and_log(suite.query_1, 1, 1, timeout=0.1, date_1=date_pair['date1'],
+                                     date_2=date_pair['date2'])
+    suite.close_outputs()
+
+    # Our timed-out run is not completed (i.e. it runs again on resume), but its cancellation is still recorded.
+    assert latency is None
+    assert not suite.checkpoint.is_completed('query', 1, 1)
+    records = [r for r in read_results(suite.config['resultsDir']) if r.get('queryNumber') == 1]
+    assert len(records) == 1 and records[0]['runNumber'] == 1
+    assert records[0]['parameters'] == {'date_1': date_pair['date1'], 'date_2': date_pair['date2']}
+    assert records[0]['status'].startswith('Timeout')
+    assert records[0]['cancellation']['isCancelled']
+    assert records[0]['cancellation']['cancelLatency'] >= 0
+    assert asterixdb.cancelled_requests == [records[0]['clientContextID']]
@@ -0,0 +1,79 @@
+import concurrent.futures
+import time
+import sys
+
+from src.asterixdb.executor import AbstractAsterixDBRunnable
+from src.asterixdb.shopalot.load_basic_dataset._users import LoadBasicUsersDataset
+
+
+def test_connection_timings_under_concurrency(asterixdb, config_file, monkeypatch, results_dirs):
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'sarr', '--config', config_file])
+    suite = LoadBasicUsersDataset()
+    results_dirs.append(suite.config['resultsDir'])
+    asterixdb.client_addresses.clear()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda i: suite._execute_sqlpp(f'SELECT VALUE {i};'), range(64)))
+    suite.close_outputs()
+
+    # Each response describes its own connection: only the first request on a socket pays (and reports) a connect.
+    for response_json in responses:
+        connect_time = response_json['clientBreakdown']['connectTime']
+        assert (connect_time == 0.0) == response_json['isConnectionReused']
+    assert sum(1 for r in responses if not r['isConnectionReused']) == len(asterixdb.client_addresses)
+
+
+def test_split_statements():
+    split_statements = AbstractAsterixDBRunnable.split_statements
+    assert split_statements('USE TPC_CH; SELECT 1;\n\n') == ['USE TPC_CH;', 'SELECT 1;']
+    assert split_statements('SELECT 1') == ['SELECT 1']
+    assert split_statements(' ;; \n ; ') == []
+
+    # Semicolons in literals, quoted identifiers and comments do not end a statement.
+    assert split_statements("SELECT 'a;b', \"c\\\";d\" FROM `x;y`; SELECT 2;") == \
+        ["SELECT 'a;b', \"c\\\";d\" FROM `x;y`;", 'SELECT 2;']
+    assert split_statements('SELECT 1; -- a; comment\n// another; one\nSELECT 2;') == ['SELECT 1;', 'SELECT 2;']
+    assert split_statements('SELECT 1 /* a; b */ + 1; SELECT 2;') == ['SELECT 1 /* a; b */ + 1;', 'SELECT 2;']
+    assert split_statements('FROM A, B WHERE A.x /*+ indexnl */ = B.x SELECT 1;') == \
+        ['FROM A, B WHERE A.x /*+ indexnl */ = B.x SELECT 1;']
+
+
+def test_execute_script(asterixdb, config_file, monkeypatch, results_dirs, read_results):
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'sarr', '--config', config_file])
+    suite = LoadBasicUsersDataset()
+    results_dirs.append(suite.config['resultsDir'])
+    asterixdb.statements.clear()
+    results = suite.execute_script("""
+        USE ShopALot.SARR;
+        SET `compiler.parallelism` "4";
+        CREATE DATASET Users (UsersType) PRIMARY KEY user_id;
+        LOAD DATASET Users USING localfs (("path"="localhost:///a.json"), ("format"="json"));
+    """)
+    suite.close_outputs()
+
+    # Each statement is its own request, so our USE + SET prefix every statement after them.
+    assert len(asterixdb.statements) == 2
+    assert all(s.startswith('USE ShopALot.SARR; SET `compiler.parallelism` "4";') for s in asterixdb.statements)
+    assert results['status'] == 'success'
+    assert results['statementTimes'] == [0.0015, 0.0015]
+    assert results['metrics']['elapsedTime'] == '0.003s'
+
+    statement_records = [r for r in read_results(suite.config['resultsDir']) if 'script' in r]
+    assert [r['script']['statementNumber'] for r in statement_records] == [1, 2]
+    assert len({r['script']['scriptID'] for r in statement_records}) == 1
+
+
+def test_client_time_excludes_trace_writes(config_file, monkeypatch, results_dirs):
+    import src.executor
+    monkeypatch.setitem(src.executor.logging_json['results'], 'isTrace', True)
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'sarr', '--config', config_file])
+    suite = LoadBasicUsersDataset()
+    results_dirs.append(suite.config['resultsDir'])
+
+    # A slow trace write must not show up in the time we measure for our statement.
+    write_event = suite.tracer._write_event
+    monkeypatch.setattr(suite.tracer, '_write_event', lambda event: time.sleep(0.25) or write_event(event))
+    response_json = suite._execute_sqlpp('SELECT VALUE 1;')
+    suite.close_outputs()
+
+    assert response_json['clientTime'] < 0.25
+    assert response_json['clientBreakdown']['decodeTime'] < 0.25
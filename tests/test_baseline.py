@@ -0,0 +1,53 @@
+import copy
+import json
+
+from src.asterixdb.baseline import BaselineStore
+
+CONFIG = {'benchmark': {'clusterController': {'address': '127.0.0.1', 'port': 19002}, 'allNodesInCluster': ['nc1'],
+                        'startCommand': 'tools/start.sh', 'isLeanResponse': False,
+                        'httpSession': {'poolSize': 4, 'isKeepAlive': True}, 'adaptiveSampling': {'isEnabled': False}},
+          'package': 'resources/asterixdb'}
+
+
+def test_config_hash_only_depends_on_cluster_config():
+    other_config = copy.deepcopy(CONFIG)
+    other_config['benchmark']['adaptiveSampling'] = {'isEnabled': True}
+    assert BaselineStore.config_hash(other_config) == BaselineStore.config_hash(CONFIG)
+
+    other_config['benchmark']['allNodesInCluster'] = ['nc1', 'nc2']
+    assert BaselineStore.config_hash(other_config) != BaselineStore.config_hash(CONFIG)
+
+
+def test_statement_kind():
+    assert BaselineStore.statement_kind('USE TPC_CH; SELECT VALUE 1;') == 'select'
+    assert BaselineStore.statement_kind('(FROM Orders O SELECT O)') == 'select'
+    assert BaselineStore.statement_kind('UPSERT INTO X SELECT VALUE B FROM Y B;') == 'upsert'
+    assert BaselineStore.statement_kind('LOAD DATASET X USING localfs (("path"="a"));') == 'load'
+    assert BaselineStore.statement_kind('CREATE DATASET X (T) PRIMARY KEY id;') is None
+    assert BaselineStore.statement_kind(' ; ') is None
+
+
+def test_put_and_overhead(tmp_path):
+    baseline_store = BaselineStore(str(tmp_path))
+    config_hash = BaselineStore.config_hash(CONFIG)
+    assert baseline_store.overhead(config_hash, 'select', 'elapsedTime') is None
+
+    assert baseline_store.put(CONFIG, 'select', {'elapsedTime': [0.003, 0.001, 0.002], 'clientTime': []},
+                              'execution-1') == config_hash
+    assert baseline_store.overhead(config_hash, 'select', 'elapsedTime') == 0.002
+    assert baseline_store.overhead(config_hash, 'select', 'clientTime') is None
+    assert baseline_store.overhead(config_hash, 'insert', 'elapsedTime') is None
+
+    # A new store (e.g. a later run) reads the same baseline from disk.
+    with open(tmp_path / f'{config_hash}.json') as baseline_fp:
+        assert json.load(baseline_fp)['statements']['select']['metrics']['elapsedTime']['samples'] == \
+            [0.001, 0.002, 0.003]
+    assert BaselineStore(str(tmp_path)).overhead(config_hash, 'select', 'elapsedTime') == 0.002
+
+    # Newer samples of one kind replace the older ones, and leave our other kinds alone.
+    baseline_store.put(CONFIG, 'insert', {'elapsedTime': [0.010]}, 'execution-2')
+    baseline_store.put(CONFIG, 'select', {'elapsedTime': [0.004]}, 'execution-2')
+    reread_store = BaselineStore(str(tmp_path))
+    assert reread_store.overhead(config_hash, 'select', 'elapsedTime') == 0.004
+    assert reread_store.overhead(config_hash, 'insert', 'elapsedTime') == 0.010
+    assert reread_store.get(config_hash, 'select')['executionID'] == 'execution-2'
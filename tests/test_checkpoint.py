@@ -0,0 +1,91 @@
+import json
+import sys
+import os
+
+import pytest
+
+from src.checkpoint import Checkpoint
+from src.asterixdb.shopalot.load_basic_dataset._users import LoadBasicUsersDataset
+from src.asterixdb.tpc_ch.analytical_query._basic import BasicAnalyticalQuery
+
+
+def test_checkpoint_resume(tmp_path):
+    checkpoint_filename = str(tmp_path / 'run' / 'checkpoint.json')
+    checkpoint = Checkpoint(checkpoint_filename, 'execution-1')
+    checkpoint.complete('query', 1, 1, result=0.25)
+    checkpoint.complete('upsert', 0.5, 2, upsertSeed=7)
+    checkpoint.save_state(deleteChunkIDs=[3, 4])
+
+    # A resumed run continues under the execution ID of the run it resumes.
+    resumed_checkpoint = Checkpoint(checkpoint_filename, 'execution-2')
+    assert resumed_checkpoint.execution_id == 'execution-1'
+    assert resumed_checkpoint.is_completed('query', 1, 1)
+    assert resumed_checkpoint.is_completed('upsert', 0.5, 2)
+    assert not resumed_checkpoint.is_completed('query', 1, 2)
+    assert resumed_checkpoint.unit_result('query', 1, 1) == 0.25
+    assert resumed_checkpoint.unit_result('upsert', 0.5, 2) is None
+    assert resumed_checkpoint.state == {'upsertSeed': 7, 'deleteChunkIDs': [3, 4]}
+
+
+def test_checkpoint_ignores_partial_entry(tmp_path):
+    checkpoint_filename = str(tmp_path / 'checkpoint.json')
+    checkpoint = Checkpoint(checkpoint_filename, 'execution-1')
+    checkpoint.complete('insert', 1)
+    with open(checkpoint_filename, 'a') as checkpoint_fp:
+        checkpoint_fp.write(json.dumps({'unit': ['insert', 2]})[:-5])
+
+    resumed_checkpoint = Checkpoint(checkpoint_filename, 'execution-2')
+    assert resumed_checkpoint.is_completed('insert', 1)
+    assert not resumed_checkpoint.is_completed('insert', 2)
+
+
+def test_checkpoint_without_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    checkpoint = Checkpoint(None, 'execution-1')
+    checkpoint.complete('query', 1, 1, lastQuery=1)
+    assert checkpoint.is_completed('query', 1, 1)
+    assert checkpoint.state == {'lastQuery': 1}
+    assert os.listdir(tmp_path) == []
+
+
+def test_resume_only_on_resumable_suites(config_file, monkeypatch, results_dirs, capsys):
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'sarr', '--config', config_file, '--resume', 'out/old-run'])
+    with pytest.raises(SystemExit):
+        LoadBasicUsersDataset()
+    assert 'unrecognized arguments: --resume' in capsys.readouterr().err
+
+    # Our analytical queries skip their completed runs, so they can be resumed.
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = BasicAnalyticalQuery()
+    results_dirs.append(suite.config['resultsDir'])
+    suite.checkpoint.complete('query', 1, 1)
+    suite.close_outputs()
+
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file, '--resume', suite.config['resultsDir']])
+    resumed_suite = BasicAnalyticalQuery()
+    assert resumed_suite.execution_id == suite.execution_id
+    assert resumed_suite.checkpoint.is_completed('query', 1, 1)
+    resumed_suite.close_outputs()
+
+
+def test_complete_unit_after_its_records_are_written(config_file, monkeypatch, results_dirs, read_results):
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = BasicAnalyticalQuery()
+    results_dirs.append(suite.config['resultsDir'])
+
+    # Our sink writes in the background, so a checkpointed unit must not outrun the record it logged.
+    suite.log_results({'status': 'success', 'clientTime': 0.5, 'runNumber': 1, 'queryNumber': 1})
+    suite.complete_unit('query', 1, 1, result=0.5)
+    assert [r['runNumber'] for r in read_results(suite.config['resultsDir'])] == [1]
+    suite.close_outputs()
+
+
+def test_no_results_dir_without_file_output(config_file, monkeypatch, results_dirs):
+    import src.executor
+    monkeypatch.setitem(src.executor.logging_json['results'], 'isFile', False)
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = BasicAnalyticalQuery()
+    results_dirs.append(suite.config['resultsDir'])
+    suite.checkpoint.complete('query', 1, 1)
+    suite.close_outputs()
+    assert not os.path.exists(suite.config['resultsDir'])
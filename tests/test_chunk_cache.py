@@ -0,0 +1,27 @@
+from src.asterixdb.shopalot.insert_upsert_delete.executor import ChunkCache
+
+
+def test_fetch_or_generate(tmp_path):
+    chunk_cache, generated_chunks = ChunkCache(str(tmp_path), dataset='Orders', dataverse='atom'), []
+
+    def _generate_f():
+        generated_chunks.append('{"order_id": "é"}')
+        return generated_chunks[-1]
+
+    assert chunk_cache.fetch_or_generate(_generate_f, operation='insert', start=0, end=10) == '{"order_id": "é"}'
+    assert chunk_cache.fetch_or_generate(_generate_f, operation='insert', start=0, end=10) == '{"order_id": "é"}'
+    assert len(generated_chunks) == 1
+
+    # Another chunk (or another dataverse) has its own entry.
+    chunk_cache.fetch_or_generate(_generate_f, operation='insert', start=10, end=20)
+    ChunkCache(str(tmp_path), dataset='Orders', dataverse='sarr') \
+        .fetch_or_generate(_generate_f, operation='insert', start=0, end=10)
+    assert len(generated_chunks) == 3
+    assert not any(f.name.endswith('.tmp') for f in tmp_path.iterdir())
+
+
+def test_reference_time_is_pinned(tmp_path):
+    reference_time = ChunkCache(str(tmp_path), dataset='Orders', dataverse='atom').reference_time()
+    assert ChunkCache(str(tmp_path), dataset='Orders', dataverse='atom').reference_time() == reference_time
+    assert ChunkCache(str(tmp_path), dataset='Orders', dataverse='atom').derive_seed() == \
+        ChunkCache(str(tmp_path), dataset='Orders', dataverse='atom').derive_seed()
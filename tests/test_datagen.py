@@ -0,0 +1,78 @@
+import subprocess
+import datetime
+import sys
+
+import pytest
+
+from src.asterixdb.shopalot.datagen import DatagenAbstractFactoryProvider
+from src.asterixdb.shopalot.datagen import ShardedDatagenExecutor
+from src.asterixdb.shopalot.datagen import AbstractOrdersDatagen
+from src.asterixdb.shopalot.datagen import FeistelPermutation
+from src.asterixdb.shopalot.datagen import PrimaryKeyGeneratorFactory
+
+
+def test_shards_without_manifest_is_rejected():
+    datagen_process = subprocess.run([sys.executable, '-m', 'src.asterixdb.shopalot.datagen', 'user', '--shards', '4'],
+                                     capture_output=True, text=True)
+    assert datagen_process.returncode == 2
+    assert '--shards only applies with --manifest' in datagen_process.stderr
+
+
+def test_less_than_one_worker_is_rejected():
+    datagen_process = subprocess.run([sys.executable, '-m', 'src.asterixdb.shopalot.datagen', 'user', '--workers', '0'],
+                                     capture_output=True, text=True)
+    assert datagen_process.returncode == 2
+    assert '--workers must be at least 1' in datagen_process.stderr
+
+
+def _shopalot_config(data_path):
+    dataset_config = {'idRange': {'start': 0, 'end': 50}, 'chunkSize': 10}
+    for dataverse_key, prefix in [('atomDataverse', 'ATOM'), ('sarrDataverse', 'SARR')]:
+        dataset_config[dataverse_key] = {f'{k}Filename': str(data_path / f'{prefix}-Orders{k.capitalize()}.json')
+                                         for k in ['full', 'eighth']}
+    return {'dataPath': str(data_path), 'users': {'idRange': {'start': 0, 'end': 20}},
+            'stores': {'idRange': {'start': 0, 'end': 10}}, 'orders': dataset_config}
+
+
+def test_sharded_datagen_matches_serial_datagen(tmp_path):
+    (tmp_path / 'serial').mkdir()
+    (tmp_path / 'sharded').mkdir()
+    serial_config, sharded_config = _shopalot_config(tmp_path / 'serial'), _shopalot_config(tmp_path / 'sharded')
+    reference_time = datetime.datetime(2024, 5, 17, 12, 30)
+
+    datagen_factory = DatagenAbstractFactoryProvider.provide_disk_abstract_factory(AbstractOrdersDatagen, serial_config)
+    datagen_factory(reference_time=reference_time, **serial_config['orders']).invoke()
+    ShardedDatagenExecutor(AbstractOrdersDatagen, sharded_config, 'orders', 3).invoke(reference_time=reference_time)
+
+    # Orders depend on our reference time, so both must agree on it to produce the same records.
+    for dataverse_key in ShardedDatagenExecutor.DATAVERSE_KEYS:
+        for filename_key in ShardedDatagenExecutor.FILENAME_KEYS:
+            with open(serial_config['orders'][dataverse_key][filename_key], 'rb') as serial_fp, \
+                    open(sharded_config['orders'][dataverse_key][filename_key], 'rb') as sharded_fp:
+                serial_bytes = serial_fp.read()
+                assert len(serial_bytes) > 0 and serial_bytes == sharded_fp.read()
+    assert sorted(p.name for p in (tmp_path / 'sharded').iterdir()) == \
+        sorted(p.name for p in (tmp_path / 'serial').iterdir())
+
+
+@pytest.mark.parametrize('domain_size', [1, 2, 3, 10, 97, 1000, 4096, 5000])
+def test_feistel_permutation_is_a_bijection(domain_size):
+    permutation = FeistelPermutation(domain_size, seed=7)
+    assert sorted(permutation.permute(i) for i in range(domain_size)) == list(range(domain_size))
+
+
+def test_feistel_permutation_is_seeded():
+    permuted = [FeistelPermutation(1000, seed=7).permute(i) for i in range(1000)]
+    assert permuted == [FeistelPermutation(1000, seed=7).permute(i) for i in range(1000)]
+    assert permuted != [FeistelPermutation(1000, seed=8).permute(i) for i in range(1000)]
+    assert permuted != list(range(1000))
+
+
+def test_permutation_generator_offsets_are_disjoint():
+    first_keys = list(PrimaryKeyGeneratorFactory.provide_permutation_generator(100, 1100, 300, seed=7, offset=0)())
+    second_keys = list(PrimaryKeyGeneratorFactory.provide_permutation_generator(100, 1100, 300, seed=7, offset=300)())
+    assert len(set(first_keys)) == len(set(second_keys)) == 300
+    assert set(first_keys).isdisjoint(second_keys)
+    assert all(100 <= k < 1100 for k in first_keys + second_keys)
+    with pytest.raises(ValueError):
+        PrimaryKeyGeneratorFactory.provide_permutation_generator(100, 1100, 300, seed=7, offset=800)
@@ -0,0 +1,65 @@
+import sys
+
+from src.asterixdb.shopalot.equality_predicate_query._users import UsersEqualityPredicateQuery
+from src.asterixdb.baseline import BaselineStore
+
+
+def test_invoke_end_to_end(config_file, monkeypatch, results_dirs, read_results):
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'atom', '--config', config_file])
+    suite = UsersEqualityPredicateQuery()
+    results_dirs.append(suite.config['resultsDir'])
+    suite.invoke()
+
+    records = read_results(suite.config['resultsDir'])
+    restart_records = [r for r in records if 'restart' in r]
+    assert len(restart_records) == 1
+    assert restart_records[0]['dataverse'] == suite.dataverse
+    assert restart_records[0]['configHash'] == suite.config_hash
+    for variant_number in [1, 2]:
+        variant_records = [r for r in records if r.get('queryNumber') == variant_number and 'runNumber' in r]
+        assert len(variant_records) == suite.num_queries
+
+
+def test_log_results_without_client_time(config_file, monkeypatch, results_dirs, read_results):
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'sarr', '--config', config_file])
+    suite = UsersEqualityPredicateQuery()
+    results_dirs.append(suite.config['resultsDir'])
+
+    # A timed-out statement has a status, but no clientTime.
+    suite.log_results({'status': 'Timeout. Exception: Read timed out.', 'clientContextID': 'a'})
+    suite.log_results({'status': 'success', 'clientTime': 0.5, 'metrics': {'elapsedTime': '0.4s'}})
+    suite.close_outputs()
+
+    assert suite.variant_latencies == [0.5]
+    assert len(read_results(suite.config['resultsDir'])) == 2
+
+
+def test_sweep_open_loop(config_file, monkeypatch, results_dirs, read_results):
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'atom', '--config', config_file,
+                                      '--rates', '20', '40', '--duration', '0.25', '--schedule', 'constant'])
+    suite = UsersEqualityPredicateQuery()
+    results_dirs.append(suite.config['resultsDir'])
+    suite._sweep_open_loop()
+    suite.close_outputs()
+
+    records = read_results(suite.config['resultsDir'])
+    sweep_records = [r for r in records if 'openLoopSweep' in r]
+    assert [r['variant'] for r in sweep_records] == ['atom-1', 'atom-2']
+    assert all(r['dataverse'] == suite.dataverse and r['configHash'] == suite.config_hash for r in sweep_records)
+    for sweep_record in sweep_records:
+        assert [s['offeredRate'] for s in sweep_record['openLoopSweep']['rates']] == [20.0, 40.0]
+        assert all(s['numberOfFailures'] == 0 for s in sweep_record['openLoopSweep']['rates'])
+    number_of_requests = sum(s['numberOfRequests'] for r in sweep_records for s in r['openLoopSweep']['rates'])
+    assert {r['configHash'] for r in records if 'openLoop' in r} == {BaselineStore.config_hash(suite.config)}
+    assert len([r for r in records if 'openLoop' in r]) == number_of_requests > 0
+
+
+def test_config_hash_after_resizing_pool(config_file, monkeypatch, results_dirs):
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'atom', '--config', config_file, '--clients', '8'])
+    suite = UsersEqualityPredicateQuery()
+    results_dirs.append(suite.config['resultsDir'])
+    suite.close_outputs()
+
+    # Our results must be tagged with the pool we actually measure with.
+    assert suite.config['benchmark']['httpSession']['poolSize'] == 8
+    assert suite.config_hash == BaselineStore.config_hash(suite.config)
@@ -0,0 +1,93 @@
+import threading
+import socket
+import json
+import time
+
+import pytest
+
+from src.feed import AnalysisFeedWriter
+
+
+class MockFeed:
+    """ A stand-in for the analysis cluster's socket feed, which records every line it receives. """
+
+    def __init__(self):
+        self.server_socket = socket.create_server(('127.0.0.1', 0))
+        self.port = self.server_socket.getsockname()[1]
+        self.connections, self.lines = [], []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                connection, _ = self.server_socket.accept()
+            except OSError:
+                return
+            self.connections.append(connection)
+            threading.Thread(target=self._receive, args=(connection,), daemon=True).start()
+
+    def _receive(self, connection):
+        buffer = b''
+        while True:
+            try:
+                received = connection.recv(65536)
+            except OSError:
+                return
+            if received == b'':
+                return
+            buffer = buffer + received
+            while b'\n' in buffer:
+                line, buffer = buffer.split(b'\n', 1)
+                self.lines.append(json.loads(line))
+
+    def wait_for(self, number_of_lines, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while len(self.lines) < number_of_lines and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.lines
+
+    def close(self):
+        [c.close() for c in self.connections]
+        self.server_socket.close()
+
+
+@pytest.fixture
+def feed():
+    mock_feed = MockFeed()
+    yield mock_feed
+    mock_feed.close()
+
+
+def test_replayed_records_keep_their_id(feed, tmp_path):
+    feed_writer = AnalysisFeedWriter('127.0.0.1', feed.port, str(tmp_path))
+    feed_writer.write([{'runNumber': 1}])
+    assert len(feed.wait_for(1)) == 1
+
+    # The feed goes away, so our next record is journaled (with the key it is sent with later).
+    feed.connections[0].shutdown(socket.SHUT_RDWR)
+    time.sleep(0.1)
+    feed_writer.write([{'runNumber': 2}])
+    with open(feed_writer.journal_filename) as journal_fp:
+        journaled_records = [json.loads(line) for line in journal_fp]
+    assert [r['runNumber'] for r in journaled_records] == [2]
+    assert 'id' in journaled_records[0]
+
+    # Once we reconnect, our journal is replayed before any new records.
+    feed_writer.next_connect_time = 0.0
+    feed_writer.write([{'runNumber': 3}])
+    feed_writer.close()
+
+    received_records = feed.wait_for(3)
+    assert [r['runNumber'] for r in received_records] == [1, 2, 3]
+    assert received_records[1]['id'] == journaled_records[0]['id']
+    assert len({r['id'] for r in received_records}) == 3
+    assert feed_writer.metrics['recordsJournaled'] == 1
+    assert feed_writer.metrics['recordsReplayed'] == 1
+    assert feed_writer.journaled_records == 0
+
+
+def test_key_records():
+    keyed_records = AnalysisFeedWriter.key_records([{'runNumber': 1}, {'runNumber': 2, 'id': 'a'}])
+    assert keyed_records[1]['id'] == 'a'
+    assert AnalysisFeedWriter.key_records(keyed_records) == keyed_records
+    assert keyed_records[0]['id'] != keyed_records[1]['id']
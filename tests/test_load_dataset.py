@@ -0,0 +1,58 @@
+import json
+import sys
+
+from src.asterixdb.shopalot.load_basic_dataset._users import LoadBasicUsersDataset
+
+
+def test_benchmark_samples_load_time(asterixdb, config_file, monkeypatch, results_dirs, read_results):
+    # Our DROP + CREATE are slow here, so sampling the whole run would not give us the time of our LOAD.
+    asterixdb.respond_f = lambda statement: {
+        'status': 'success', 'results': [],
+        'metrics': {'elapsedTime': '2s' if 'LOAD DATASET' in statement else '500ms', 'executionTime': '1ms'}
+    }
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'sarr', '--config', config_file])
+    suite = LoadBasicUsersDataset()
+    results_dirs.append(suite.config['resultsDir'])
+    assert suite._benchmark_until_stable(suite.benchmark_sarr)
+    suite.close_outputs()
+
+    sampling_records = [r['sampling'] for r in read_results(suite.config['resultsDir']) if 'sampling' in r]
+    assert len(sampling_records) == 1
+    assert sampling_records[0]['numberOfSamples'] == LoadBasicUsersDataset.NUMBER_OF_REPEATS
+    assert sampling_records[0]['median'] == 2.0
+
+    # Only the LOAD statement of each run has a throughput, and it is against the time of that statement.
+    load_records = [r for r in read_results(suite.config['resultsDir']) if 'load' in r]
+    assert len(load_records) == LoadBasicUsersDataset.NUMBER_OF_REPEATS
+    for load_record in load_records:
+        assert 'LOAD DATASET' in load_record['statement']
+        assert load_record['script']['statementNumber'] == load_record['script']['numberOfStatements']
+        assert load_record['load']['shardCount'] == 1
+        assert load_record['load']['recordsPerSecond'] == load_record['load']['numberOfRecords'] / 2.0
+
+
+def test_benchmark_stops_on_failure(asterixdb, config_file, monkeypatch, results_dirs):
+    asterixdb.respond_f = lambda statement: {'status': 'fatal', 'errors': [{'msg': 'Cannot load.'}]} \
+        if 'LOAD DATASET' in statement else asterixdb.default_response(statement)
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'sarr', '--config', config_file])
+    suite = LoadBasicUsersDataset()
+    results_dirs.append(suite.config['resultsDir'])
+    assert not suite._benchmark_until_stable(suite.benchmark_sarr)
+    suite.close_outputs()
+
+
+def test_sharded_load_profile(config_file, monkeypatch, results_dirs, tmp_path):
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'atom', '--config', config_file, '--sharded'])
+    suite = LoadBasicUsersDataset()
+    results_dirs.append(suite.config['resultsDir'])
+    suite.config['shopalot']['dataPath'] = str(tmp_path)
+    with open(tmp_path / 'UsersManifest.json', 'w') as manifest_fp:
+        json.dump({'idRange': {'start': 0, 'end': 90}, 'shardNodes': ['nc1', 'nc2'],
+                   'shardRanges': [{'start': 0, 'end': 40}, {'start': 40, 'end': 90}],
+                   'atomDataverse': {'fullFilename': ['/data/Users-Shard0.json', '/data/Users-Shard1.json']}},
+                  manifest_fp)
+
+    assert suite.load_source('users', 'atomDataverse') == \
+        'nc1:////data/Users-Shard0.json,nc2:////data/Users-Shard1.json'
+    assert suite.load_profile == {'dataset': 'users', 'shardCount': 2, 'shardRecords': [40, 50], 'numberOfRecords': 90}
+    suite.close_outputs()
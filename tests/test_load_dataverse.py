@@ -0,0 +1,41 @@
+import sys
+
+import pytest
+
+from src.asterixdb.tpc_ch.load_dataverse._basic import LoadBasicDataverse
+from src.asterixdb.baseline import BaselineStore
+
+
+def test_load_profile_per_dataset(config_file, monkeypatch, results_dirs, read_results, tmp_path):
+    # Only two of our datasets have a local source file here.
+    (tmp_path / 'customer.json').write_text('{"c_id": 1}\n{"c_id": 2}\n{"c_id": 3}\n')
+    (tmp_path / 'nation.json').write_text('{"n_nationkey": 1}\n\n')
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = LoadBasicDataverse()
+    results_dirs.append(suite.config['resultsDir'])
+    suite.config['tpc_ch']['dataPath'] = str(tmp_path)
+    suite.load_dataverse()
+    suite.close_outputs()
+
+    load_profiles = {r['load']['dataset']: r['load'] for r in read_results(suite.config['resultsDir']) if 'load' in r}
+    assert set(load_profiles.keys()) == set(LoadBasicDataverse.DATASET_FILES.keys())
+    assert load_profiles['Customer']['numberOfRecords'] == 3
+    assert load_profiles['Customer']['numberOfBytes'] == (tmp_path / 'customer.json').stat().st_size
+    assert load_profiles['Customer']['recordsPerSecond'] == pytest.approx(3 / 0.0015)
+    assert load_profiles['Nation']['numberOfRecords'] == 1
+    assert load_profiles['Orders'] == {'dataset': 'Orders', 'parallelism': suite.config['tpc_ch']['loadParallelism']}
+
+
+def test_pool_size_follows_load_parallelism(config_file, monkeypatch, results_dirs, read_results, tmp_path):
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = LoadBasicDataverse()
+    results_dirs.append(suite.config['resultsDir'])
+    suite.config['tpc_ch']['dataPath'] = str(tmp_path)
+    suite.config['tpc_ch']['loadParallelism'] = 8
+    suite.load_dataverse()
+    suite.close_outputs()
+
+    # Each of our concurrent loads has its own connection, and our results are tagged with that pool.
+    assert suite.config['benchmark']['httpSession']['poolSize'] == 8
+    assert {r['configHash'] for r in read_results(suite.config['resultsDir'])} == \
+        {BaselineStore.config_hash(suite.config)}
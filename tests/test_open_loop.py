@@ -0,0 +1,41 @@
+from src.executor import AbstractBenchmarkRunnable
+from src.asterixdb.open_loop import OpenLoopLoadGenerator
+
+
+class _StubRunnable:
+    """ Just enough of a runnable for our load generator: every statement succeeds immediately. """
+    percentile = staticmethod(AbstractBenchmarkRunnable.percentile)
+
+    def __init__(self):
+        self.config = {'benchmark': {'httpSession': {'poolSize': 1, 'isKeepAlive': True}}}
+        self.statements, self.results, self.summaries = [], [], []
+
+    def reset_http_session(self):
+        pass
+
+    def execute_sqlpp(self, statement):
+        self.statements.append(statement)
+        return {'status': 'success', 'clientTime': 0.0}
+
+    def log_results(self, results):
+        self.results.append(results)
+
+    def log_summary(self, summary):
+        self.summaries.append(summary)
+
+
+def test_sweep_stops_once_no_statements_remain():
+    runnable = _StubRunnable()
+    load_generator = OpenLoopLoadGenerator(runnable, 'constant', 0.2, 4, seed=0)
+    remaining_keys = list(range(6))
+
+    def _statements_f(rate):
+        statements = [f'UPSERT {k};' for k in remaining_keys[:load_generator.number_of_arrivals(rate)]]
+        del remaining_keys[:len(statements)]
+        return statements
+
+    sweep_summary = load_generator.sweep([20, 40, 80], _statements_f, variant='stub')
+    assert [s['offeredRate'] for s in sweep_summary['rates']] == [20]
+    assert runnable.summaries == [{'openLoopSweep': sweep_summary, 'variant': 'stub'}]
+    assert runnable.config['benchmark']['httpSession']['poolSize'] == 4
+    assert len(runnable.results) == sweep_summary['rates'][0]['numberOfRequests'] > 0
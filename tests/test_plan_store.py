@@ -0,0 +1,53 @@
+import json
+import sys
+import io
+
+from src.plan_store import PlanStore
+from src.asterixdb.shopalot.load_basic_dataset._users import LoadBasicUsersDataset
+
+PLANS = {'logicalPlan': 'distribute result [$$1]', 'job': {'operators': [{'id': 1}]}}
+
+
+def test_put_stores_each_plan_once(tmp_path):
+    plan_store = PlanStore(str(tmp_path / 'plans'))
+    plan_hash, is_new_plan = plan_store.put(PLANS)
+    assert is_new_plan and plan_hash == PlanStore.content_hash(PLANS)
+    assert plan_store.put(json.loads(json.dumps(PLANS))) == (plan_hash, False)
+    assert sorted(p.name for p in (tmp_path / 'plans').iterdir()) == [plan_hash + '.json']
+    assert plan_store.get(plan_hash) == PLANS
+
+
+def test_rehydrate(tmp_path):
+    plan_store = PlanStore(str(tmp_path / 'plans'))
+    plan_hash, _ = plan_store.put(PLANS)
+    results_fp = io.StringIO('\n'.join([
+        json.dumps({'runNumber': 1, 'planHash': plan_hash}),
+        '',
+        json.dumps({'runNumber': 2, 'planHash': None}),
+        json.dumps({'runNumber': 3, 'planHash': plan_hash, 'plans': {'logicalPlan': 'inline'}}),
+        json.dumps({'runNumber': 4})
+    ]))
+
+    # A new store (e.g. of a later analysis) reads the plans that an earlier run wrote.
+    rehydrated_results = list(PlanStore(str(tmp_path / 'plans')).rehydrate(results_fp))
+    assert [r['runNumber'] for r in rehydrated_results] == [1, 2, 3, 4]
+    assert rehydrated_results[0]['plans'] == PLANS
+    assert 'plans' not in rehydrated_results[1] and 'plans' not in rehydrated_results[3]
+    assert rehydrated_results[2]['plans'] == {'logicalPlan': 'inline'}
+
+
+def test_log_results_with_plan_store(config_file, monkeypatch, results_dirs, read_results):
+    import src.executor
+    monkeypatch.setitem(src.executor.logging_json['results'], 'isPlanStore', True)
+    monkeypatch.setattr(sys, 'argv', ['_users.py', 'sarr', '--config', config_file])
+    suite = LoadBasicUsersDataset()
+    results_dirs.append(suite.config['resultsDir'])
+    [suite.log_results({'status': 'success', 'runNumber': n, 'plans': dict(PLANS)}) for n in [1, 2]]
+    suite.close_outputs()
+
+    # Only the hash of a plan is logged with our results, and the store gives us the plans back.
+    records = [r for r in read_results(suite.config['resultsDir']) if 'runNumber' in r]
+    assert all('plans' not in r and r['planHash'] == PlanStore.content_hash(PLANS) for r in records)
+    with open(suite.config['resultsDir'] + '/results.json') as results_fp:
+        rehydrated_results = [r for r in suite.plan_store.rehydrate(results_fp) if 'runNumber' in r]
+    assert [r['plans'] for r in rehydrated_results] == [PLANS, PLANS]
@@ -0,0 +1,89 @@
+import threading
+import json
+import time
+import io
+
+from src.executor import ResultsSink
+
+RESULTS_CONFIG = {'isFile': True, 'isSocket': False, 'isConsole': False, 'sinkBatchSize': 3, 'sinkQueueSize': 100}
+
+
+class BlockingStore:
+    """ A results store whose first write blocks until released, so records can queue up behind it. """
+
+    def __init__(self):
+        self.is_writing, self.is_released = threading.Event(), threading.Event()
+        self.batches, self.is_closed = [], False
+
+    def write(self, records):
+        self.is_writing.set()
+        self.is_released.wait(timeout=5)
+        self.batches.append([r['n'] for r in records])
+
+    def close(self):
+        self.is_closed = True
+
+
+def _blocked_sink(results_config=None):
+    results_store, results_fp = BlockingStore(), io.StringIO()
+    results_sink = ResultsSink(results_config or RESULTS_CONFIG, results_fp, results_store=results_store)
+    results_sink.submit({'n': 0})
+    assert results_store.is_writing.wait(timeout=5)
+    return results_sink, results_store, results_fp
+
+
+def test_batches_queued_records():
+    results_sink, results_store, results_fp = _blocked_sink()
+    [results_sink.submit({'n': n}) for n in range(1, 8)]
+    assert results_sink.queue_depth == results_sink.max_queue_depth == 7
+    results_store.is_released.set()
+
+    # Every record (and only those) is marked done, otherwise our flush would never return.
+    flush_thread = threading.Thread(target=results_sink.flush)
+    flush_thread.start()
+    flush_thread.join(timeout=5)
+    assert not flush_thread.is_alive()
+
+    assert results_store.batches == [[0], [1, 2, 3], [4, 5, 6], [7]]
+    assert [json.loads(line)['n'] for line in results_fp.getvalue().splitlines()] == list(range(8))
+    assert (results_sink.written_records, results_sink.written_batches) == (8, 4)
+    results_sink.close()
+
+
+def test_close_drains_records_ahead_of_stop():
+    results_sink, results_store, _ = _blocked_sink()
+    [results_sink.submit({'n': n}) for n in range(1, 3)]
+    close_thread = threading.Thread(target=results_sink.close)
+    close_thread.start()
+    while results_sink.queue_depth < 3:
+        time.sleep(0.01)
+
+    # Our stop marker arrives in the same batch as our last records, which are still written.
+    results_store.is_released.set()
+    close_thread.join(timeout=5)
+    assert not close_thread.is_alive() and not results_sink.sink_thread.is_alive()
+    assert results_store.batches == [[0], [1, 2]]
+    assert results_store.is_closed
+    assert results_sink.results_queue.unfinished_tasks == 0
+
+
+def test_drops_records_when_full():
+    results_sink, results_store, results_fp = _blocked_sink({**RESULTS_CONFIG, 'sinkQueueSize': 2})
+    [results_sink.submit({'n': n}) for n in range(1, 5)]
+    assert results_sink.dropped_records == 2
+    assert results_sink.max_queue_depth == 2
+    results_store.is_released.set()
+    results_sink.close()
+
+    assert results_store.batches == [[0], [1, 2]]
+    assert results_sink.written_records == 3
+
+
+def test_non_file_records_skip_the_results_file():
+    results_sink = ResultsSink(RESULTS_CONFIG, io.StringIO())
+    results_sink.submit({'n': 0})
+    results_sink.submit({'n': 1}, is_file=False)
+    results_sink.flush()
+    assert [json.loads(line)['n'] for line in results_sink.results_fp.getvalue().splitlines()] == [0]
+    assert results_sink.written_records == 2
+    results_sink.close()
@@ -0,0 +1,87 @@
+import statistics
+import random
+
+from src.sampling import AdaptiveSampler
+
+
+def test_warmup_samples_truncates_transient():
+    # A slow warm-up (e.g. a cold buffer cache) of 20 samples, and then a steady state.
+    random_generator = random.Random(0)
+    sampler = AdaptiveSampler()
+    [sampler.add(10.0 - i * 0.4) for i in range(20)]
+    [sampler.add(1.0 + random_generator.uniform(-0.01, 0.01)) for _ in range(80)]
+    assert 15 <= sampler.warmup_samples() <= 25
+    assert sampler.warmup_samples() % AdaptiveSampler.WARMUP_BATCH_SIZE == 0
+
+
+def test_warmup_samples_without_transient():
+    sampler = AdaptiveSampler()
+    [sampler.add(1.0) for _ in range(15)]
+    assert sampler.warmup_samples() == 0
+
+    # We need at least four batches to decide on a truncation point.
+    short_sampler = AdaptiveSampler()
+    [short_sampler.add(10.0 - i) for i in range(10)]
+    assert short_sampler.warmup_samples() == 0
+
+
+def test_median_interval():
+    sampler = AdaptiveSampler(confidence=0.95)
+    [sampler.add(float(v)) for _ in range(20) for v in [1, 2, 3, 4, 5]]
+
+    # Every batch has the same mean, so MSER-5 truncates nothing.
+    assert sampler.warmup_samples() == 0
+
+    # With n = 100 and z = 1.96, our interval spans the 40th to the 60th order statistic (0-indexed).
+    assert sampler.median_interval() == (3.0, 3.0, 4.0)
+    assert sampler.relative_ci() == 1 / 3
+
+
+def test_empty_sampler():
+    sampler = AdaptiveSampler()
+    assert sampler.median_interval() == (None, None, None)
+    assert sampler.relative_ci() is None
+    sampler.add(None)
+    assert sampler.number_of_samples == 0
+    assert sampler.number_of_failures == 1
+
+
+def test_converges_on_stable_measurements():
+    random_generator = random.Random(0)
+    sampler = AdaptiveSampler(target_relative_ci=0.05, min_samples=30, max_samples=1000)
+    while sampler.should_continue():
+        sampler.add(1.0 + random_generator.uniform(-0.01, 0.01))
+    assert sampler.stop_reason == 'converged'
+    assert sampler.number_of_samples == 30
+
+
+def test_stops_at_max_samples():
+    random_generator = random.Random(0)
+    sampler = AdaptiveSampler(target_relative_ci=0.01, min_samples=5, max_samples=50)
+    while sampler.should_continue():
+        sampler.add(random_generator.expovariate(1.0))
+    assert sampler.stop_reason == 'maxSamples'
+    assert sampler.number_of_samples == 50
+
+
+def test_fixed_samples_without_target():
+    # This is our sampler when adaptive sampling is disabled.
+    sampler = AdaptiveSampler(target_relative_ci=0, min_samples=3, max_samples=3)
+    while sampler.should_continue():
+        sampler.add(1.0)
+    assert (sampler.stop_reason, sampler.number_of_samples) == ('maxSamples', 3)
+
+
+def test_stops_on_time_budget():
+    sampler = AdaptiveSampler(min_samples=30, time_budget=0)
+    sampler.start_time = sampler.start_time - 1
+    assert not sampler.should_continue()
+    assert sampler.summary()['stopReason'] == 'timeBudget'
+
+
+def test_first_stop_reason_wins():
+    sampler = AdaptiveSampler()
+    sampler.stop('failure')
+    sampler.stop('maxRuns')
+    assert sampler.stop_reason == 'failure'
+    assert not sampler.should_continue()
@@ -0,0 +1,65 @@
+import threading
+import sqlite3
+import json
+import sys
+
+from src.sqlite_store import SQLiteResultsStore
+from src.asterixdb.tpc_ch.analytical_query._basic import BasicAnalyticalQuery
+
+
+def test_write_records(tmp_path):
+    database_filename = str(tmp_path / 'db' / 'results.db')
+    results_store = SQLiteResultsStore(database_filename, 'execution-1', 'Suite', 'atom', 'out/run', {'a': 1})
+    results_store.write([
+        {'logTime': 't1', 'status': 'success', 'clientTime': 0.5, 'queryNumber': 1, 'runNumber': 1,
+         'metrics': {'elapsedTime': '0.4s'}, 'parameters': {'date_1': 'x'}, 'dataverse': 'ATOM', 'extra': [1]},
+        {'logTime': 't2', 'status': 'Timeout', 'queryNumber': 1, 'runNumber': 2}
+    ])
+    results_store.write([{'logTime': 't3', 'executionID': 'execution-2', 'loadWindow': {'parallelism': 2}}])
+    results_store.close()
+
+    with sqlite3.connect(database_filename) as connection:
+        executions = connection.execute('SELECT * FROM Executions').fetchall()
+        results = connection.execute('SELECT executionID, suite, dataverse, queryNumber, runNumber, status, '
+                                     'clientTime, metrics, parameters, record '
+                                     'FROM Results ORDER BY resultID').fetchall()
+
+    # Our execution is only recorded once (with the time of its first record), however many batches we write.
+    assert executions == [('execution-1', 'Suite', 'atom', 'out/run', 't1', json.dumps({'a': 1}))]
+    assert results[0][:7] == ('execution-1', 'Suite', 'ATOM', 1, 1, 'success', 0.5)
+    assert json.loads(results[0][7]) == {'elapsedTime': '0.4s'} and json.loads(results[0][8]) == {'date_1': 'x'}
+    assert json.loads(results[0][9]) == {'extra': [1]}
+    assert results[1][5:9] == ('Timeout', None, None, None)
+    assert results[2][0] == 'execution-2' and json.loads(results[2][9]) == {'loadWindow': {'parallelism': 2}}
+
+
+def test_connects_on_the_writing_thread(tmp_path):
+    database_filename = str(tmp_path / 'results.db')
+    results_store = SQLiteResultsStore(database_filename, 'execution-1', 'Suite', 'atom', None, {})
+    assert results_store.connection is None
+
+    # Our connection is only usable on the thread that opened it, i.e. the thread of our results sink.
+    writer_thread = threading.Thread(target=lambda: results_store.write([{'status': 'success'}]) or
+                                     results_store.close())
+    writer_thread.start()
+    writer_thread.join(timeout=5)
+    with sqlite3.connect(database_filename) as connection:
+        assert connection.execute('SELECT COUNT(*) FROM Results').fetchone() == (1,)
+
+
+def test_suite_results_in_sqlite(config_file, monkeypatch, results_dirs, read_results, tmp_path):
+    import src.executor
+    monkeypatch.setitem(src.executor.logging_json['results'], 'isSQLite', True)
+    monkeypatch.setitem(src.executor.logging_json['results'], 'sqliteFile', str(tmp_path / 'results.db'))
+    monkeypatch.setattr(sys, 'argv', ['_basic.py', '--config', config_file])
+    suite = BasicAnalyticalQuery()
+    results_dirs.append(suite.config['resultsDir'])
+    [suite.log_results({'status': 'success', 'clientTime': 0.1 * n, 'queryNumber': 1, 'runNumber': n})
+     for n in [1, 2, 3]]
+    suite.close_outputs()
+
+    # Our SQLite database holds the same records as our results file.
+    with sqlite3.connect(str(tmp_path / 'results.db')) as connection:
+        results = connection.execute('SELECT executionID, suite, runNumber FROM Results ORDER BY resultID').fetchall()
+    assert results == [(suite.execution_id, 'BasicAnalyticalQuery', n) for n in [1, 2, 3]]
+    assert [r['runNumber'] for r in read_results(suite.config['resultsDir'])] == [1, 2, 3]
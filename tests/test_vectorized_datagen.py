@@ -0,0 +1,57 @@
+import datetime
+import time
+
+import numpy
+
+from src.asterixdb.shopalot.datagen import DatagenAbstractFactoryProvider
+from src.asterixdb.shopalot.datagen import PrimaryKeyGeneratorFactory
+from src.asterixdb.shopalot.vectorized_datagen import AbstractVectorizedOrdersDatagen
+from src.asterixdb.shopalot.vectorized_datagen import PhiloxCounterStream
+
+
+def _orders_datagen(**kwargs):
+    datagen_factory = DatagenAbstractFactoryProvider.provide_memory_abstract_factory(AbstractVectorizedOrdersDatagen)
+    return datagen_factory(primary_key_generator=None, dataset_size=100, chunk_size=10, pk_zfill=3,
+                           user_start_id=0, user_end_id=50, store_start_id=0, store_end_id=20, **kwargs)
+
+
+def test_philox_stream_is_counter_based():
+    philox_stream = PhiloxCounterStream(42)
+    pks = numpy.arange(0, 1000, dtype=numpy.uint64)
+    batch_words = philox_stream.words(pks, 0)
+
+    # Each PK maps to the same words in any batch (and with any other stream of the same seed).
+    for pk in [0, 1, 500, 999]:
+        single_words = PhiloxCounterStream(42).words([pk], 0)
+        assert [int(w[0]) for w in single_words] == [int(w[pk]) for w in batch_words]
+    assert all(numpy.all(w <= numpy.uint64(PhiloxCounterStream.WORD_MASK)) for w in batch_words)
+
+    # Other blocks (and other seeds) give us other words.
+    assert not numpy.array_equal(batch_words[0], philox_stream.words(pks, 1)[0])
+    assert not numpy.array_equal(batch_words[0], PhiloxCounterStream(43).words(pks, 0)[0])
+    assert len(numpy.unique(batch_words[0])) > 990
+
+
+def test_philox_stream_conversions():
+    uniforms = PhiloxCounterStream.to_uniform(PhiloxCounterStream(0).words(numpy.arange(10000), 0)[0])
+    assert numpy.all((uniforms >= 0.0) & (uniforms < 1.0))
+    assert abs(uniforms.mean() - 0.5) < 0.02
+    assert int(PhiloxCounterStream.to_long(numpy.uint64(1), numpy.uint64(2))) == (1 << 32) | 2
+
+
+def test_orders_are_a_function_of_their_pk():
+    orders_datagen = _orders_datagen()
+    single_record = orders_datagen.atom_mapper(7)
+    time.sleep(1.1)
+
+    # A later batch (i.e. a later "now") still gives us the same record for the same PK.
+    orders_datagen.reset_generation(PrimaryKeyGeneratorFactory.provide_range_generator(0, 20))
+    orders_datagen.invoke()
+    assert orders_datagen.atom_json[7] == single_record
+
+
+def test_orders_with_a_reference_time():
+    reference_time = datetime.datetime(2021, 6, 9, 12, 0, 0)
+    first_record = _orders_datagen(reference_time=reference_time).atom_mapper(3)
+    assert first_record == _orders_datagen(reference_time=reference_time).atom_mapper(3)
+    assert '2021-06-01 00:00:00' <= first_record['time_placed'] <= '2021-06-09 12:00:00'